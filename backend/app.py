@@ -1,12 +1,20 @@
-import asyncio, json, cv2, math, os, sys, time
-from datetime import datetime
-from typing import List, Set, Optional, Dict, Any, Tuple
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query, Body
+import asyncio, base64, csv, io, json, cv2, math, os, sys, threading, time
+from datetime import datetime, timezone
+from typing import List, Optional, Dict, Any, Tuple
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query, Body, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
-from models import Event
-from db import init_db, save
+from models import Event, Attempt, AttemptMetric
+from db import init_db, record_attempt, record_attempt_async
+from event_writer import EventWriter
+from compaction import Compactor
+from live_codec import LIVE_SUBPROTOCOL
+from live_publisher import LivePublisher
+from response_cache import ResponseCache
+from trajectory import TrajectoryWriter
+from model_registry import models
+from task_evaluators import TASK_EVALUATORS, BaseEval, Perception
 
 # Ensure local imports work (e.g., exercises/*)
 sys.path.append(os.path.dirname(__file__))
@@ -26,13 +34,13 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # -----------------------------------------------------------------------------
 # Camera / WS State
 # -----------------------------------------------------------------------------
 cap: Optional[cv2.VideoCapture] = None
-subscribers: Set[WebSocket] = set()
 latest_jpeg: Optional[bytes] = None
 SESSION_ID = "local"
 
@@ -41,6 +49,34 @@ DEBUG_OVERLAY = os.getenv("DEBUG_OVERLAY", "0").strip() in ("1", "true", "True")
 YOLO_IMGSZ = int(os.getenv("YOLO_IMGSZ", "512"))  # 512 is friendlier on CPU
 YOLO_CONF   = float(os.getenv("YOLO_CONF", "0.25"))
 
+# Live publishing: send on meaningful change, coalesce bursts, heartbeat when idle
+LIVE_PROGRESS_STEP  = float(os.getenv("LIVE_PROGRESS_STEP", "0.02"))
+LIVE_HEARTBEAT_S    = float(os.getenv("LIVE_HEARTBEAT_S", "1.0"))
+LIVE_MIN_INTERVAL_S = float(os.getenv("LIVE_MIN_INTERVAL_S", "0.1"))
+
+# Telemetry writes are batched: one transaction per EVENT_FLUSH_MS or EVENT_FLUSH_ROWS
+EVENT_FLUSH_MS   = int(os.getenv("EVENT_FLUSH_MS", "500"))
+EVENT_FLUSH_ROWS = int(os.getenv("EVENT_FLUSH_ROWS", "200"))
+EVENT_QUEUE_MAX  = int(os.getenv("EVENT_QUEUE_MAX", "5000"))
+
+# Polled read endpoints are cached until a writer bumps their tag (see response_cache.py):
+#   "events" <- event writer flush / compaction, "attempts" <- attempt recorded, "config" <- POSTs
+response_cache = ResponseCache()
+
+event_writer = EventWriter(flush_ms=EVENT_FLUSH_MS, flush_rows=EVENT_FLUSH_ROWS, max_queue=EVENT_QUEUE_MAX,
+                           on_flush=lambda: response_cache.bump("events"))
+
+# Tick retention/rollups run on their own thread (see compaction.py for the env knobs)
+compactor = Compactor(on_change=lambda: response_cache.bump("events"))
+
+# Per-attempt binary trajectories (landmarks/boxes per frame, see trajectory.py)
+TRAJECTORY_DIR = os.getenv("TRAJECTORY_DIR", "./trajectories")
+TRAJECTORY_ENABLED = os.getenv("TRAJECTORY_ENABLED", "1").strip() in ("1", "true", "True")
+
+# Cold start: the API serves as soon as the db is ready; the camera opens and (unless
+# MODEL_WARMUP=0) YOLO/MediaPipe load in worker threads afterwards
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "1").strip() in ("1", "true", "True")
+
 # FPS estimator
 _last_ts = None
 _fps = 0.0
@@ -48,7 +84,7 @@ _fps = 0.0
 # -----------------------------------------------------------------------------
 # Session Config
 # -----------------------------------------------------------------------------
-session_cfg: Dict[str, Any] = {"dominant": "right", "target_mode": "fixed"}
+session_cfg: Dict[str, Any] = {"dominant": "right", "target_mode": "fixed", "patient_id": None}
 
 # -----------------------------------------------------------------------------
 # Live Payload
@@ -65,15 +101,8 @@ class LivePayload(BaseModel):
     event: Optional[str] = None
     task: Optional[str] = None
 
-async def broadcast(payload: dict):
-    dead = []
-    for ws in list(subscribers):
-        try:
-            await ws.send_text(json.dumps(payload))
-        except Exception:
-            dead.append(ws)
-    for ws in dead:
-        subscribers.discard(ws)
+publisher = LivePublisher(progress_step=LIVE_PROGRESS_STEP, heartbeat_s=LIVE_HEARTBEAT_S,
+                          min_interval_s=LIVE_MIN_INTERVAL_S)
 
 # -----------------------------------------------------------------------------
 # Models: YOLO + MediaPipe (lazy)
@@ -81,36 +110,55 @@ async def broadcast(payload: dict):
 YOLO_READY = False
 MP_READY = False
 model = None
-mp_hands = mp_pose = mp_face = None
+mp_pose = None
 hands = pose = face = None
+# registry handles (model_registry.py); `with handle:` serializes calls into the shared instance
+_yolo_h = _hands_h = _pose_h = _face_h = None
+
+# light configs for realtime
+HANDS_CFG = dict(static_image_mode=False, max_num_hands=2, model_complexity=0,
+                 min_detection_confidence=0.4, min_tracking_confidence=0.4)
+POSE_CFG  = dict(static_image_mode=False, model_complexity=0, enable_segmentation=False,
+                 min_detection_confidence=0.5, min_tracking_confidence=0.5)
+FACE_CFG  = dict(static_image_mode=False, max_num_faces=1, refine_landmarks=True,
+                 min_detection_confidence=0.5, min_tracking_confidence=0.5)
 
 
-def _lazy_init_models():
-    """Load YOLO + MediaPipe once (CPU by default)."""
-    global YOLO_READY, MP_READY, model, mp_hands, mp_pose, mp_face, hands, pose, face
+_models_lock = threading.Lock()  # startup warm-up and /active-task may both get here first
+
+def _lazy_init_models(blocking: bool = True):
+    """Acquire YOLO + MediaPipe from the shared model registry once (CPU by default).
+    blocking=False returns at once if another thread is loading them."""
+    if not _models_lock.acquire(blocking):
+        return
+    try:
+        _init_models()
+    finally:
+        _models_lock.release()
+
+def _init_models():
+    global YOLO_READY, MP_READY, model, mp_pose, hands, pose, face, _yolo_h, _hands_h, _pose_h, _face_h
     if not YOLO_READY:
         try:
-            from ultralytics import YOLO
-            model = YOLO("yolov10b.pt")  # COCO weights (bottle=39)
+            _yolo_h = models.acquire("yolo", weights=YOLO_WEIGHTS)  # COCO weights (bottle=39)
+            model = _yolo_h.obj
             YOLO_READY = True
         except Exception as e:
             print(f"[WARN] YOLO init failed: {e}")
             YOLO_READY = False
     if not MP_READY:
+        got = []
         try:
             import mediapipe as mp
-            mp_hands = mp.solutions.hands
-            mp_pose  = mp.solutions.pose
-            mp_face  = mp.solutions.face_mesh
-            # light configs for realtime
-            hands = mp_hands.Hands(static_image_mode=False, max_num_hands=2, model_complexity=0,
-                                   min_detection_confidence=0.4, min_tracking_confidence=0.4)
-            pose  = mp_pose.Pose(static_image_mode=False, model_complexity=0, enable_segmentation=False,
-                                 min_detection_confidence=0.5, min_tracking_confidence=0.5)
-            face  = mp_face.FaceMesh(static_image_mode=False, max_num_faces=1, refine_landmarks=True,
-                                     min_detection_confidence=0.5, min_tracking_confidence=0.5)
+            mp_pose = mp.solutions.pose
+            for kind, cfg in (("hands", HANDS_CFG), ("pose", POSE_CFG), ("face_mesh", FACE_CFG)):
+                got.append(models.acquire(kind, **cfg))
+            _hands_h, _pose_h, _face_h = got
+            hands, pose, face = (h.obj for h in got)
             MP_READY = True
         except Exception as e:
+            for h in got:
+                h.release()
             print(f"[WARN] MediaPipe init failed: {e}")
             MP_READY = False
 
@@ -140,8 +188,9 @@ def _detect_bottle_xyxy(frame_bgr):
     h, w = frame_bgr.shape[:2]
     try:
         classes = _resolve_class_ids()  # prefer bottle/cup/glass
-        res = model.predict(source=frame_bgr, imgsz=YOLO_IMGSZ, conf=YOLO_CONF,
-                            device="cpu", verbose=False, classes=classes)[0]
+        with _yolo_h:
+            res = model.predict(source=frame_bgr, imgsz=YOLO_IMGSZ, conf=YOLO_CONF,
+                                device="cpu", verbose=False, classes=classes)[0]
         if res.boxes is None:
             return None
         best = None
@@ -162,13 +211,15 @@ def _detect_bottle_xyxy(frame_bgr):
 # ---- MediaPipe helpers -------------------------------------------------------
 
 def _mouth_and_ear_metrics(img_rgb):
-    """Return ((mx,my), head_width_px) where head_width≈ear distance; values may be None."""
+    """Return ((mx,my), head_width_px, (l_ear, r_ear)) where head_width≈ear distance; values may be None."""
     if not MP_READY:
-        return (None, None)
-    fr = face.process(img_rgb)
-    pr = pose.process(img_rgb)
+        return (None, None, None)
+    with _pose_h, _face_h:
+        fr = face.process(img_rgb)
+        pr = pose.process(img_rgb)
     mouth_center = None
     head_width = None
+    ears = None
     h, w, _ = img_rgb.shape
     if fr.multi_face_landmarks:
         landmarks = fr.multi_face_landmarks[0].landmark
@@ -181,15 +232,17 @@ def _mouth_and_ear_metrics(img_rgb):
         lx, ly = int(l_ear.x * w), int(l_ear.y * h)
         rx, ry = int(r_ear.x * w), int(r_ear.y * h)
         head_width = math.hypot(rx - lx, ry - ly)
+        ears = ((lx, ly), (rx, ry))
     except Exception:
         pass
-    return mouth_center, head_width
+    return mouth_center, head_width, ears
 
 
 def _hand_landmarks(img_rgb):
     if not MP_READY:
         return {}
-    res = hands.process(img_rgb)
+    with _hands_h:
+        res = hands.process(img_rgb)
     out = {"left": {}, "right": {}}
     if not res.multi_hand_landmarks or not res.multi_handedness:
         return out
@@ -201,267 +254,86 @@ def _hand_landmarks(img_rgb):
             dic[i] = (int(p.x * w), int(p.y * h))
     return out
 
-# Choose whichever hand is closest to a target point (fallback to any)
-HandTip = Tuple[int, int]
-
-def _choose_hand_near(target: Optional[Tuple[int,int]], hands_xy: Dict[str, Dict[int, HandTip]]) -> Optional[Tuple[str, HandTip]]:
-    candidates: list[Tuple[str, HandTip, float]] = []
-    for side in ("left", "right"):
-        tip = hands_xy.get(side, {}).get(8)  # index fingertip
-        if tip is None:
-            continue
-        d = 0.0 if target is None else math.hypot(tip[0] - target[0], tip[1] - target[1])
-        candidates.append((side, tip, d))
-    if not candidates:
-        return None
-    candidates.sort(key=lambda x: x[2])
-    return (candidates[0][0], candidates[0][1])
-
-# -----------------------------------------------------------------------------
-# Evaluators (return overlay elements for drawing)
-# -----------------------------------------------------------------------------
-class BaseEval:
-    name: str
-    def start(self, **kwargs): ...
-    def update(self, frame) -> Dict[str, Any]: ...
-    def stop(self): ...
-
-class TimedEval(BaseEval):
-    def __init__(self, seconds=3.0):
-        self.seconds = seconds; self.t0 = None
-    def start(self, **kwargs):
-        self.seconds = float(kwargs.get("seconds", self.seconds))
-        self.t0 = time.time()
-    def update(self, frame):
-        dt = time.time() - (self.t0 or time.time())
-        return {"passed": dt >= self.seconds, "progress": min(1.0, dt / self.seconds)}
-    def stop(self):
-        pass
-
-class ReachBottleEval(BaseEval):
-    name = "reach_bottle"
-    def start(self, **kwargs):
-        _lazy_init_models()
-    def update(self, frame):
-        if not (YOLO_READY and MP_READY):
-            return {"passed": False, "progress": 0.0}
-        img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        det = _detect_bottle_xyxy(frame)
-        hands_xy = _hand_landmarks(img_rgb)
-        mouth, head_w = _mouth_and_ear_metrics(img_rgb)
-        overlay = []
-        if det:
-            x1, y1, x2, y2, _ = det
-            cx, cy = (x1 + x2)//2, (y1 + y2)//2
-            overlay.append(("rect", (x1,y1,x2,y2), (0,255,0), 2))
-            overlay.append(("circle", (cx,cy), 6, (0,255,0), -1))
-        else:
-            return {"passed": False, "progress": 0.0, "overlay": overlay}
-        sel = _choose_hand_near((cx,cy), hands_xy)
-        if sel:
-            _, idx = sel
-            overlay.append(("circle", idx, 8, (255,255,255), -1))
-        else:
-            return {"passed": False, "progress": 0.0, "overlay": overlay}
-        if not head_w:
-            return {"passed": False, "progress": 0.0, "overlay": overlay}
-        dist = math.hypot(idx[0]-cx, idx[1]-cy)
-        tol = max(20.0, 0.6 * head_w)
-        overlay.append(("text", f"dist={int(dist)} tol={int(tol)}", (10, 60), 0.7, (255,255,255), 2))
-        return {"passed": dist <= tol, "progress": max(0.0, min(1.0, 1.0 - dist/(tol*2))), "overlay": overlay}
-    def stop(self):
-        pass
-
-class GrabHoldEval(BaseEval):
-    name = "grab_hold"
-    def __init__(self):
-        self.t_in = None
-    def start(self, **kwargs):
-        _lazy_init_models(); self.t_in = None
-    def update(self, frame):
-        if not (YOLO_READY and MP_READY):
-            return {"passed": False, "progress": 0.0}
-        img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        det = _detect_bottle_xyxy(frame)
-        hands_xy = _hand_landmarks(img_rgb)
-        overlay = []
-        if not det:
-            self.t_in = None
-            return {"passed": False, "progress": 0.0, "overlay": overlay}
-        x1, y1, x2, y2, _ = det
-        cx, cy = (x1 + x2)//2, (y1 + y2)//2
-        overlay.append(("rect", (x1,y1,x2,y2), (0,255,0), 2))
-        sel = _choose_hand_near((cx,cy), hands_xy)
-        if sel:
-            _, tip = sel
-            overlay.append(("circle", tip, 8, (255,255,255), -1))
-        else:
-            self.t_in = None
-            return {"passed": False, "progress": 0.0, "overlay": overlay}
-        inside = (x1 <= tip[0] <= x2) and (y1 <= tip[1] <= y2)
-        if inside:
-            if self.t_in is None:
-                self.t_in = time.time()
-            held = time.time() - self.t_in
-            overlay.append(("text", f"hold={held:.2f}s", (10, 60), 0.7, (255,255,255), 2))
-            return {"passed": held >= 1.5, "progress": min(1.0, held / 1.5), "overlay": overlay}
-        else:
-            self.t_in = None
-            return {"passed": False, "progress": 0.0, "overlay": overlay}
-    def stop(self):
-        pass
-
-# Lift-to-mouth via external helper if present
-LiftProcess = None
-MOUTH_SCALE_DEFAULT = 0.8
-try:
-    from exercises.lift_to_mouth_test import (
-        process_frame as _lift_process_frame,
-        DEFAULT_MOUTH_SCALE as _MOUTH_SCALE_DEFAULT,
-    )
-    LiftProcess = _lift_process_frame
-    MOUTH_SCALE_DEFAULT = _MOUTH_SCALE_DEFAULT
-except Exception:
-    LiftProcess = None
-
-class LiftToMouthEval(BaseEval):
-    name = "lift_to_mouth"
-    def __init__(self):
-        self.mouth_scale = MOUTH_SCALE_DEFAULT
-    def start(self, **kwargs):
-        _lazy_init_models()
-        self.mouth_scale = float(kwargs.get("mouth_scale", self.mouth_scale))
-    def update(self, frame):
-        if not (YOLO_READY and MP_READY):
-            return {"passed": False, "progress": 0.0}
-        overlay = []
-        if LiftProcess:
-            bottle_pos, reached = LiftProcess(frame, model, hands, face, pose, self.mouth_scale)
-            if bottle_pos:
-                overlay.append(("circle", bottle_pos, 10, (0,255,0), 2))
-            overlay.append(("text", f"reached={bool(reached)}", (10, 60), 0.7, (255,255,255), 2))
-            return {"passed": bool(reached), "progress": 1.0 if reached else 0.0, "overlay": overlay}
-        # Fallback: approximate
-        img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        mouth, head_w = _mouth_and_ear_metrics(img_rgb)
-        det = _detect_bottle_xyxy(frame)
-        if det:
-            x1, y1, x2, y2, _ = det
-            overlay.append(("rect", (x1,y1,x2,y2), (0,255,0), 2))
-        if mouth:
-            overlay.append(("circle", mouth, 8, (255,255,255), -1))
-        if not det or not mouth or not head_w:
-            return {"passed": False, "progress": 0.0, "overlay": overlay}
-        cx = (x1 + x2)//2; cy = (y1 + y2)//2
-        dist = math.hypot(mouth[0]-cx, mouth[1]-cy)
-        tol = max(20.0, 0.5 * head_w)
-        overlay.append(("text", f"d={int(dist)} tol={int(tol)}", (10, 60), 0.7, (255,255,255), 2))
-        return {"passed": dist <= tol, "progress": 1.0 if dist <= tol else 0.0, "overlay": overlay}
-    def stop(self):
-        pass
+# Whole-frame perception (offline tools / perception_cache.py): same helpers, one dict
+YOLO_WEIGHTS = "yolov10b.pt"
 
-class HoldAtMouthEval(BaseEval):
-    name = "hold_at_mouth"
-    def __init__(self, seconds=5.0):
-        self.seconds = seconds; self.t0 = None
-        self.lift = LiftToMouthEval()
-    def start(self, **kwargs):
-        self.seconds = float(kwargs.get("seconds", self.seconds))
-        self.t0 = None; self.lift.start(**kwargs)
-    def update(self, frame):
-        r = self.lift.update(frame)
-        overlay = r.get("overlay", [])
-        if r.get("passed"):
-            if self.t0 is None:
-                self.t0 = time.time()
-            held = time.time() - self.t0
-            overlay.append(("text", f"hold={held:.2f}s/{self.seconds:.0f}s", (10, 86), 0.7, (255,255,255), 2))
-            return {"passed": held >= self.seconds, "progress": min(1.0, held / self.seconds), "overlay": overlay}
-        else:
-            self.t0 = None
-            return {"passed": False, "progress": 0.0, "overlay": overlay}
-    def stop(self):
-        self.lift.stop()
-
-class DumpIntoMouthEval(BaseEval):
-    name = "dump_into_mouth"
-    def __init__(self):
-        self.t_tilt = None
-    def start(self, **kwargs):
-        _lazy_init_models(); self.t_tilt = None
-    def update(self, frame):
-        img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        hands_xy = _hand_landmarks(img_rgb)
-        dom = session_cfg.get("dominant", "right")
-        lm = hands_xy.get(dom, {})
-        wrist = lm.get(0); idx_mcp = lm.get(5); idx_tip = lm.get(8)
-        overlay = []
-        if wrist and idx_tip:
-            overlay.append(("circle", wrist, 6, (255,255,255), -1))
-            overlay.append(("circle", idx_tip, 6, (255,255,255), -1))
-            overlay.append(("line", wrist, idx_tip, (200,200,255), 2))
-        if not (wrist and idx_mcp and idx_tip):
-            self.t_tilt = None
-            return {"passed": False, "progress": 0.0, "overlay": overlay}
-        vx, vy = idx_tip[0] - wrist[0], idx_tip[1] - wrist[1]
-        angle = abs(math.degrees(math.atan2(-vy, vx)))  # 0 = right, 90 = up
-        is_tilted = angle < 30 or angle > 150
-        overlay.append(("text", f"angle={angle:.0f}", (10, 60), 0.7, (255,255,255), 2))
-        if is_tilted:
-            if self.t_tilt is None:
-                self.t_tilt = time.time()
-            held = time.time() - self.t_tilt
-            overlay.append(("text", f"tilt-hold={held:.2f}s", (10, 86), 0.7, (255,255,255), 2))
-            return {"passed": held >= 1.0, "progress": min(1.0, held / 1.0), "overlay": overlay}
-        else:
-            self.t_tilt = None
-            return {"passed": False, "progress": 0.0, "overlay": overlay}
-    def stop(self):
-        pass
+def perception_config() -> Dict[str, Any]:
+    """Everything that changes perceive() output; perception_cache fingerprints this."""
+    return {"yolo": YOLO_WEIGHTS, "imgsz": YOLO_IMGSZ, "conf": YOLO_CONF, "classes": _ALLOWED,
+            # the exact settings passed to models.acquire, so retuning them invalidates the cache
+            "hands": HANDS_CFG, "pose": POSE_CFG, "face": FACE_CFG}
 
-class PlaceCupDownEval(BaseEval):
-    name = "place_cup_down"
-    def __init__(self):
-        self.t_down = None
-    def start(self, **kwargs):
-        _lazy_init_models(); self.t_down = None
-    def update(self, frame):
-        det = _detect_bottle_xyxy(frame)
-        overlay = []
-        if not det:
-            self.t_down = None
-            return {"passed": False, "progress": 0.0, "overlay": overlay}
-        x1, y1, x2, y2, _ = det
-        overlay.append(("rect", (x1,y1,x2,y2), (0,255,0), 2))
-        h, w = frame.shape[:2]
-        cy = (y1 + y2) // 2
-        near_bottom = cy >= int(0.8 * h)
-        if near_bottom:
-            if self.t_down is None:
-                self.t_down = time.time()
-            held = time.time() - self.t_down
-            overlay.append(("text", f"down-hold={held:.2f}s", (10, 60), 0.7, (255,255,255), 2))
-            return {"passed": held >= 1.0, "progress": min(1.0, held / 1.0), "overlay": overlay}
-        else:
-            self.t_down = None
-            return {"passed": False, "progress": 0.0, "overlay": overlay}
-    def stop(self):
-        pass
+def frame_perception(frame_bgr, ts: Optional[float] = None) -> Perception:
+    """Lazy per-frame perception over the app's models (see task_evaluators.Perception)."""
+    return Perception(frame_bgr, ts, detect_bottle=_detect_bottle_xyxy, detect_hands=_hand_landmarks,
+                      detect_face=_mouth_and_ear_metrics)
 
-TASK_EVALUATORS = {
-    "reach_bottle":       ReachBottleEval,
-    "grab_hold":          GrabHoldEval,
-    "lift_to_mouth":      LiftToMouthEval,
-    "hold_at_mouth":      HoldAtMouthEval,
-    "dump_into_mouth":    DumpIntoMouthEval,
-    "place_cup_down":     PlaceCupDownEval,
-}
+def perceive(frame_bgr) -> Dict[str, Any]:
+    _lazy_init_models()
+    p = frame_perception(frame_bgr)
+    p.bottle
+    if MP_READY:
+        p.hands; p.mouth
+    return p.record()
 
+# -----------------------------------------------------------------------------
+# Active task (evaluators: task_evaluators.py)
+# -----------------------------------------------------------------------------
 active_task: Optional[str] = None
 active_eval: Optional[BaseEval] = None
 already_passed = False
 pass_sticky_frames = 0  # make pass event sticky for a few frames so the frontend can't miss it
 
+# Attempt bookkeeping: one Attempt per task activation, closed on pass or task switch
+current_attempt: Optional[Attempt] = None
+attempt_metrics: Dict[str, float] = {}  # latest numeric "metrics" reported by the evaluator
+trajectory_writer: Optional[TrajectoryWriter] = None
+# set_active_task (threadpool) swaps/closes the writer while capture_loop appends to it
+_trajectory_lock = threading.Lock()
+
+def _begin_attempt(task: str):
+    global current_attempt, attempt_metrics, trajectory_writer
+    current_attempt = Attempt(session_id=SESSION_ID, patient_id=session_cfg.get("patient_id"),
+                              task=task, started_at=datetime.utcnow())
+    attempt_metrics = {}
+    if TRAJECTORY_ENABLED:
+        name = f"{SESSION_ID}_{task}_{current_attempt.started_at:%Y%m%dT%H%M%S%f}.trj"
+        try:
+            w = TrajectoryWriter(os.path.join(TRAJECTORY_DIR, name), base_ts=time.time())
+        except OSError as e:
+            print(f"[WARN] trajectory recording disabled for this attempt: {e}")
+            w = None
+        with _trajectory_lock:
+            trajectory_writer = w
+
+def _end_attempt(passed: bool):
+    """Close the open attempt (if any) and return (attempt, metrics) for persisting."""
+    global current_attempt, attempt_metrics, trajectory_writer
+    a, m = current_attempt, attempt_metrics
+    with _trajectory_lock:
+        w, trajectory_writer = trajectory_writer, None
+        if w is not None:
+            w.close()
+    current_attempt, attempt_metrics = None, {}
+    if w is not None and a is not None and w.frames:
+        a.trajectory_path = w.path
+    if a is None:
+        return None
+    a.ended_at = datetime.utcnow()
+    a.passed = passed
+    a.duration_s = (a.ended_at - a.started_at).total_seconds()
+    return a, m
+
+def _record_trajectory(ts: float, p: Perception):
+    with _trajectory_lock:
+        w = trajectory_writer
+        if w is None:
+            return
+        try:
+            w.append(ts, **p.record())
+        except Exception as e:
+            print(f"[WARN] trajectory append failed: {e}")
+
 # -----------------------------------------------------------------------------
 # MJPEG helper (uses real detections)
 # -----------------------------------------------------------------------------
@@ -514,10 +386,13 @@ async def capture_loop():
         _fps = 0.9 * _fps + 0.1 * (1.0 / dt)
         _last_ts = now
 
-        # Evaluate active task per frame (CPU-bound → worker thread)
+        # Evaluate active task per frame (CPU-bound → worker thread); the evaluator,
+        # trajectory and overlays all read the same per-frame perception
         out: Dict[str, Any] = {}
+        p = frame_perception(frame, now)
         if active_eval:
-            out = await asyncio.to_thread(active_eval.update, frame)
+            out = await asyncio.to_thread(active_eval.update, p)
+            _record_trajectory(now, p)
 
         # Prepare visualization
         vis = frame.copy()
@@ -525,8 +400,8 @@ async def capture_loop():
         if overlay:
             draw_overlay(vis, overlay)
         else:
-            # Baseline: show bottle if any
-            det = _detect_bottle_xyxy(frame)
+            # Baseline: show bottle if any (YOLO runs off the event loop, like the evaluators)
+            det = await asyncio.to_thread(lambda: p.bottle)
             if det:
                 x1, y1, x2, y2, _ = det
                 cv2.rectangle(vis, (x1, y1), (x2, y2), (0, 255, 0), 2)
@@ -545,11 +420,9 @@ async def capture_loop():
 
         # Extra debug overlays
         if DEBUG_OVERLAY:
-            _lazy_init_models()
+            _lazy_init_models(blocking=False)  # on the event loop: never wait on the warm-up
             if MP_READY:
-                img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                mouth, head_w = _mouth_and_ear_metrics(img_rgb)
-                hands_xy = _hand_landmarks(img_rgb)
+                mouth, hands_xy = await asyncio.to_thread(lambda: (p.mouth, p.hands))
                 if mouth:
                     cv2.circle(vis, mouth, 5, (255,255,255), -1)
                 for side in ("left", "right"):
@@ -563,7 +436,7 @@ async def capture_loop():
                         ang = abs(math.degrees(math.atan2(-vy, vx)))
                         cv2.putText(vis, f"{side[:1]}-angle={ang:.0f}", (10, 54 if side=='left' else 78),
                                     cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,255,255), 2, cv2.LINE_AA)
-            det = _detect_bottle_xyxy(frame)
+            det = await asyncio.to_thread(lambda: p.bottle)
             if det:
                 x1, y1, x2, y2, score = det
                 cx, cy = (x1+x2)//2, (y1+y2)//2
@@ -574,21 +447,28 @@ async def capture_loop():
         _, jpg = cv2.imencode(".jpg", vis)
         latest_jpeg = jpg.tobytes()
 
-        # Detect this-frame pass
+        # Detect this-frame pass (or a trial the evaluator finished as failed)
         passed_now = bool(out.get("passed"))
 
-        # Emit event on first pass and make it sticky for a few frames
-        if passed_now and not already_passed:
+        # Flag the first pass and keep it sticky for a few frames (the publisher
+        # treats the event as a meaningful change, so it goes out promptly)
+        if out.get("metrics"):
+            attempt_metrics.update(out["metrics"])
+        if (passed_now or out.get("done")) and not already_passed:
             already_passed = True
-            pass_sticky_frames = 6  # ~300ms at 20 Hz
-            await broadcast({"event": "task_passed", "task": active_task, "active_task": active_task})
-
-        # Save a tiny metric sample
-        evt = Event(session_id=SESSION_ID, ts=datetime.utcnow(),
-                    type="tick", value_json=json.dumps({"progress": float(out.get("progress") or 0.0)}))
-        await asyncio.to_thread(save, evt)
-
-        # Push live payload (incl. progress and pass flag)
+            if passed_now:
+                pass_sticky_frames = 6  # ~300ms at 20 Hz
+            done = _end_attempt(passed=passed_now)
+            if done:
+                await record_attempt_async(*done)
+                response_cache.bump("attempts")
+
+        # Save a tiny metric sample (batched; the writer commits in bulk)
+        evt = Event(session_id=SESSION_ID, ts=datetime.utcnow(), type="tick",
+                    progress=float(out.get("progress") or 0.0), passed=passed_now, fps=float(_fps))
+        event_writer.submit(evt)
+
+        # Hand the live payload (incl. progress and pass flag) to the publisher
         if pass_sticky_frames > 0:
             pass_sticky_frames -= 1
         payload = {
@@ -601,7 +481,7 @@ async def capture_loop():
         }
         if pass_sticky_frames > 0:
             payload.update({"event": "task_passed", "task": active_task})
-        await broadcast(payload)
+        publisher.update(payload)
 
         await asyncio.sleep(0.05)  # ~20 Hz
 
@@ -610,14 +490,29 @@ async def capture_loop():
 # -----------------------------------------------------------------------------
 @app.on_event("startup")
 async def on_start():
-    global cap
     init_db()
-    cap = cv2.VideoCapture(0)
-    asyncio.create_task(capture_loop())
+    event_writer.start()
+    compactor.start()
+    asyncio.create_task(publisher.run())
+    asyncio.create_task(_open_camera())
+    asyncio.create_task(capture_loop())  # idles until the camera is open
+    if MODEL_WARMUP:
+        asyncio.create_task(asyncio.to_thread(_lazy_init_models))
+
+async def _open_camera():
+    """Opening a webcam can take seconds; do it off the event loop so startup doesn't wait."""
+    global cap
+    cap = await asyncio.to_thread(cv2.VideoCapture, 0)
 
 @app.on_event("shutdown")
 async def on_shutdown():
     global cap
+    publisher.stop()
+    compactor.stop()
+    await event_writer.stop()
+    from db import async_engine
+    await async_engine.dispose()
+    models.close_all()
     try:
         if cap is not None:
             cap.release()
@@ -630,6 +525,9 @@ def set_session_config(payload = Body(...)):
     mode = str(payload.get("target_mode", session_cfg["target_mode"])).lower()
     if dom in ("left", "right"): session_cfg["dominant"] = dom
     if mode in ("fixed", "head"): session_cfg["target_mode"] = mode
+    if "patient_id" in payload:
+        pid = payload.get("patient_id")
+        session_cfg["patient_id"] = (str(pid).strip() or None) if pid is not None else None
     return {"ok": True, "session": session_cfg}
 
 @app.post("/active-task")
@@ -644,11 +542,17 @@ def set_active_task(payload = Body(...)):
             active_eval.stop()
     except Exception:
         pass
+    done = _end_attempt(passed=False)
+    if done:
+        record_attempt(*done)
+        response_cache.bump("attempts")
     active_task = name
+    _lazy_init_models()
     active_eval = TASK_EVALUATORS[name]()
     active_eval.start(**params)
     already_passed = False
     pass_sticky_frames = 0
+    _begin_attempt(name)
     return {"ok": True, "active_task": active_task}
 
 @app.post("/debug-overlay")
@@ -656,36 +560,275 @@ def set_debug_overlay(payload = Body(...)):
     global DEBUG_OVERLAY
     enable = bool(payload.get("enable", False))
     DEBUG_OVERLAY = enable
+    response_cache.bump("config")
     return {"ok": True, "debug_overlay": DEBUG_OVERLAY}
 
 @app.get("/debug-overlay")
-def get_debug_overlay():
-    return {"debug_overlay": DEBUG_OVERLAY, "yolo_imgsz": YOLO_IMGSZ, "yolo_conf": YOLO_CONF}
+async def get_debug_overlay(request: Request):
+    async def compute():
+        return {"debug_overlay": DEBUG_OVERLAY, "yolo_imgsz": YOLO_IMGSZ, "yolo_conf": YOLO_CONF}
+    return await response_cache.respond(request, ("config",), compute, ttl_s=3600.0)
 
 @app.websocket("/ws")
 async def ws_live(ws: WebSocket):
-    await ws.accept()
-    subscribers.add(ws)
+    # Opt-in compact protocol: the client lists it in Sec-WebSocket-Protocol
+    binary = LIVE_SUBPROTOCOL in (ws.scope.get("subprotocols") or [])
+    await ws.accept(subprotocol=LIVE_SUBPROTOCOL if binary else None)
+    await publisher.add(ws, binary=binary)
     try:
         while True:
             await ws.receive_text()
     except WebSocketDisconnect:
         pass
     finally:
-        subscribers.discard(ws)
+        publisher.remove(ws)
+
+@app.get("/stats")
+def get_stats():
+    return {"event_writer": event_writer.stats(), "live": publisher.stats(), "compaction": compactor.stats(),
+            "response_cache": response_cache.stats(), "models": models.stats()}
+
+# ---- /metrics helpers ---------------------------------------------------------
+METRICS_PAGE_MAX = 5000
+
+def _parse_ts(value: str, name: str) -> datetime:
+    """ISO8601 → naive UTC (how Event.ts is stored)."""
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: {value!r}")
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+def _encode_cursor(ts: datetime, row_id: int) -> str:
+    raw = f"{ts.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _event_filters(since, until, session_id, type_):
+    conds = []
+    if since:
+        conds.append(Event.ts >= _parse_ts(since, "since"))
+    if until:
+        conds.append(Event.ts < _parse_ts(until, "until"))
+    if session_id:
+        conds.append(Event.session_id == session_id)
+    if type_:
+        conds.append(Event.type == type_)
+    return conds
 
 @app.get("/metrics")
-def get_metrics(since: str | None = Query(None, description="ISO8601 timestamp")):
-    from sqlmodel import Session, select
-    from db import engine
-    with Session(engine) as s:
-        stmt = select(Event).order_by(Event.ts.desc()).limit(500)
-        rows = s.exec(stmt).all()
+async def get_metrics(
+    request: Request,
+    since: str | None = Query(None, description="ISO8601 timestamp (inclusive)"),
+    until: str | None = Query(None, description="ISO8601 timestamp (exclusive)"),
+    session_id: str | None = Query(None),
+    type: str | None = Query(None, description="Event type, e.g. tick"),
+    limit: int = Query(500, ge=1, le=METRICS_PAGE_MAX, description="Page size"),
+    cursor: str | None = Query(None, description="X-Next-Cursor from the previous page"),
+):
+    """Newest-first events. Pages are keyset-based: pass back the X-Next-Cursor header."""
+    from sqlalchemy import tuple_
+    from sqlmodel import select
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from db import async_engine
+    stmt = select(Event).where(*_event_filters(since, until, session_id, type))
+    if cursor:
+        c_ts, c_id = _decode_cursor(cursor)
+        stmt = stmt.where(tuple_(Event.ts, Event.id) < tuple_(c_ts, c_id))
+    stmt = stmt.order_by(Event.ts.desc(), Event.id.desc()).limit(limit + 1)
+
+    async def compute():
+        async with AsyncSession(async_engine) as s:
+            rows = (await s.exec(stmt)).all()
+        headers = {}
+        if len(rows) > limit:
+            rows = rows[:limit]
+            headers["X-Next-Cursor"] = _encode_cursor(rows[-1].ts, rows[-1].id)
         return [
             {"id": r.id, "session_id": r.session_id, "ts": r.ts.isoformat(),
-             "type": r.type, "value": json.loads(r.value_json)}
+             "type": r.type, "value": _event_value(r)}
             for r in rows
-        ]
+        ], headers
+    return await response_cache.respond(request, ("events",), compute)
+
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "2000"))
+_EXPORT_COLUMNS = ("id", "session_id", "ts", "type", "progress", "passed", "fps", "value_json")
+
+async def _export_rows(conds):
+    """Yield lists of raw rows, oldest first, EXPORT_CHUNK_ROWS at a time (server-side cursor)."""
+    from sqlalchemy import select as sa_select
+    from db import async_engine
+    t = Event.__table__
+    stmt = sa_select(*[t.c[c] for c in _EXPORT_COLUMNS]).where(*conds).order_by(t.c.ts, t.c.id)
+    async with async_engine.connect() as conn:
+        result = await conn.stream(stmt.execution_options(yield_per=EXPORT_CHUNK_ROWS))
+        async for part in result.partitions():
+            yield part
+
+async def _ndjson_chunks(conds):
+    async for part in _export_rows(conds):
+        lines = []
+        for (rid, sid, ts, typ, prog, passed, fps, vjson) in part:
+            if typ == "tick":
+                value = json.dumps({"progress": prog, "passed": None if passed is None else bool(passed), "fps": fps})
+            else:
+                value = vjson or "{}"  # already JSON; pass through without decoding
+            head = json.dumps({"id": rid, "session_id": sid, "ts": ts.isoformat(), "type": typ})
+            lines.append(head[:-1] + ', "value": ' + value + "}\n")
+        yield "".join(lines)
+
+async def _csv_chunks(conds):
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(_EXPORT_COLUMNS)
+    async for part in _export_rows(conds):
+        for (rid, sid, ts, typ, prog, passed, fps, vjson) in part:
+            w.writerow((rid, sid, ts.isoformat(), typ, prog, "" if passed is None else int(bool(passed)), fps, vjson))
+        yield buf.getvalue()
+        buf.seek(0); buf.truncate(0)
+    if buf.tell():
+        yield buf.getvalue()
+
+@app.get("/metrics/export")
+async def export_metrics(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    since: str | None = Query(None, description="ISO8601 timestamp (inclusive)"),
+    until: str | None = Query(None, description="ISO8601 timestamp (exclusive)"),
+    session_id: str | None = Query(None),
+    type: str | None = Query(None),
+):
+    """Stream the full event history (oldest first) with constant memory."""
+    conds = _event_filters(since, until, session_id, type)  # validate before streaming starts
+    if format == "csv":
+        return StreamingResponse(_csv_chunks(conds), media_type="text/csv",
+                                 headers={"Content-Disposition": 'attachment; filename="events.csv"'})
+    return StreamingResponse(_ndjson_chunks(conds), media_type="application/x-ndjson")
+
+@app.get("/metrics/series")
+async def get_metrics_series(
+    request: Request,
+    field: str = Query("progress", pattern="^(progress|fps|passed)$"),
+    since: str | None = Query(None, description="ISO8601 timestamp (inclusive)"),
+    until: str | None = Query(None, description="ISO8601 timestamp (exclusive)"),
+    session_id: str | None = Query(None),
+    points: int = Query(500, ge=3, le=10000, description="Target number of points"),
+    bucket_s: float | None = Query(None, gt=0, description="Fixed bucket width; overrides points"),
+    mode: str = Query("minmax", pattern="^(minmax|lttb)$"),
+):
+    """Tick history at chart resolution: per-bucket min/max/mean, or LTTB-downsampled means."""
+    from db import async_engine
+    from series import downsample
+    conds = {
+        "since": _parse_ts(since, "since") if since else None,
+        "until": _parse_ts(until, "until") if until else None,
+        "session_id": session_id,
+    }
+
+    async def compute():
+        async with async_engine.connect() as conn:
+            # the bucket math is plain sync SQL; run_sync keeps it on aiosqlite's thread
+            return await conn.run_sync(downsample, field, conds, points, mode, bucket_s)
+    return await response_cache.respond(request, ("events",), compute)
+
+def _event_value(r: Event) -> Dict[str, Any]:
+    if r.type == "tick":
+        return {"progress": r.progress, "passed": r.passed, "fps": r.fps}
+    return json.loads(r.value_json) if r.value_json else {}
+
+@app.get("/attempts")
+async def get_attempts(
+    request: Request,
+    task: str | None = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    scoring: str = Query("live", description='"live" or a rescore.py --label'),
+):
+    from sqlmodel import select
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from db import async_engine
+
+    async def compute():
+        async with AsyncSession(async_engine) as s:
+            stmt = select(Attempt).order_by(Attempt.started_at.desc()).limit(limit)
+            if task:
+                stmt = stmt.where(Attempt.task == task)
+            attempts = (await s.exec(stmt)).all()
+            metrics: Dict[int, Dict[str, float]] = {a.id: {} for a in attempts}
+            if attempts:
+                for m in await s.exec(select(AttemptMetric).where(AttemptMetric.attempt_id.in_(list(metrics)),
+                                                                  AttemptMetric.scoring == scoring)):
+                    metrics[m.attempt_id][m.name] = m.value
+            return [
+                {"id": a.id, "session_id": a.session_id, "patient_id": a.patient_id, "task": a.task,
+                 "started_at": a.started_at.isoformat(),
+                 "ended_at": a.ended_at.isoformat() if a.ended_at else None,
+                 "passed": a.passed, "duration_s": a.duration_s, "metrics": metrics[a.id],
+                 "has_trajectory": bool(a.trajectory_path)}
+                for a in attempts
+            ]
+    return await response_cache.respond(request, ("attempts",), compute)
+
+def _summary_out(r) -> Dict[str, Any]:
+    return {
+        "patient_id": r.patient_id, "task": r.task,
+        "attempts": r.attempts, "passes": r.passes,
+        "pass_rate": (r.passes / r.attempts) if r.attempts else None,
+        "best_time_s": r.best_time_s, "median_time_s": r.median_time_s,
+        "ewma_pass_rate": r.ewma_pass_rate, "ewma_time_s": r.ewma_time_s,
+        # > 0: recent attempts pass more often than the patient's overall rate
+        "trend": (r.ewma_pass_rate - r.passes / r.attempts) if r.attempts and r.ewma_pass_rate is not None else None,
+        "last_attempt_at": r.last_attempt_at.isoformat() if r.last_attempt_at else None,
+    }
+
+async def _summaries(patient_id: Optional[str] = None):
+    from sqlmodel import select
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from db import async_engine
+    from models import PatientTaskSummary
+    stmt = select(PatientTaskSummary).order_by(PatientTaskSummary.patient_id, PatientTaskSummary.task)
+    if patient_id is not None:
+        stmt = stmt.where(PatientTaskSummary.patient_id == patient_id)
+    async with AsyncSession(async_engine) as s:
+        return [_summary_out(r) for r in await s.exec(stmt)]
+
+@app.get("/patients/summary")
+async def get_patients_summary(request: Request):
+    """Every patient's per-task rollup (maintained on attempt completion, no event scans)."""
+    async def compute():
+        out: Dict[str, List[Dict[str, Any]]] = {}
+        for row in await _summaries():
+            out.setdefault(row["patient_id"], []).append(row)
+        return [{"patient_id": pid, "tasks": rows} for pid, rows in out.items()]
+    return await response_cache.respond(request, ("attempts",), compute)
+
+@app.get("/patients/{patient_id}/summary")
+async def get_patient_summary(request: Request, patient_id: str):
+    async def compute():
+        rows = await _summaries(patient_id)
+        if not rows:
+            raise HTTPException(status_code=404, detail="No attempts for this patient")
+        return {"patient_id": patient_id, "tasks": rows}
+    return await response_cache.respond(request, ("attempts",), compute)
+
+@app.get("/attempts/{attempt_id}/trajectory")
+async def get_attempt_trajectory(attempt_id: int):
+    """Raw trajectory file (see trajectory.py for the layout; np.memmap-able after the header)."""
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from db import async_engine
+    async with AsyncSession(async_engine) as s:
+        a = await s.get(Attempt, attempt_id)
+    if a is None or not a.trajectory_path or not os.path.exists(a.trajectory_path):
+        raise HTTPException(status_code=404, detail="No trajectory for this attempt")
+    return FileResponse(a.trajectory_path, media_type="application/octet-stream",
+                        filename=os.path.basename(a.trajectory_path))
 
 @app.get("/mjpeg")
 async def mjpeg():
@@ -4,16 +4,27 @@ Exercise Launcher - Main Menu for Dexteriteers Project
 Run this file to select and launch different exercises
 """
 
+import importlib
 import os
 import sys
 import subprocess
 import time
-from exercises.reach_bottle_test import reach_test
-from exercises.grab_hold_test import grab_test
-from exercises.lift_to_mouth_test import lift
-from exercises.hold_at_mouth_test import hold
-from exercises.dump_into_mouth_test import dump
-from exercises.place_cup_down_test import down
+from exercises.runtime import ExerciseRuntime
+
+# Exercise entry points, imported when first picked: the exercise modules load
+# ultralytics, mediapipe and cv2, which would otherwise hold up the menu for seconds
+EXERCISES = {
+    1: ("exercises.reach_bottle_test", "reach_test"),
+    2: ("exercises.grab_hold_test", "grab_test"),
+    3: ("exercises.lift_to_mouth_test", "lift"),
+    4: ("exercises.hold_at_mouth_test", "hold"),
+    5: ("exercises.dump_into_mouth_test", "dump"),
+    6: ("exercises.place_cup_down_test", "down"),
+}
+
+def load_exercise(exercise_number):
+    module, func = EXERCISES[exercise_number]
+    return getattr(importlib.import_module(module), func)
 
 def clear_screen():
     """Clear the terminal screen"""
@@ -54,8 +65,8 @@ def print_menu():
     print("0. ❌ Exit")
     print()
 
-def run_exercise(exercise_number):
-    """Run the selected exercise"""
+def run_exercise(exercise_number, runtime=None):
+    """Run the selected exercise (with the session's shared models and camera)"""
     clear_screen()
     
     if exercise_number == 1:
@@ -63,7 +74,7 @@ def run_exercise(exercise_number):
         print("Make sure you have a bottle visible and your right hand in view!")
         print()
         time.sleep(1)
-        result_reach_bottle = reach_test()
+        result_reach_bottle = load_exercise(1)(runtime=runtime)
         print(result_reach_bottle)
             
     elif exercise_number == 2:
@@ -71,7 +82,7 @@ def run_exercise(exercise_number):
         print("Grasp a bottle and hold it steady")
         print()
         time.sleep(1)
-        grab_hold_result = grab_test()
+        grab_hold_result = load_exercise(2)(runtime=runtime)
         print(grab_hold_result)
 
     elif exercise_number == 3:
@@ -79,7 +90,7 @@ def run_exercise(exercise_number):
         print("Lift the grabbed bottle to mouth level and hold briefly")
         print()
         time.sleep(1)
-        lift_test_result = lift()
+        lift_test_result = load_exercise(3)(runtime=runtime)
         print(lift_test_result)
 
     elif exercise_number == 4:
@@ -87,7 +98,7 @@ def run_exercise(exercise_number):
         print("Hold the bottle at mouth level for 5 seconds")
         print()
         time.sleep(1)
-        hold_test_result = hold()
+        hold_test_result = load_exercise(4)(runtime=runtime)
         print(hold_test_result)
 
     elif exercise_number == 5:
@@ -95,7 +106,7 @@ def run_exercise(exercise_number):
         print("Tilt the bottle to simulate pouring into mouth")
         print()
         time.sleep(1)
-        dump_test_result = dump()
+        dump_test_result = load_exercise(5)(runtime=runtime)
         print(dump_test_result)
 
     elif exercise_number == 6:
@@ -103,12 +114,21 @@ def run_exercise(exercise_number):
         print("Place the cup down smoothly and accurately")
         print()
         time.sleep(1)
-        place_test_result = down()
+        place_test_result = load_exercise(6)(runtime=runtime)
         print(place_test_result)
     input("\nPress Enter to return to main menu...")
 
 def main():
     """Main launcher function"""
+    # One runtime for the session: models load on the first exercise that needs them
+    # and the camera stays open, so switching exercises doesn't reload anything
+    runtime = ExerciseRuntime()
+    try:
+        _menu_loop(runtime)
+    finally:
+        runtime.close()
+
+def _menu_loop(runtime):
     while True:
         clear_screen()
         print_header()
@@ -122,17 +142,17 @@ def main():
                 print("Goodbye! 👋")
                 break
             elif choice == '1':
-                run_exercise(1)
+                run_exercise(1, runtime)
             elif choice == '2':
-                run_exercise(2)
+                run_exercise(2, runtime)
             elif choice == '3':
-                run_exercise(3)
+                run_exercise(3, runtime)
             elif choice == '4':
-                run_exercise(4)
+                run_exercise(4, runtime)
             elif choice == '5':
-                run_exercise(5)
+                run_exercise(5, runtime)
             elif choice == '6':
-                run_exercise(6)
+                run_exercise(6, runtime)
             else:
                 print("\n❌ Invalid choice! Please enter 0, 1, 2, 3, 4, 5, or 6.")
                 time.sleep(2)
@@ -0,0 +1,207 @@
+# Retention + rollup compaction for tick telemetry.
+#
+# Runs on its own thread every COMPACT_INTERVAL_S:
+#   raw "tick" events older than TICK_RAW_MAX_AGE  -> 1 s TickRollup rows, raw deleted
+#   1 s rollups older than TICK_1S_MAX_AGE         -> 60 s rollups, 1 s rows deleted
+#   60 s rollups older than TICK_60S_MAX_AGE       -> deleted (0 = keep forever)
+#   other event types per EVENT_RETENTION ("note=30d,debug=7d") -> deleted
+# Work is done in chunks of COMPACT_CHUNK_ROWS, each its own short transaction,
+# followed by PRAGMA incremental_vacuum so free pages go back to the filesystem
+# without a full VACUUM. (Databases created before auto_vacuum=INCREMENTAL was
+# enabled keep their size, but SQLite reuses the freed pages for new rows.)
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import text
+
+from db import engine
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_age(value: str) -> float:
+    """'90s' / '15m' / '12h' / '7d' / '2w' / plain seconds -> seconds."""
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*", str(value))
+    if not m:
+        raise ValueError(f"bad age: {value!r}")
+    return float(m.group(1)) * _UNITS.get(m.group(2) or "s", 1)
+
+
+def parse_retention(spec: str) -> Dict[str, float]:
+    out = {}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            k, v = part.split("=", 1)
+            out[k.strip()] = parse_age(v)
+    return out
+
+
+COMPACT_INTERVAL_S   = parse_age(os.getenv("COMPACT_INTERVAL_S", "300"))
+TICK_RAW_MAX_AGE     = parse_age(os.getenv("TICK_RAW_MAX_AGE", "1d"))
+TICK_1S_MAX_AGE      = parse_age(os.getenv("TICK_1S_MAX_AGE", "7d"))
+TICK_60S_MAX_AGE     = parse_age(os.getenv("TICK_60S_MAX_AGE", "0"))
+EVENT_RETENTION      = parse_retention(os.getenv("EVENT_RETENTION", ""))
+COMPACT_CHUNK_ROWS   = int(os.getenv("COMPACT_CHUNK_ROWS", "20000"))
+COMPACT_VACUUM_PAGES = int(os.getenv("COMPACT_VACUUM_PAGES", "2000"))
+COMPACT_PAUSE_S      = float(os.getenv("COMPACT_PAUSE_S", "0.05"))  # between chunks, lets the writer in
+
+_FIELDS = ("progress", "passed", "fps")
+
+# SQLAlchemy's SQLite DATETIME text format, so rollup rows read back as datetimes
+_BUCKET_1S = "strftime('%Y-%m-%d %H:%M:%S', ts) || '.000000'"
+_BUCKET_60S = "strftime('%Y-%m-%d %H:%M:00', bucket_start) || '.000000'"
+
+_UPSERT_SET = ", ".join(
+    ["n = n + excluded.n"]
+    + [s for f in _FIELDS for s in (
+        f"{f}_n = {f}_n + excluded.{f}_n",
+        f"{f}_min = CASE WHEN {f}_min IS NULL OR excluded.{f}_min < {f}_min THEN excluded.{f}_min ELSE {f}_min END",
+        f"{f}_max = CASE WHEN {f}_max IS NULL OR excluded.{f}_max > {f}_max THEN excluded.{f}_max ELSE {f}_max END",
+        f"{f}_sum = {f}_sum + excluded.{f}_sum",
+    )]
+)
+_ROLLUP_COLS = "session_id, bucket_s, bucket_start, n, " + ", ".join(
+    f"{f}_n, {f}_min, {f}_max, {f}_sum" for f in _FIELDS)
+
+# raw ticks -> 1 s buckets
+_RAW_TO_1S = (
+    f"INSERT INTO tickrollup ({_ROLLUP_COLS}) "
+    f"SELECT session_id, 1, {_BUCKET_1S} AS b, COUNT(*), "
+    + ", ".join(f"COUNT({f}), MIN({f}), MAX({f}), COALESCE(SUM({f}), 0)" for f in _FIELDS)
+    + " FROM event WHERE type = 'tick' AND ts < :end GROUP BY session_id, b "
+    f"ON CONFLICT (session_id, bucket_s, bucket_start) DO UPDATE SET {_UPSERT_SET}"
+)
+# 1 s buckets -> 60 s buckets
+_1S_TO_60S = (
+    f"INSERT INTO tickrollup ({_ROLLUP_COLS}) "
+    f"SELECT session_id, 60, {_BUCKET_60S} AS b, SUM(n), "
+    + ", ".join(f"SUM({f}_n), MIN({f}_min), MAX({f}_max), SUM({f}_sum)" for f in _FIELDS)
+    + " FROM tickrollup WHERE bucket_s = 1 AND bucket_start < :end GROUP BY session_id, b "
+    f"ON CONFLICT (session_id, bucket_s, bucket_start) DO UPDATE SET {_UPSERT_SET}"
+)
+
+
+def _fmt(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+class Compactor:
+    def __init__(self, interval_s=COMPACT_INTERVAL_S, on_change: Optional[Callable[[], None]] = None):
+        self.interval_s = interval_s
+        self.on_change = on_change  # called after a pass that rolled up or deleted rows
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.runs = 0
+        self.last_run_ms = 0.0
+        self.rows_rolled = 0
+        self.rows_deleted = 0
+
+    # ---- chunked steps ---------------------------------------------------------
+    def _chunk_end(self, conn, sql_oldest: str, cutoff: str) -> Optional[str]:
+        """Upper ts bound covering at most COMPACT_CHUNK_ROWS rows older than cutoff."""
+        first = conn.execute(text(sql_oldest + " LIMIT 1"), {"cutoff": cutoff}).scalar()
+        if first is None:
+            return None
+        nth = conn.execute(text(sql_oldest + " LIMIT 1 OFFSET :k"),
+                           {"cutoff": cutoff, "k": COMPACT_CHUNK_ROWS}).scalar()
+        if nth is None or nth == first:
+            return cutoff
+        return nth
+
+    def _roll(self, rollup_sql: str, delete_sql: str, oldest_sql: str, cutoff: datetime) -> int:
+        total = 0
+        while not self._stop.is_set():
+            with engine.begin() as conn:
+                end = self._chunk_end(conn, oldest_sql, _fmt(cutoff))
+                if end is None:
+                    break
+                conn.execute(text(rollup_sql), {"end": end})
+                n = conn.execute(text(delete_sql), {"end": end}).rowcount or 0
+            total += n
+            self._vacuum()
+            time.sleep(COMPACT_PAUSE_S)
+        return total
+
+    def _delete_older(self, table: str, cond: str, params: Dict[str, Any]) -> int:
+        total = 0
+        # (DELETE ... LIMIT needs a compile-time option, so chunk through a rowid subquery)
+        sql = f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} WHERE {cond} LIMIT {COMPACT_CHUNK_ROWS})"
+        while not self._stop.is_set():
+            with engine.begin() as conn:
+                n = conn.execute(text(sql), params).rowcount or 0
+            total += n
+            if n == 0:
+                break
+            self._vacuum()
+            time.sleep(COMPACT_PAUSE_S)
+        return total
+
+    def _vacuum(self):
+        # the pragma frees one page per step; executescript steps it to completion
+        raw = engine.raw_connection()
+        try:
+            raw.driver_connection.executescript(f"PRAGMA incremental_vacuum({COMPACT_VACUUM_PAGES});")
+        finally:
+            raw.close()
+
+    # ---- one pass --------------------------------------------------------------
+    def run_once(self, now: Optional[datetime] = None):
+        t0 = time.perf_counter()
+        now = now or datetime.utcnow()
+        rolled = deleted = 0
+        if TICK_RAW_MAX_AGE > 0:
+            rolled += self._roll(
+                _RAW_TO_1S,
+                "DELETE FROM event WHERE type = 'tick' AND ts < :end",
+                "SELECT ts FROM event WHERE type = 'tick' AND ts < :cutoff ORDER BY ts",
+                now - timedelta(seconds=TICK_RAW_MAX_AGE),
+            )
+        if TICK_1S_MAX_AGE > 0:
+            rolled += self._roll(
+                _1S_TO_60S,
+                "DELETE FROM tickrollup WHERE bucket_s = 1 AND bucket_start < :end",
+                "SELECT bucket_start FROM tickrollup WHERE bucket_s = 1 AND bucket_start < :cutoff ORDER BY bucket_start",
+                now - timedelta(seconds=TICK_1S_MAX_AGE),
+            )
+        if TICK_60S_MAX_AGE > 0:
+            deleted += self._delete_older("tickrollup", "bucket_s = 60 AND bucket_start < :cutoff",
+                                          {"cutoff": _fmt(now - timedelta(seconds=TICK_60S_MAX_AGE))})
+        for etype, age in EVENT_RETENTION.items():
+            if etype == "tick" or age <= 0:
+                continue  # ticks are rolled up, not dropped
+            deleted += self._delete_older("event", "type = :etype AND ts < :cutoff",
+                                          {"etype": etype, "cutoff": _fmt(now - timedelta(seconds=age))})
+        self.runs += 1
+        self.rows_rolled += rolled
+        self.rows_deleted += deleted
+        if (rolled or deleted) and self.on_change is not None:
+            self.on_change()
+        self.last_run_ms = (time.perf_counter() - t0) * 1000.0
+
+    # ---- thread ----------------------------------------------------------------
+    def _loop(self):
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"[WARN] compaction failed: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="compaction", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "last_run_ms": round(self.last_run_ms, 1),
+            "rows_rolled": self.rows_rolled,
+            "rows_deleted": self.rows_deleted,
+        }
@@ -1,11 +1,259 @@
-from sqlmodel import SQLModel, create_engine, Session
+import json
+import os
+import statistics
+from sqlalchemy import MetaData, event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import QueuePool
+from sqlmodel import SQLModel, create_engine, Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-engine = create_engine("sqlite:///./app.db")
+# -----------------------------------------------------------------------------
+# Storage config (env). Defaults favour telemetry: WAL so /metrics readers and
+# the event writer don't block each other, synchronous=NORMAL (durable across
+# app crashes; a power cut may lose the last few hundred ms of ticks).
+# -----------------------------------------------------------------------------
+DB_URL             = os.getenv("DB_URL", "sqlite:///./app.db")
+DB_JOURNAL_MODE    = os.getenv("DB_JOURNAL_MODE", "WAL")
+DB_SYNCHRONOUS     = os.getenv("DB_SYNCHRONOUS", "NORMAL")
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_CACHE_SIZE_KB   = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+DB_POOL_SIZE       = int(os.getenv("DB_POOL_SIZE", "5"))      # readers + the writer
+DB_MAX_OVERFLOW    = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_STMT_CACHE      = int(os.getenv("DB_STMT_CACHE", "256"))  # sqlite3 prepared statements per connection
+
+# PatientTaskSummary: recent passed times kept for the median, and the EWMA weight
+SUMMARY_WINDOW     = int(os.getenv("SUMMARY_WINDOW", "20"))
+SUMMARY_EWMA_ALPHA = float(os.getenv("SUMMARY_EWMA_ALPHA", "0.2"))
+UNKNOWN_PATIENT    = "unknown"
+
+_is_sqlite = DB_URL.startswith("sqlite")
+# Async twin of DB_URL for the request handlers and the event writer. aiosqlite
+# runs each connection on its own thread, so DB I/O stays off the default
+# executor that cap.read and the evaluators use.
+ASYNC_DB_URL       = os.getenv("ASYNC_DB_URL", DB_URL.replace("sqlite://", "sqlite+aiosqlite://", 1))
+
+engine = create_engine(
+    DB_URL,
+    poolclass=QueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    connect_args={"check_same_thread": False, "cached_statements": DB_STMT_CACHE} if _is_sqlite else {},
+)
+
+async_engine = create_async_engine(
+    ASYNC_DB_URL,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    connect_args={"cached_statements": DB_STMT_CACHE} if _is_sqlite else {},
+)
+
+if _is_sqlite:
+    @event.listens_for(engine, "connect")
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _sqlite_pragmas(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        # only takes effect on a brand-new file; lets compaction hand pages back
+        # with PRAGMA incremental_vacuum instead of a blocking full VACUUM
+        cur.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        cur.execute(f"PRAGMA journal_mode={DB_JOURNAL_MODE}")
+        cur.execute(f"PRAGMA synchronous={DB_SYNCHRONOUS}")
+        cur.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+        cur.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KB}")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        cur.close()
 
 def init_db():
+    import models  # noqa: F401  (register tables)
     SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        _migrate(conn)
+
+# -----------------------------------------------------------------------------
+# Migrations for existing app.db files, tracked in PRAGMA user_version.
+# create_all() above already made any missing tables; steps only fix up old ones.
+# -----------------------------------------------------------------------------
+def _columns(conn, table):
+    return {r[1] for r in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+def _m1_typed_event_columns(conn):
+    """event.value_json blobs -> typed progress/passed/fps columns."""
+    if "progress" in _columns(conn, "event"):
+        return  # fresh database, created with the new schema
+    from models import Event
+    new = Event.__table__.to_metadata(MetaData(), name="event_new")
+    new.create(conn)
+    conn.exec_driver_sql(
+        "INSERT INTO event_new (id, session_id, ts, type, progress, value_json) "
+        "SELECT id, session_id, ts, type, "
+        "  CASE WHEN type = 'tick' THEN CAST(json_extract(value_json, '$.progress') AS REAL) END, "
+        "  CASE WHEN type = 'tick' THEN NULL ELSE value_json END "
+        "FROM event"
+    )
+    conn.exec_driver_sql("DROP TABLE event")
+    conn.exec_driver_sql("ALTER TABLE event_new RENAME TO event")
+
+def _m2_event_indexes(conn):
+    """Composite indexes for filtered, newest-first /metrics pages."""
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_event_ts ON event (ts)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_event_session_ts ON event (session_id, ts)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_event_type_ts ON event (type, ts)")
+    conn.exec_driver_sql("ANALYZE event")
+
+def _m3_attempt_trajectory(conn):
+    """attempt.trajectory_path for per-frame recordings."""
+    if "trajectory_path" not in _columns(conn, "attempt"):
+        conn.exec_driver_sql("ALTER TABLE attempt ADD COLUMN trajectory_path VARCHAR")
+
+def _m4_metric_scoring(conn):
+    """attemptmetric.scoring, so re-scored results sit next to the live ones."""
+    if "scoring" not in _columns(conn, "attemptmetric"):
+        conn.exec_driver_sql("ALTER TABLE attemptmetric ADD COLUMN scoring VARCHAR NOT NULL DEFAULT 'live'")
+
+def _m5_patient_summary(conn):
+    """attempt.patient_id, and PatientTaskSummary backfilled from existing attempts."""
+    if "patient_id" not in _columns(conn, "attempt"):
+        conn.exec_driver_sql("ALTER TABLE attempt ADD COLUMN patient_id VARCHAR")
+    from models import Attempt
+    with Session(bind=conn) as s:
+        for a in s.exec(select(Attempt).order_by(Attempt.id)).all():
+            _update_summary(s, a)
+        s.flush()
+
+_MIGRATIONS = [
+    (1, _m1_typed_event_columns),
+    (2, _m2_event_indexes),
+    (3, _m3_attempt_trajectory),
+    (4, _m4_metric_scoring),
+    (5, _m5_patient_summary),
+]
+SCHEMA_VERSION = _MIGRATIONS[-1][0]
+
+def _migrate(conn):
+    if not _is_sqlite:
+        return
+    ver = conn.exec_driver_sql("PRAGMA user_version").scalar() or 0
+    for v, step in _MIGRATIONS:
+        if ver < v:
+            print(f"[INFO] migrating app.db to schema v{v} ({step.__name__})")
+            step(conn)
+    if ver < SCHEMA_VERSION:
+        conn.exec_driver_sql(f"PRAGMA user_version={SCHEMA_VERSION}")
 
 def save(model):
     with Session(engine) as s:
         s.add(model)
         s.commit()
+
+def _metric_rows(attempt_id, metrics, scoring="live"):
+    from models import AttemptMetric
+    for name, value in (metrics or {}).items():
+        try:
+            yield AttemptMetric(attempt_id=attempt_id, name=str(name), value=float(value), scoring=scoring)
+        except (TypeError, ValueError):
+            continue  # non-numeric (status strings etc.)
+
+def _summary_key(attempt):
+    return (attempt.patient_id or UNKNOWN_PATIENT, attempt.task)
+
+def _apply_attempt(summary, attempt):
+    """Fold one finished attempt into its PatientTaskSummary row (O(window))."""
+    a = SUMMARY_EWMA_ALPHA
+    summary.attempts += 1
+    hit = 1.0 if attempt.passed else 0.0
+    summary.ewma_pass_rate = hit if summary.ewma_pass_rate is None else (1 - a) * summary.ewma_pass_rate + a * hit
+    if attempt.passed:
+        summary.passes += 1
+        t = attempt.duration_s
+        if t is not None:
+            summary.best_time_s = t if summary.best_time_s is None else min(summary.best_time_s, t)
+            recent = (json.loads(summary.recent_times_json or "[]") + [t])[-SUMMARY_WINDOW:]
+            summary.recent_times_json = json.dumps(recent)
+            summary.median_time_s = statistics.median(recent)
+            summary.ewma_time_s = t if summary.ewma_time_s is None else (1 - a) * summary.ewma_time_s + a * t
+    ended = attempt.ended_at or attempt.started_at
+    if summary.last_attempt_at is None or (ended and ended > summary.last_attempt_at):
+        summary.last_attempt_at = ended
+
+def _summary_stmt(attempt):
+    from models import PatientTaskSummary
+    pid, task = _summary_key(attempt)
+    return select(PatientTaskSummary).where(PatientTaskSummary.patient_id == pid,
+                                            PatientTaskSummary.task == task)
+
+def _new_summary(attempt):
+    from models import PatientTaskSummary
+    pid, task = _summary_key(attempt)
+    return PatientTaskSummary(patient_id=pid, task=task)
+
+def _update_summary(s, attempt):
+    summary = s.exec(_summary_stmt(attempt)).first() or _new_summary(attempt)
+    _apply_attempt(summary, attempt)
+    s.add(summary)
+
+def record_attempt(attempt, metrics=None):
+    """Persist a finished Attempt plus its numeric evaluator metrics and fold it into
+    the patient's summary, all in one transaction; returns the id."""
+    with Session(engine) as s:
+        s.add(attempt)
+        s.flush()
+        s.add_all(list(_metric_rows(attempt.id, metrics)))
+        _update_summary(s, attempt)
+        s.commit()
+        return attempt.id
+
+async def record_attempt_async(attempt, metrics=None):
+    """record_attempt() on the async engine (for the capture loop)."""
+    async with AsyncSession(async_engine, expire_on_commit=False) as s:
+        s.add(attempt)
+        await s.flush()
+        s.add_all(list(_metric_rows(attempt.id, metrics)))
+        summary = (await s.exec(_summary_stmt(attempt))).first() or _new_summary(attempt)
+        _apply_attempt(summary, attempt)
+        s.add(summary)
+        await s.commit()
+        return attempt.id
+
+def replace_attempt_metrics(results, scoring):
+    """{attempt_id: metrics} -> AttemptMetric rows labelled `scoring`, replacing any earlier
+    rows with that label for those attempts (one transaction)."""
+    from models import AttemptMetric
+    if not results:
+        return
+    table = AttemptMetric.__table__
+    rows = [{"attempt_id": r.attempt_id, "name": r.name, "value": r.value, "scoring": r.scoring}
+            for aid, metrics in results.items() for r in _metric_rows(aid, metrics, scoring)]
+    with engine.begin() as conn:
+        conn.execute(table.delete().where(table.c.scoring == scoring,
+                                          table.c.attempt_id.in_(list(results))))
+        if rows:
+            conn.execute(_insert_for(table), rows)
+
+# One insert statement per table, built once; SQLAlchemy's compiled cache and
+# sqlite3's statement cache then reuse the prepared form for every batch.
+_INSERTS = {}
+
+def _insert_for(table):
+    stmt = _INSERTS.get(table.name)
+    if stmt is None:
+        stmt = _INSERTS[table.name] = table.insert()
+    return stmt
+
+def _rows_by_table(models):
+    by_table = {}
+    for m in models:
+        table = type(m).__table__
+        cols = [c.name for c in table.columns if not (c.primary_key and getattr(m, c.name) is None)]
+        by_table.setdefault(table, []).append({c: getattr(m, c) for c in cols})
+    return by_table
+
+def save_many(models):
+    """Insert a batch of rows in a single transaction (executemany per table)."""
+    with engine.begin() as conn:
+        for table, rows in _rows_by_table(models).items():
+            conn.execute(_insert_for(table), rows)
+
+async def save_many_async(models):
+    """save_many() on the async engine (used by the event writer)."""
+    async with async_engine.begin() as conn:
+        for table, rows in _rows_by_table(models).items():
+            await conn.execute(_insert_for(table), rows)
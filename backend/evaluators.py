@@ -1,47 +1,58 @@
 # backend/evaluators.py
 from __future__ import annotations
 from typing import Optional, Dict, Any
-import time
-from ultralytics import YOLO
-import mediapipe as mp
-import cv2
 
-# Reuse your function that decides if we've reached the mouth
-from exercises.lift_to_mouth_test import process_frame, DEFAULT_MOUTH_SCALE
+from exercises.clock import REALTIME
+from model_registry import models
+
+# Shared (model_registry) instances: every LiftToMouthEval, including the one inside
+# HoldAtMouthEval, gets the same YOLO and MediaPipe graphs
+YOLO_WEIGHTS = "yolov10b.pt"
+HANDS_CFG = dict(static_image_mode=False, max_num_hands=2, model_complexity=0,
+                 min_detection_confidence=0.5, min_tracking_confidence=0.5)
+POSE_CFG  = dict(static_image_mode=False, model_complexity=0, enable_segmentation=False,
+                 min_detection_confidence=0.5, min_tracking_confidence=0.5)
+FACE_CFG  = dict(static_image_mode=False, max_num_faces=1, refine_landmarks=True,
+                 min_detection_confidence=0.5, min_tracking_confidence=0.5)
 
 class BaseEval:
+    """update() gets the frame's capture timestamp; start() reads self.clock (see exercises/clock.py)."""
     name: str
+    clock = REALTIME
     def start(self, **kwargs): ...
-    def update(self, frame) -> Dict[str, Any]: ...
+    def update(self, frame, ts: Optional[float] = None) -> Dict[str, Any]: ...
     def stop(self): ...
+    def _now(self, ts: Optional[float]) -> float:
+        return self.clock.now() if ts is None else ts
 
 class LiftToMouthEval(BaseEval):
     """Passes when the bottle (or index) is near mouth (your reach-to-mouth logic)."""
     name = "lift_cup"
     def __init__(self):
-        self.model = YOLO("yolov10b.pt")
-        self.hands = mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=2, model_complexity=0,
-                                              min_detection_confidence=0.5, min_tracking_confidence=0.5)
-        self.pose  = mp.solutions.pose.Pose(static_image_mode=False, model_complexity=0,
-                                            enable_segmentation=False, min_detection_confidence=0.5,
-                                            min_tracking_confidence=0.5)
-        self.face  = mp.solutions.face_mesh.FaceMesh(static_image_mode=False, max_num_faces=1, refine_landmarks=True,
-                                                     min_detection_confidence=0.5, min_tracking_confidence=0.5)
-        self.mouth_scale = DEFAULT_MOUTH_SCALE
+        # Reuse your function that decides if we've reached the mouth (imported here:
+        # lift_to_mouth_test loads mediapipe/cv2 at import, which this module doesn't need)
+        from exercises.lift_to_mouth_test import process_frame, DEFAULT_MOUTH_SCALE
+        self.process_frame = process_frame
+        self.default_mouth_scale = DEFAULT_MOUTH_SCALE
+        self._handles = [models.acquire("yolo", weights=YOLO_WEIGHTS), models.acquire("hands", **HANDS_CFG),
+                         models.acquire("pose", **POSE_CFG), models.acquire("face_mesh", **FACE_CFG)]
+        self.model, self.hands, self.pose, self.face = (h.obj for h in self._handles)
+        self.mouth_scale = self.default_mouth_scale
 
     def start(self, **kwargs):
         # allow overrides if you want to tune sensitivity per task
-        self.mouth_scale = kwargs.get("mouth_scale", DEFAULT_MOUTH_SCALE)
+        self.mouth_scale = kwargs.get("mouth_scale", self.default_mouth_scale)
 
-    def update(self, frame):
-        bottle_pos, reached = process_frame(frame, self.model, self.hands, self.face, self.pose, self.mouth_scale)
+    def update(self, frame, ts=None):
+        yolo, hands, pose, face = self._handles
+        with yolo, hands, pose, face:
+            bottle_pos, reached = self.process_frame(frame, self.model, self.hands, self.face, self.pose, self.mouth_scale)
         return {"passed": bool(reached), "progress": 1.0 if reached else 0.0, "bottle_pos": bottle_pos}
 
     def stop(self):
-        try:
-            self.hands.close(); self.pose.close(); self.face.close()
-        except Exception:
-            pass
+        # hand the instances back (they stay warm for the next evaluator)
+        for h in self._handles:
+            h.release()
 
 class HoldAtMouthEval(BaseEval):
     """Passes after the bottle stays near the mouth for N seconds (uses the same reach check)."""
@@ -54,14 +65,16 @@ class HoldAtMouthEval(BaseEval):
     def start(self, **kwargs):
         self.required_secs = float(kwargs.get("seconds", self.required_secs))
         self.started_at = None
+        self.lift_eval.clock = self.clock
         self.lift_eval.start(**kwargs)
 
-    def update(self, frame):
-        r = self.lift_eval.update(frame)
+    def update(self, frame, ts=None):
+        r = self.lift_eval.update(frame, ts)
         if r["passed"]:
+            now = self._now(ts)
             if self.started_at is None:
-                self.started_at = time.time()
-            held = time.time() - self.started_at
+                self.started_at = now
+            held = now - self.started_at
             done = held >= self.required_secs
             prog = min(1.0, held / self.required_secs)
             return {"passed": done, "progress": prog, "holding_seconds": held}
@@ -78,10 +91,11 @@ class TimedPassEval(BaseEval):
         self.name = name; self.seconds = seconds; self.started_at = None
     def start(self, **kwargs):
         self.seconds = float(kwargs.get("seconds", self.seconds))
-        self.started_at = time.time()
-    def update(self, frame):
-        if self.started_at is None: self.started_at = time.time()
-        held = time.time() - self.started_at
+        self.started_at = self.clock.now()
+    def update(self, frame, ts=None):
+        now = self._now(ts)
+        if self.started_at is None: self.started_at = now
+        held = now - self.started_at
         return {"passed": held >= self.seconds, "progress": min(1.0, held / self.seconds)}
     def stop(self): pass
 
@@ -0,0 +1,102 @@
+# Batched background writer for telemetry events.
+#
+# The capture loop calls submit() (never blocks); a single task drains the
+# bounded queue and commits everything it collected in one transaction every
+# flush_ms or flush_rows, whichever comes first. stop() flushes what is left.
+# Writes go through the async engine, so no executor thread is held meanwhile.
+# on_flush() runs after each committed batch (app.py invalidates cached reads).
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from db import save_many_async
+
+
+class EventWriter:
+    def __init__(self, flush_ms=500, flush_rows=200, max_queue=5000, on_flush: Optional[Callable[[], None]] = None):
+        self.flush_s = flush_ms / 1000.0
+        self.flush_rows = flush_rows
+        self.max_queue = max_queue
+        self.on_flush = on_flush
+        self.queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def start(self):
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run())
+
+    def submit(self, model) -> bool:
+        """Queue one row; returns False (and counts a drop) if the queue is full."""
+        if self.queue is None:
+            return False
+        try:
+            self.queue.put_nowait(model)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    async def _collect(self) -> List[Any]:
+        batch: List[Any] = []
+        deadline = time.monotonic() + self.flush_s
+        while len(batch) < self.flush_rows:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout=left))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _flush(self, batch: List[Any]):
+        if not batch:
+            return
+        t0 = time.perf_counter()
+        try:
+            await save_many_async(batch)
+            self.written += len(batch)
+            if self.on_flush is not None:
+                self.on_flush()
+        except Exception as e:
+            self.dropped += len(batch)
+            print(f"[WARN] event flush failed ({len(batch)} rows): {e}")
+        ms = (time.perf_counter() - t0) * 1000.0
+        self.flushes += 1
+        self.last_flush_ms = ms
+        self.max_flush_ms = max(self.max_flush_ms, ms)
+        self._total_flush_ms += ms
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            await self._flush(batch)
+            if self._closing and self.queue.empty():
+                break
+
+    async def stop(self):
+        """Finish the current batch and flush everything still queued."""
+        self._closing = True
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "queue_max": self.max_queue,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "avg_flush_ms": round(self._total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+        }
@@ -0,0 +1,55 @@
+"""
+Time sources for evaluators and metrics.
+
+Evaluators never read the wall clock themselves: update() gets the frame's
+capture timestamp from the pipeline, and start() asks the evaluator's clock. Live
+capture uses RealtimeClock; recorded footage uses a ReplayClock set to each frame's
+timestamp, so a session scores identically however fast it is fed through.
+
+    clock = ReplayClock(t0)
+    ev = TASK_EVALUATORS[task](); ev.clock = clock; ev.start()
+    for ts, frame in frames:
+        clock.set(ts)
+        out = ev.update(app.frame_perception(frame, ts))  # evaluators.py: ev.update(frame, ts)
+"""
+import time
+
+
+class RealtimeClock:
+    def now(self) -> float:
+        return time.time()
+
+
+class ReplayClock:
+    """Clock that only moves when told to (recorded or synthetic frame timestamps)."""
+
+    def __init__(self, start: float = 0.0):
+        self.t = float(start)
+
+    def now(self) -> float:
+        return self.t
+
+    def set(self, ts: float) -> float:
+        self.t = float(ts)
+        return self.t
+
+    def advance(self, dt: float) -> float:
+        self.t += dt
+        return self.t
+
+
+REALTIME = RealtimeClock()
+
+
+def video_frames(path: str):
+    """Yield (ts, frame) from a video file, ts in seconds from its start (container PTS)."""
+    import cv2
+    cap = cv2.VideoCapture(path)
+    try:
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            yield cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0, frame
+    finally:
+        cap.release()
@@ -0,0 +1,120 @@
+"""
+YOLO detection helpers shared by the exercise scripts (main.py, reach_bottle_test.py).
+
+Detections are (x1, y1, x2, y2, cls_id, score) tuples in frame pixels. Box math is
+vectorized: IoU is computed one kept box against all remaining ones, and boxes
+found on rotated frames are mapped back through the inverse affine in one
+cv2.transform call. The rotation fallback submits every angle to the model as
+one batch instead of one predict() per angle.
+"""
+import cv2
+import numpy as np
+
+
+# ---------- boxes ----------
+def clamp_box(x1, y1, x2, y2, w, h):
+    x1 = max(0, min(w-1, x1)); y1 = max(0, min(h-1, y1))
+    x2 = max(0, min(w-1, x2)); y2 = max(0, min(h-1, y2))
+    if x2 < x1: x1, x2 = x2, x1
+    if y2 < y1: y1, y2 = y2, y1
+    return x1, y1, x2, y2
+
+
+def clamp_boxes(boxes, w, h):
+    """clamp_box() over an (N, 4) array."""
+    b = np.asarray(boxes).reshape(-1, 4)
+    xs = np.clip(b[:, [0, 2]], 0, w - 1)
+    ys = np.clip(b[:, [1, 3]], 0, h - 1)
+    return np.stack([xs.min(1), ys.min(1), xs.max(1), ys.max(1)], axis=1)
+
+
+def iou_many(box, boxes):
+    """IoU of one (4,) box against (N, 4) boxes (float32, like the per-pair version was)."""
+    box = np.asarray(box, dtype=np.float32)
+    b = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    iw = np.maximum(0, np.minimum(box[2], b[:, 2]) - np.maximum(box[0], b[:, 0]))
+    ih = np.maximum(0, np.minimum(box[3], b[:, 3]) - np.maximum(box[1], b[:, 1]))
+    inter = iw * ih
+    area_a = max(0, (box[2] - box[0]) * (box[3] - box[1]))
+    area_b = np.maximum(0, (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1]))
+    iou = inter / (area_a + area_b - inter + np.float32(1e-6))
+    return np.where(inter > 0, iou, 0.0)
+
+
+def nms(boxes, scores, iou_thresh=0.5):
+    """Greedy NMS; returns kept indices, highest score first."""
+    if len(boxes) == 0: return []
+    boxes = np.array(boxes, dtype=np.float32)
+    scores = np.array(scores, dtype=np.float32)
+    idxs = np.argsort(scores)[::-1]
+    keep = []
+    while len(idxs) > 0:
+        i = idxs[0]; keep.append(i)
+        rest = idxs[1:]
+        idxs = rest[iou_many(boxes[i], boxes[rest]) < iou_thresh]
+    return keep
+
+
+# ---------- rotation helpers (any angle) ----------
+def rotate_with_matrix(frame, angle_deg):
+    h, w = frame.shape[:2]
+    c = (w / 2.0, h / 2.0)
+    M = cv2.getRotationMatrix2D(c, angle_deg, 1.0)
+    invM = cv2.invertAffineTransform(M)
+    rotated = cv2.warpAffine(frame, M, (w, h), flags=cv2.INTER_LINEAR,
+                             borderMode=cv2.BORDER_CONSTANT, borderValue=(0,0,0))
+    return rotated, M, invM
+
+
+def map_boxes_back(boxes_r, invM, W, H):
+    """(N, 4) boxes on a rotated frame -> axis-aligned boxes around their corners in the original."""
+    b = np.asarray(boxes_r).reshape(-1, 4)
+    corners = b[:, [0, 1, 2, 1, 2, 3, 0, 3]].astype(np.float32).reshape(-1, 1, 2)
+    pts = np.round(cv2.transform(corners, invM)).astype(int).reshape(-1, 4, 2)
+    out = np.concatenate([pts.min(axis=1), pts.max(axis=1)], axis=1)
+    return clamp_boxes(out, W, H)
+
+
+# ---------- detection ----------
+def _result_boxes(res, w, h):
+    """(boxes (N, 4) int clamped, cls (N,), scores (N,)) of one ultralytics result."""
+    if res.boxes is None or len(res.boxes) == 0:
+        return np.zeros((0, 4), dtype=int), np.zeros(0, dtype=int), np.zeros(0, dtype=np.float32)
+    xyxy = res.boxes.xyxy.cpu().numpy().astype(int)
+    cls = res.boxes.cls.cpu().numpy().astype(int)
+    conf = res.boxes.conf.cpu().numpy()
+    return clamp_boxes(xyxy, w, h), cls, conf
+
+
+def _as_detections(boxes, cls, scores, idx=None):
+    idx = range(len(boxes)) if idx is None else idx
+    return [(int(boxes[i][0]), int(boxes[i][1]), int(boxes[i][2]), int(boxes[i][3]),
+             int(cls[i]), float(scores[i])) for i in idx]
+
+
+def detect_on_frame(model, frame_bgr, conf, imgsz, device, class_filter=None):
+    """Returns list of (x1,y1,x2,y2, cls_id, score)."""
+    h, w = frame_bgr.shape[:2]
+    res = model.predict(source=frame_bgr, imgsz=imgsz, conf=conf, device=device,
+                        verbose=False, classes=class_filter)[0]
+    return _as_detections(*_result_boxes(res, w, h))
+
+
+def detect_conditional_rotations(model, frame_bgr, conf, imgsz, device, angles, iou_merge, class_filter=None):
+    """Try 0° first, else the fallback angles (one batched predict); the first angle, in
+    order, with detections wins. Boxes are mapped back and NMS-merged."""
+    base = detect_on_frame(model, frame_bgr, conf, imgsz, device, class_filter)
+    if base or not angles:
+        return base
+
+    H, W = frame_bgr.shape[:2]
+    rotations = [rotate_with_matrix(frame_bgr, ang) for ang in angles]
+    results = model.predict(source=[rot for rot, _, _ in rotations], imgsz=imgsz, conf=conf,
+                            device=device, verbose=False, classes=class_filter)
+    for (rot, _, invM), res in zip(rotations, results):
+        Hr, Wr = rot.shape[:2]
+        boxes, cls, scores = _result_boxes(res, Wr, Hr)
+        if len(boxes):
+            boxes = map_boxes_back(boxes, invM, W, H)
+            return _as_detections(boxes, cls, scores, nms(boxes, scores, iou_merge))
+    return []
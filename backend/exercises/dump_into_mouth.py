@@ -0,0 +1,65 @@
+import math
+
+import numpy as np
+
+from exercises.kinematics import second_diff, second_diff_norms
+
+# Test-specific thresholds
+MIN_TILT_ANGLE = 50.0  # degrees
+MAX_JERKS = 5
+JERK_ANGLE_THRESH_DEG = 10.0  # sudden angle change threshold
+JERK_ACCEL_THRESH = 100.0  # sudden movement threshold
+MIN_SAMPLES = 10  # need some minimum data before the tilt can complete the test
+
+
+def calculate_bottle_angle(bbox):
+    """Calculate bottle tilt angle from bounding box"""
+    x1, y1, x2, y2 = bbox
+    width = x2 - x1
+    height = y2 - y1
+    return math.degrees(math.atan2(width, height))
+
+
+def frame_jerks(angles, centers, angle_thresh=JERK_ANGLE_THRESH_DEG, accel_thresh=JERK_ACCEL_THRESH):
+    """Jerks contributed by the newest sample (0, 1 or 2): angle and position second differences."""
+    if len(angles) < 3:
+        return 0
+    jerks = 0
+    if second_diff(angles[-3], angles[-2], angles[-1]) >= angle_thresh:
+        jerks += 1
+    if second_diff(centers[-3], centers[-2], centers[-1]) >= accel_thresh:
+        jerks += 1
+    return jerks
+
+
+def score_dump(boxes,
+               min_tilt_angle=MIN_TILT_ANGLE,
+               max_jerks=MAX_JERKS,
+               jerk_angle_thresh_deg=JERK_ANGLE_THRESH_DEG,
+               jerk_accel_thresh=JERK_ACCEL_THRESH):
+    """
+    Replay the dump-into-mouth test over a sequence of bottle boxes (x1,y1,x2,y2).
+
+    Returns dict with keys:
+      - complete: bool (tilt threshold reached after MIN_SAMPLES samples)
+      - tilt_angle: float (max - min angle seen up to completion)
+      - jerks: int
+      - passed: bool
+    """
+    b = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    if not len(b):
+        return {"complete": False, "tilt_angle": 0.0, "jerks": 0, "passed": False}
+    angles = np.degrees(np.arctan2(b[:, 2] - b[:, 0], b[:, 3] - b[:, 1]))
+    centers = np.stack([(b[:, 0] + b[:, 2]) // 2, (b[:, 1] + b[:, 3]) // 2], axis=1)
+    # jerks[i]: total up to and including sample i (frame_jerks() summed)
+    per_frame = np.zeros(len(b), dtype=np.int64)
+    per_frame[2:] = ((second_diff_norms(angles) >= jerk_angle_thresh_deg).astype(np.int64)
+                     + (second_diff_norms(centers) >= jerk_accel_thresh))
+    jerks = np.cumsum(per_frame)
+    tilt = np.maximum.accumulate(angles) - np.minimum.accumulate(angles)
+    done = np.flatnonzero(tilt[MIN_SAMPLES:] >= min_tilt_angle)
+    if len(done):
+        i = MIN_SAMPLES + done[0]
+        return {"complete": True, "tilt_angle": float(tilt[i]), "jerks": int(jerks[i]),
+                "passed": bool(jerks[i] <= max_jerks)}
+    return {"complete": False, "tilt_angle": float(tilt[-1]), "jerks": int(jerks[-1]), "passed": False}
@@ -2,9 +2,10 @@ import cv2
 import time
 import numpy as np
 from collections import deque
-from ultralytics import YOLO
-import mediapipe as mp
-import math
+from exercises.runtime import ExerciseRuntime
+from exercises.dump_into_mouth import (
+    MIN_TILT_ANGLE, MAX_JERKS, MIN_SAMPLES, calculate_bottle_angle, frame_jerks,
+)
 
 # ---------- CONFIG ----------
 MODEL_PATH   = "../yolov10b.pt"
@@ -18,11 +19,7 @@ FLIP_VIEW    = True
 TARGET_CLASS = "bottle"
 FPS_SMOOTH_N = 20
 
-# Test-specific thresholds
-MIN_TILT_ANGLE = 50.0  # degrees
-MAX_JERKS = 5
-JERK_ANGLE_THRESH_DEG = 10.0  # sudden angle change threshold
-JERK_ACCEL_THRESH = 100.0  # sudden movement threshold
+# Test-specific thresholds live in exercises/dump_into_mouth.py (shared with rescore.py)
 
 def detect_on_frame(model, frame_bgr, conf, imgsz, device, class_filter=None):
     res = model.predict(source=frame_bgr, imgsz=imgsz, conf=conf, device=device, verbose=False, classes=class_filter)[0]
@@ -36,19 +33,13 @@ def detect_on_frame(model, frame_bgr, conf, imgsz, device, class_filter=None):
         out.append((x1, y1, x2, y2, cls_id, score))
     return out
 
-def calculate_bottle_angle(bbox):
-    """Calculate bottle tilt angle from bounding box"""
-    x1, y1, x2, y2 = bbox
-    width = x2 - x1
-    height = y2 - y1
-    return math.degrees(math.atan2(width, height))
-
-def dump():
+def dump(runtime=None):
     print("🧪 Dump into Mouth Test")
     print("Tilt bottle smoothly to simulate pouring")
     print("Press 's' to start when ready")
 
-    model = YOLO(MODEL_PATH)
+    rt = runtime or ExerciseRuntime(CAM_INDEX, FRAME_W, FRAME_H)
+    model = rt.yolo(MODEL_PATH)
     names = model.names
     class_filter = None
     if TARGET_CLASS:
@@ -56,12 +47,9 @@ def dump():
         if ids:
             class_filter = ids
 
-    cap = cv2.VideoCapture(CAM_INDEX)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_W)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_H)
+    cap = rt.camera()
 
-    mp_hands = mp.solutions.hands
-    hands = mp_hands.Hands(static_image_mode=False, max_num_hands=2)
+    hands = rt.hands(static_image_mode=False, max_num_hands=2)
 
     # Test state
     test_started = False
@@ -101,29 +89,15 @@ def dump():
                         angles.append(angle)
                         centers.append(center)
                         
-                        # Check for jerks
-                        if len(angles) >= 3:
-                            # Angle jerk detection
-                            d1 = angles[-1] - angles[-2]
-                            d2 = angles[-2] - angles[-3]
-                            if abs(d1 - d2) >= JERK_ANGLE_THRESH_DEG:
-                                jerks_count += 1
-                            
-                            # Position jerk detection
-                            x0,y0 = centers[-3]
-                            x1,y1 = centers[-2]
-                            x2,y2 = centers[-1]
-                            ax = (x2 - 2*x1 + x0)
-                            ay = (y2 - 2*y1 + y0)
-                            if math.hypot(ax, ay) >= JERK_ACCEL_THRESH:
-                                jerks_count += 1
+                        # Check for jerks (angle and position)
+                        jerks_count += frame_jerks(angles, centers)
                         
                         # Show current angle
                         cv2.putText(frame, f"Angle: {angle:.1f}°", (10, 90),
                                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
                         
                         # Check completion criteria
-                        if len(angles) > 10:  # Need some minimum data
+                        if len(angles) > MIN_SAMPLES:  # Need some minimum data
                             total_tilt = max(angles) - min(angles)
                             if total_tilt >= MIN_TILT_ANGLE:
                                 test_complete = True
@@ -176,6 +150,6 @@ def dump():
             cv2.imshow("Dump into Mouth Test", frame)
 
     finally:
-        hands.close()
-        cap.release()
         cv2.destroyAllWindows()
+        if runtime is None:
+            rt.close()
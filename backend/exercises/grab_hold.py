@@ -1,6 +1,5 @@
 import time
 import math
-from collections import deque
 
 
 class GrabHoldMetrics:
@@ -41,16 +40,44 @@ class GrabHoldMetrics:
         self.full_grip_achieved = False
         self.completed = False
 
-        self.hold_samples_px = deque()
+        # Running hold-window statistics (see _add_hold_sample)
+        self.hold_n = 0
+        self.hold_mean = (0.0, 0.0)
+        self.hold_counts = {}        # (x, y) -> samples at that pixel
         self.hold_start_time = None
 
-    def start(self):
+    def start(self, now=None):
+        """Begin a trial; now: start-signal timestamp (frame/replay clock), default wall time."""
         self.reset()
-        self.start_signal_time = time.time()
+        self.start_signal_time = time.time() if now is None else now
 
     def _distance(self, a, b):
         return math.hypot(a[0] - b[0], a[1] - b[1])
 
+    def _add_hold_sample(self, p):
+        """Running (Welford) mean of the hold-window centers plus a histogram of positions."""
+        self.hold_n += 1
+        mx, my = self.hold_mean
+        self.hold_mean = (mx + (p[0] - mx) / self.hold_n, my + (p[1] - my) / self.hold_n)
+        key = (p[0], p[1])
+        self.hold_counts[key] = self.hold_counts.get(key, 0) + 1
+
+    def _hold_std(self):
+        """Sample std of the samples' distances to their (current) mean.
+
+        Every distance moves with the mean, so this can't be a pure running sum; it is
+        computed over the distinct (integer pixel) positions, weighted by count. Those are
+        few during a hold (the jitter footprint), so the cost no longer grows with time.
+        """
+        n = self.hold_n
+        if n < 2:
+            return 0.0
+        mx, my = self.hold_mean
+        dists = [(math.hypot(x - mx, y - my), c) for (x, y), c in self.hold_counts.items()]
+        mean_d = sum(d * c for d, c in dists) / n
+        var = sum(c * (d - mean_d) ** 2 for d, c in dists) / (n - 1)
+        return math.sqrt(var)
+
     def update(self, current_time, fingertips_px, bottle_center_px, bottle_w_px, bottle_h_px):
         """
         Update grab/hold state machine and compute metrics.
@@ -114,20 +141,10 @@ class GrabHoldMetrics:
         if self.full_grip_achieved:
             elapsed_hold = current_time - self.hold_start_time if self.hold_start_time else 0.0
             if not self.completed:
-                self.hold_samples_px.append(bottle_center_px)
+                self._add_hold_sample(bottle_center_px)
 
             # Provisional stability (live) based on samples so far
-            if len(self.hold_samples_px) >= 2:
-                xs = [p[0] for p in self.hold_samples_px]
-                ys = [p[1] for p in self.hold_samples_px]
-                mean_x = sum(xs) / len(xs)
-                mean_y = sum(ys) / len(ys)
-                dists = [math.hypot(px - mean_x, py - mean_y) for px, py in self.hold_samples_px]
-                mean_d = sum(dists) / len(dists)
-                var = sum((d - mean_d) ** 2 for d in dists) / max(1, (len(dists) - 1))
-                stability_std_px = math.sqrt(var)
-            else:
-                stability_std_px = 0.0
+            stability_std_px = self._hold_std()
 
             # Finalize only when window reached (no early exit)
             if not self.completed and elapsed_hold >= self.initial_hold_s:
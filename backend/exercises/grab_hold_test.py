@@ -2,10 +2,10 @@ import cv2
 import time
 import numpy as np
 from collections import deque
-from ultralytics import YOLO
 import mediapipe as mp
 import math
 from exercises.grab_hold import ReadyGraspHold
+from exercises.runtime import ExerciseRuntime
 
 
 # ---------- CONFIG ----------
@@ -68,7 +68,7 @@ def landmarks_dict(hand_lms, w, h):
     return {i: to_pixels(hand_lms.landmark[i], w, h) for i in range(21)}
 
 
-def grab_test(hand = 'r', taggle = 'fixed'):
+def grab_test(hand = 'r', taggle = 'fixed', runtime=None):
     global TARGET_MODE
     print("✊ GRAB/HOLD TEST (main.py-style)")
     print("- L/R: switch dominant hand")
@@ -92,7 +92,8 @@ def grab_test(hand = 'r', taggle = 'fixed'):
     if env_mode in ("fixed", "head"):
         TARGET_MODE = env_mode
 
-    model = YOLO(MODEL_PATH)
+    rt = runtime or ExerciseRuntime(CAM_INDEX, FRAME_W, FRAME_H)
+    model = rt.yolo(MODEL_PATH)
     names = model.names
     class_filter = None
     if TARGET_CLASS:
@@ -100,18 +101,12 @@ def grab_test(hand = 'r', taggle = 'fixed'):
         if ids:
             class_filter = ids
 
-    cap = cv2.VideoCapture(CAM_INDEX)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_W)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_H)
-    cap.set(cv2.CAP_PROP_FPS, 30)
-    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-    if not cap.isOpened():
-        raise RuntimeError("Cannot open webcam")
+    cap = rt.camera()
 
-    hands = mp_hands.Hands(static_image_mode=False, max_num_hands=2, model_complexity=0,
-                           min_detection_confidence=0.5, min_tracking_confidence=0.5)
-    pose  = mp_pose.Pose(static_image_mode=False, model_complexity=0, enable_segmentation=False,
-                         min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    hands = rt.hands(static_image_mode=False, max_num_hands=2, model_complexity=0,
+                     min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    pose  = rt.pose(static_image_mode=False, model_complexity=0, enable_segmentation=False,
+                    min_detection_confidence=0.5, min_tracking_confidence=0.5)
 
     fps_deque = deque(maxlen=FPS_SMOOTH_N)
     prev_t = time.time()
@@ -287,8 +282,9 @@ def grab_test(hand = 'r', taggle = 'fixed'):
             cv2.imshow(win_name, frame)
 
     finally:
-        hands.close(); pose.close()
-        cap.release(); cv2.destroyAllWindows()
+        cv2.destroyAllWindows()
+        if runtime is None:
+            rt.close()
 
 
 # if __name__ == "__main__":
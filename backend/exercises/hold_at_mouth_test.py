@@ -3,8 +3,8 @@ import time
 import math
 import numpy as np
 from collections import deque
-from ultralytics import YOLO
 import mediapipe as mp
+from exercises.runtime import ExerciseRuntime
 
 # -------- CONFIG --------
 MODEL_PATH   = "yolov10b.pt"
@@ -60,10 +60,11 @@ def detect_on_frame(model, frame_bgr, class_filter, conf, imgsz, device):
         out.append((x1, y1, x2, y2, cls_id, score))
     return out
 
-def hold(hand = "r"):
+def hold(hand = "r", runtime=None):
     global REF_MODE
 
-    model = YOLO(MODEL_PATH)
+    rt = runtime or ExerciseRuntime(CAM_INDEX, FRAME_W, FRAME_H)
+    model = rt.yolo(MODEL_PATH)
     if HALF and DEVICE != "cpu":
         try: model.fuse()
         except Exception: pass
@@ -75,20 +76,14 @@ def hold(hand = "r"):
         if ids: class_filter = ids
         else:   print(f'WARNING: class "{TARGET_CLASS}" not in model; running with all classes.')
 
-    cap = cv2.VideoCapture(CAM_INDEX)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_W)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_H)
-    cap.set(cv2.CAP_PROP_FPS, 30)
-    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-    if not cap.isOpened():
-        raise RuntimeError("Cannot open webcam")
-
-    hands = mp_hands.Hands(static_image_mode=False, max_num_hands=2, model_complexity=0,
-                           min_detection_confidence=0.5, min_tracking_confidence=0.5)
-    pose  = mp_pose.Pose(static_image_mode=False, model_complexity=0, enable_segmentation=False,
+    cap = rt.camera()
+
+    hands = rt.hands(static_image_mode=False, max_num_hands=2, model_complexity=0,
+                     min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    pose  = rt.pose(static_image_mode=False, model_complexity=0, enable_segmentation=False,
+                    min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    face  = rt.face_mesh(static_image_mode=False, max_num_faces=1, refine_landmarks=True,
                          min_detection_confidence=0.5, min_tracking_confidence=0.5)
-    face  = mp_mesh.FaceMesh(static_image_mode=False, max_num_faces=1, refine_landmarks=True,
-                             min_detection_confidence=0.5, min_tracking_confidence=0.5)
 
     mouth_scale = DEFAULT_MOUTH_SCALE
     fps_deque   = deque(maxlen=FPS_SMOOTH_N)
@@ -275,9 +270,7 @@ def hold(hand = "r"):
             cv2.imshow(win, frame)
 
     finally:
-        try:
-            hands.close(); pose.close(); face.close()
-        except Exception:
-            pass
-        cap.release(); cv2.destroyAllWindows()
+        cv2.destroyAllWindows()
+        if runtime is None:
+            rt.close()
 
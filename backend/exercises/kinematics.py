@@ -0,0 +1,153 @@
+"""
+Movement-quality metrics shared by the exercises (and rescore.py).
+
+Batch functions take a whole path as an (N, 2) array-like of pixel positions (or an
+(N,) series, e.g. bottle angles) and are vectorized with NumPy. The streaming
+classes give the same numbers one sample at a time in O(1) for live loops.
+"""
+import math
+
+import numpy as np
+
+DIRECTION_CHANGE_RAD = 0.785  # ~45 degrees between successive movement directions
+MIN_STEP_PX = 1e-6            # shorter steps have no direction
+
+
+def _path(xy):
+    a = np.asarray(xy, dtype=float)
+    return a.reshape(len(a), -1)  # (N,) series -> (N, 1)
+
+
+def _norms(d):
+    return np.sqrt(np.einsum("ij,ij->i", d, d))
+
+
+# ---- batch ----------------------------------------------------------------------
+def step_norms(xy):
+    """|p[i] - p[i-1]| for i = 1..N-1."""
+    return _norms(np.diff(_path(xy), n=1, axis=0))
+
+
+def path_length(xy):
+    """Total distance travelled along the path."""
+    return float(step_norms(xy).sum()) if len(xy) > 1 else 0.0
+
+
+def second_diff_norms(xy):
+    """|p[i] - 2 p[i-1] + p[i-2]|: per-frame acceleration (the exercises' "jerk")."""
+    return _norms(np.diff(_path(xy), n=2, axis=0))
+
+
+def third_diff_norms(xy):
+    """|p[i] - 3 p[i-1] + 3 p[i-2] - p[i-3]|: per-frame jerk proper."""
+    return _norms(np.diff(_path(xy), n=3, axis=0))
+
+
+def median_jerk(xy):
+    """Median second-difference magnitude (robust to single-frame detection glitches)."""
+    d = second_diff_norms(xy)
+    return float(np.median(d)) if len(d) else 0.0
+
+
+def direction_changes(xy, angle_thresh=DIRECTION_CHANGE_RAD):
+    """Turns sharper than angle_thresh along a (N, 2) path; zero-length steps are skipped."""
+    v = np.diff(_path(xy), axis=0)
+    norm = _norms(v)
+    keep = norm > MIN_STEP_PX
+    u = v[keep] / norm[keep, None]
+    if len(u) < 2:
+        return 0
+    dot = np.clip(np.einsum("ij,ij->i", u[1:], u[:-1]), -1.0, 1.0)
+    return int(np.count_nonzero(np.arccos(dot) > angle_thresh))
+
+
+def sparc(speed, fs, pad_level=4, fc=10.0, amp_th=0.05):
+    """
+    Spectral arc length of a speed profile (Balasubramanian et al. 2015).
+
+    speed: (N,) speeds sampled at fs Hz. Returns a negative number; closer to 0 is
+    smoother. 0.0 for profiles too short or flat to measure.
+    """
+    v = np.asarray(speed, dtype=float)
+    if len(v) < 2 or not np.any(v):
+        return 0.0
+    nfft = int(2 ** (math.ceil(math.log2(len(v))) + pad_level))
+    f = np.arange(nfft) * fs / nfft
+    mag = np.abs(np.fft.fft(v, nfft))
+    mag = mag / mag.max()
+    sel = f <= fc
+    f, mag = f[sel], mag[sel]
+    # cut at the last frequency still above the amplitude threshold
+    above = np.flatnonzero(mag >= amp_th)
+    f, mag = f[above[0]:above[-1] + 1], mag[above[0]:above[-1] + 1]
+    if len(f) < 2:
+        return 0.0
+    df = np.diff(f) / (f[-1] - f[0])
+    return float(-np.sum(np.hypot(df, np.diff(mag))))
+
+
+def path_sparc(t, xy, pad_level=4, fc=10.0, amp_th=0.05):
+    """SPARC of a timestamped path, using its mean sampling rate."""
+    t = np.asarray(t, dtype=float)
+    if len(t) < 3 or t[-1] <= t[0]:
+        return 0.0
+    speed = step_norms(xy) / np.maximum(np.diff(t), 1e-6)
+    return sparc(speed, (len(t) - 1) / (t[-1] - t[0]), pad_level, fc, amp_th)
+
+
+# ---- streaming (O(1) per sample) ----------------------------------------------
+def second_diff(p0, p1, p2):
+    """Second-difference magnitude of three consecutive points (or scalars)."""
+    if isinstance(p2, (int, float)):
+        return abs(p2 - 2 * p1 + p0)
+    return math.hypot(p2[0] - 2 * p1[0] + p0[0], p2[1] - 2 * p1[1] + p0[1])
+
+
+class PathLength:
+    """Running path_length()."""
+
+    def __init__(self):
+        self.total = 0.0
+        self.last = None
+
+    def update(self, p):
+        if self.last is not None:
+            self.total += math.hypot(p[0] - self.last[0], p[1] - self.last[1])
+        self.last = p
+        return self.total
+
+
+class SecondDiff:
+    """Newest second_diff_norms() value per sample (None until three samples)."""
+
+    def __init__(self):
+        self.p0 = self.p1 = None
+
+    def update(self, p):
+        d = None if self.p0 is None else second_diff(self.p0, self.p1, p)
+        self.p0, self.p1 = self.p1, p
+        return d
+
+
+class DirectionChanges:
+    """Running direction_changes()."""
+
+    def __init__(self, angle_thresh=DIRECTION_CHANGE_RAD):
+        self.angle_thresh = angle_thresh
+        self.count = 0
+        self.last = None
+        self.prev_unit = None
+
+    def update(self, p):
+        if self.last is not None:
+            vx, vy = p[0] - self.last[0], p[1] - self.last[1]
+            norm = math.hypot(vx, vy)
+            if norm > MIN_STEP_PX:
+                unit = (vx / norm, vy / norm)
+                if self.prev_unit is not None:
+                    dot = max(min(unit[0] * self.prev_unit[0] + unit[1] * self.prev_unit[1], 1.0), -1.0)
+                    if math.acos(dot) > self.angle_thresh:
+                        self.count += 1
+                self.prev_unit = unit
+        self.last = p
+        return self.count
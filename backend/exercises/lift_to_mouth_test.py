@@ -1,12 +1,12 @@
 # Reach-to-Mouth with Calibration (YOLO + MediaPipe)
-# Provides process_frame(...) used by FastAPI evaluator.
+# Provides process_frame(...) used by FastAPI evaluator, and lift() for the launcher.
 # pip install ultralytics opencv-python mediapipe
 
 import cv2
 import math
 import numpy as np
-from ultralytics import YOLO
 import mediapipe as mp
+from exercises.runtime import ExerciseRuntime
 
 # -------- CONFIG --------
 MODEL_PATH   = "yolov10b.pt"   # or any YOLO model with "bottle" class
@@ -15,6 +15,10 @@ IMG_SIZE     = 768
 DEVICE       = "cpu"           # 0 (CUDA index), "cpu", or "mps"
 HALF         = False
 TARGET_CLASS = "bottle"        # can be name or class id(s)
+CAM_INDEX    = 0
+FRAME_W      = 1280
+FRAME_H      = 720
+FLIP_VIEW    = True
 
 # Calibration: distance threshold = mouth_scale * ear_distance
 DEFAULT_MOUTH_SCALE = 0.80     # used by app.py if not overridden
@@ -133,4 +137,46 @@ def process_frame(frame, model, hands, face, pose, mouth_scale=DEFAULT_MOUTH_SCA
             dist = euclid(bottle_pos, mouth_center)
             reached = dist <= thresh
             break  # use top detection only
-    return bottle_pos, reached
\ No newline at end of file
+    return bottle_pos, reached
+
+def lift(hand="r", runtime=None):
+    """Launcher exercise: passes (returns 1) once the bottle reaches the mouth; Q quits (0)."""
+    print("🥤 Lift to Mouth Test")
+    print("Lift the bottle to your mouth - Q to quit")
+
+    rt = runtime or ExerciseRuntime(CAM_INDEX, FRAME_W, FRAME_H)
+    model = rt.yolo(MODEL_PATH)
+    cap = rt.camera()
+    pose = rt.pose(static_image_mode=False, model_complexity=0, enable_segmentation=False,
+                   min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    face = rt.face_mesh(static_image_mode=False, max_num_faces=1, refine_landmarks=True,
+                        min_detection_confidence=0.5, min_tracking_confidence=0.5)
+
+    win = "Lift to Mouth Test"
+    cv2.namedWindow(win, cv2.WINDOW_NORMAL)
+    try:
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            if FLIP_VIEW:
+                frame = cv2.flip(frame, 1)
+
+            bottle_pos, reached = process_frame(frame, model, None, face, pose)
+            if bottle_pos:
+                cv2.circle(frame, bottle_pos, 10, (0, 255, 0), 2)
+            status = "REACHED MOUTH!" if reached else "Lift the bottle to your mouth"
+            cv2.putText(frame, status, (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.9,
+                        (0, 255, 0) if reached else (0, 200, 200), 2)
+            cv2.imshow(win, frame)
+
+            if reached:
+                print("✅ PASSED")
+                return 1
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    finally:
+        cv2.destroyAllWindows()
+        if runtime is None:
+            rt.close()
+    return 0
@@ -7,13 +7,15 @@
 #   Q     : quit
 # pip install ultralytics opencv-python mediapipe
 
+import os
+import sys
 import cv2
 import time
-import numpy as np
 from collections import deque
-from ultralytics import YOLO
-import mediapipe as mp
 import math
+# standalone script: put backend/ on the path so `exercises.*` resolves from any cwd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from exercises.detection import detect_conditional_rotations
 
 # ---------- CONFIG ----------
 MODEL_PATH   = "yolov10b.pt"
@@ -49,12 +51,17 @@ GRASP_HOLD_SECONDS         = 5.0    # hold time after READY
 
 cv2.setUseOptimized(True)
 
-# --- MediaPipe setup ---
-mp_hands  = mp.solutions.hands
-mp_pose   = mp.solutions.pose
-mp_mesh   = mp.solutions.face_mesh
-mp_draw   = mp.solutions.drawing_utils
-mp_styles = mp.solutions.drawing_styles
+# --- MediaPipe setup (loaded by main() after the first prompt; the import is slow) ---
+mp_hands = mp_pose = mp_mesh = mp_draw = mp_styles = None
+
+def _load_mediapipe():
+    global mp_hands, mp_pose, mp_mesh, mp_draw, mp_styles
+    import mediapipe as mp
+    mp_hands  = mp.solutions.hands
+    mp_pose   = mp.solutions.pose
+    mp_mesh   = mp.solutions.face_mesh
+    mp_draw   = mp.solutions.drawing_utils
+    mp_styles = mp.solutions.drawing_styles
 
 def to_pixels(landmark, width, height):
     return int(landmark.x * width), int(landmark.y * height)
@@ -62,98 +69,6 @@ def to_pixels(landmark, width, height):
 def euclid(a, b):
     return math.hypot(a[0] - b[0], a[1] - b[1])
 
-def clamp_box(x1, y1, x2, y2, w, h):
-    x1 = max(0, min(w-1, x1)); y1 = max(0, min(h-1, y1))
-    x2 = max(0, min(w-1, x2)); y2 = max(0, min(h-1, y2))
-    if x2 < x1: x1, x2 = x2, x1
-    if y2 < y1: y1, y2 = y2, y1
-    return x1, y1, x2, y2
-
-def iou_xyxy(a, b):
-    ax1, ay1, ax2, ay2 = a
-    bx1, by1, bx2, by2 = b
-    iw = max(0, min(ax2, bx2) - max(ax1, bx1))
-    ih = max(0, min(ay2, by2) - max(ay1, by1))
-    inter = iw * ih
-    if inter <= 0: return 0.0
-    area_a = max(0, (ax2 - ax1) * (ay2 - ay1))
-    area_b = max(0, (bx2 - bx1) * (by2 - by1))
-    return inter / float(area_a + area_b - inter + 1e-6)
-
-def nms(boxes, scores, iou_thresh=0.5):
-    if len(boxes) == 0: return []
-    boxes = np.array(boxes, dtype=np.float32)
-    scores = np.array(scores, dtype=np.float32)
-    idxs = np.argsort(scores)[::-1]
-    keep = []
-    while len(idxs) > 0:
-        i = idxs[0]; keep.append(i)
-        if len(idxs) == 1: break
-        rest = idxs[1:]
-        mask = np.array([iou_xyxy(boxes[i], boxes[j]) < iou_thresh for j in rest])
-        idxs = rest[mask]
-    return keep
-
-def rotate_with_matrix(frame, angle_deg):
-    h, w = frame.shape[:2]
-    c = (w / 2.0, h / 2.0)
-    M = cv2.getRotationMatrix2D(c, angle_deg, 1.0)
-    invM = cv2.invertAffineTransform(M)
-    rotated = cv2.warpAffine(frame, M, (w, h), flags=cv2.INTER_LINEAR,
-                             borderMode=cv2.BORDER_CONSTANT, borderValue=(0,0,0))
-    return rotated, M, invM
-
-def apply_affine_to_points(pts, M):
-    pts_np = np.array(pts, dtype=np.float32).reshape(-1,1,2)
-    out = cv2.transform(pts_np, M)
-    return [(int(round(p[0][0])), int(round(p[0][1]))) for p in out]
-
-def map_box_back_arbitrary(x1r, y1r, x2r, y2r, invM, W, H):
-    corners_r = [(x1r, y1r), (x2r, y1r), (x2r, y2r), (x1r, y2r)]
-    corners_o = apply_affine_to_points(corners_r, invM)
-    xs = [x for x,_ in corners_o]; ys = [y for _,y in corners_o]
-    bx1, by1, bx2, by2 = int(min(xs)), int(min(ys)), int(max(xs)), int(max(ys))
-    return clamp_box(bx1, by1, bx2, by2, W, H)
-
-def detect_on_frame(model, frame_bgr, class_filter, conf, imgsz, device):
-    h, w = frame_bgr.shape[:2]
-    res = model.predict(source=frame_bgr, imgsz=imgsz, conf=conf, device=device,
-                        verbose=False, classes=class_filter)[0]
-    out = []
-    if res.boxes is None: return out
-    for b in res.boxes:
-        cls_id = int(b.cls[0]); score = float(b.conf[0])
-        x1, y1, x2, y2 = map(int, b.xyxy[0].cpu().numpy())
-        x1, y1, x2, y2 = clamp_box(x1, y1, x2, y2, w, h)
-        out.append((x1, y1, x2, y2, cls_id, score))
-    return out
-
-def detect_conditional_rotations(model, frame_bgr, class_filter, conf, imgsz, device, angles, iou_merge):
-    base = detect_on_frame(model, frame_bgr, class_filter, conf, imgsz, device)
-    if base: return base
-    H, W = frame_bgr.shape[:2]
-    all_boxes, all_scores, all_cls = [], [], []
-    for ang in angles:
-        rot, M, invM = rotate_with_matrix(frame_bgr, ang)
-        res = model.predict(source=rot, imgsz=imgsz, conf=conf, device=device,
-                            verbose=False, classes=class_filter)[0]
-        if res.boxes is None: continue
-        Hr, Wr = rot.shape[:2]
-        for b in res.boxes:
-            cls_id = int(b.cls[0]); score = float(b.conf[0])
-            xr1, yr1, xr2, yr2 = map(int, b.xyxy[0].cpu().numpy())
-            xr1, yr1, xr2, yr2 = clamp_box(xr1, yr1, xr2, yr2, Wr, Hr)
-            bx1, by1, bx2, by2 = map_box_back_arbitrary(xr1, yr1, xr2, yr2, invM, W, H)
-            all_boxes.append([bx1, by1, bx2, by2])
-            all_scores.append(score)
-            all_cls.append(cls_id)
-        if len(all_boxes) > 0:
-            break
-    if not all_boxes: return []
-    keep = nms(all_boxes, all_scores, iou_merge)
-    return [(all_boxes[i][0], all_boxes[i][1], all_boxes[i][2], all_boxes[i][3],
-             all_cls[i], float(all_scores[i])) for i in keep]
-
 # -------- mouse: click to set fixed targets --------
 fixed_bottle_px = None
 fixed_hand_px   = None
@@ -212,6 +127,8 @@ def main():
     user_in = input("Are you right- or left-handed? [r/l] (Enter for Right): ").strip().lower()
     dominant = "right" if user_in not in ("l", "left") else "left"
 
+    from ultralytics import YOLO
+    _load_mediapipe()
     model = YOLO(MODEL_PATH)
     if HALF and DEVICE != "cpu":
         try: model.fuse()
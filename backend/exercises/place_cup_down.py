@@ -0,0 +1,54 @@
+import math
+
+from exercises.kinematics import median_jerk, path_length
+
+# Test-specific thresholds
+ASSUMED_BOTTLE_HEIGHT_CM = 24.0  # for px-to-cm conversion
+ACCURACY_THRESHOLD_CM = 10.0      # maximum allowed final position error
+SMOOTHNESS_THRESHOLD = 20.0       # maximum allowed jerkiness (lower is stricter)
+MIN_MOVEMENT_DISTANCE = 50        # minimum pixels to move for valid test
+MIN_POINTS = 5                    # need more points for accurate measurement
+
+
+def euclid(a, b):
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+
+def score_place(centers, cm_per_px,
+                accuracy_threshold_cm=ACCURACY_THRESHOLD_CM,
+                smoothness_threshold=SMOOTHNESS_THRESHOLD,
+                min_movement_distance=MIN_MOVEMENT_DISTANCE):
+    """
+    Score a finished place-cup-down run from the bottle centers (first = start position).
+
+    Returns dict with keys:
+      - valid: bool (False: too few points, no scale, or not enough movement; see 'reason')
+      - total_distance_px, smoothness, accuracy_cm: float (when valid)
+      - smoothness_passed, accuracy_passed, passed: bool
+    """
+    if len(centers) <= MIN_POINTS or cm_per_px is None:
+        return {"valid": False, "reason": "not enough data", "passed": False}
+
+    # Check if bottle actually moved significantly
+    total_distance = path_length(centers)
+    if total_distance < min_movement_distance:
+        return {"valid": False, "reason": "not enough movement", "total_distance_px": total_distance,
+                "passed": False}
+
+    # Placement smoothness: median (more robust than the mean) of second-difference magnitudes
+    smoothness = median_jerk(centers)
+
+    # Final position accuracy
+    dist_cm = euclid(centers[-1], centers[0]) * cm_per_px
+
+    smoothness_passed = smoothness <= smoothness_threshold
+    accuracy_passed = dist_cm <= accuracy_threshold_cm
+    return {
+        "valid": True,
+        "total_distance_px": total_distance,
+        "smoothness": smoothness,
+        "accuracy_cm": dist_cm,
+        "smoothness_passed": smoothness_passed,
+        "accuracy_passed": accuracy_passed,
+        "passed": smoothness_passed and accuracy_passed,
+    }
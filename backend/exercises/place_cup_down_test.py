@@ -2,9 +2,11 @@ import cv2
 import time
 import numpy as np
 from collections import deque
-from ultralytics import YOLO
-import mediapipe as mp
-import math
+from exercises.runtime import ExerciseRuntime
+from exercises.place_cup_down import (
+    ASSUMED_BOTTLE_HEIGHT_CM, ACCURACY_THRESHOLD_CM, SMOOTHNESS_THRESHOLD, MIN_MOVEMENT_DISTANCE, MIN_POINTS,
+    euclid, score_place,
+)
 
 # ---------- CONFIG ----------
 MODEL_PATH   = "../yolov10b.pt"
@@ -19,10 +21,28 @@ TARGET_CLASS = "bottle"
 FPS_SMOOTH_N = 20
 
 # Test-specific constants
-ASSUMED_BOTTLE_HEIGHT_CM = 24.0  # for px-to-cm conversion
-ACCURACY_THRESHOLD_CM = 10.0      # maximum allowed final position error
-SMOOTHNESS_THRESHOLD = 20.0       # maximum allowed jerkiness (lower is stricter)
-MIN_MOVEMENT_DISTANCE = 50        # minimum pixels to move for valid test
+TRAIL_MAX_SEGMENTS = 64           # path drawn with at most this many segments
+
+def draw_trail(frame, centers, max_segments=TRAIL_MAX_SEGMENTS):
+    """Draw the path (yellow -> red, thicker toward the newest point) with a fixed per-frame cost.
+
+    Long paths are decimated to max_segments + 1 evenly spaced points (first and last
+    kept), so drawing doesn't slow down as the placement goes on; scoring still uses
+    every center.
+    """
+    n = len(centers)
+    if n < 2:
+        return
+    if n > max_segments + 1:
+        pts = [centers[i] for i in np.linspace(0, n - 1, max_segments + 1).round().astype(int)]
+    else:
+        pts = centers
+    m = len(pts)
+    for i in range(1, m):
+        intensity = int(255 * (i / m))
+        color = (0, intensity, 255 - intensity)
+        thickness = max(1, int(3 * (i / m)))
+        cv2.line(frame, pts[i-1], pts[i], color, thickness)
 
 def detect_on_frame(model, frame_bgr, conf, imgsz, device, class_filter=None):
     res = model.predict(source=frame_bgr, imgsz=imgsz, conf=conf, device=device, verbose=False, classes=class_filter)[0]
@@ -44,15 +64,13 @@ def detect_on_frame(model, frame_bgr, conf, imgsz, device, class_filter=None):
             out.append((x1, y1, x2, y2, cls_id, score))
     return out
 
-def euclid(a, b):
-    return math.hypot(a[0] - b[0], a[1] - b[1])
-
-def down():
+def down(runtime=None):
     print("📥 Place Cup Down Test")
     print("Place cup down smoothly and accurately")
     print("Press 's' to start when ready")
 
-    model = YOLO(MODEL_PATH)
+    rt = runtime or ExerciseRuntime(CAM_INDEX, FRAME_W, FRAME_H)
+    model = rt.yolo(MODEL_PATH)
     names = model.names
     class_filter = None
     if TARGET_CLASS:
@@ -60,15 +78,9 @@ def down():
         if ids:
             class_filter = ids
 
-    cap = cv2.VideoCapture(CAM_INDEX)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_W)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_H)
-    
-    if not cap.isOpened():
-        raise RuntimeError("Cannot open webcam")
+    cap = rt.camera()
 
-    mp_hands = mp.solutions.hands
-    hands = mp_hands.Hands(static_image_mode=False, max_num_hands=2)
+    hands = rt.hands(static_image_mode=False, max_num_hands=2)
 
     # Test state
     test_started = False
@@ -143,46 +155,27 @@ def down():
                     print("No bottle detected! Keep bottle in view and try again.")
             elif key == ord('p') and test_started and not test_complete:
                 # Complete test and calculate metrics
-                if len(centers) > 5 and cm_per_px is not None:  # Need more points for accurate measurement
-                    # Check if bottle actually moved significantly
-                    total_distance = 0
-                    for i in range(1, len(centers)):
-                        total_distance += euclid(centers[i-1], centers[i])
-                    
-                    if total_distance < MIN_MOVEMENT_DISTANCE:
-                        print("⚠️  Not enough movement detected! Move the bottle more during the test.")
+                if len(centers) > MIN_POINTS and cm_per_px is not None:  # Need more points for accurate measurement
+                    result = score_place(centers, cm_per_px)
+                    if not result["valid"]:
+                        print(f"⚠️  Not enough movement detected (need {MIN_MOVEMENT_DISTANCE} px)! Move the bottle more during the test.")
                         continue
-                    
-                    # Calculate placement smoothness using moving average for stability
-                    jerk_values = []
-                    for i in range(2, len(centers)):
-                        x0, y0 = centers[i-2]
-                        x1, y1 = centers[i-1]
-                        x2, y2 = centers[i]
-                        ax = (x2 - 2*x1 + x0)
-                        ay = (y2 - 2*y1 + y0)
-                        jerk_values.append(math.hypot(ax, ay))
-                    
-                    # Use median instead of mean for more robust smoothness measurement
-                    smoothness_score = np.median(jerk_values) if jerk_values else 0.0
-                    
-                    # Calculate final position accuracy
-                    final_center = centers[-1]
-                    dist_px = euclid(final_center, start_center)
-                    dist_cm = dist_px * cm_per_px
+                    total_distance = result["total_distance_px"]
+                    smoothness_score = result["smoothness"]
+                    dist_cm = result["accuracy_cm"]
                     
                     # Print results
                     print("\n===== PLACE CUP DOWN METRICS =====")
-                    print(f"Total movement: {total_distance:.1f} pixels")
+                    print(f"Total movement: {total_distance:.1f} pixels (minimum {MIN_MOVEMENT_DISTANCE})")
                     print(f"Data points collected: {len(centers)}")
                     print(f"Placement Smoothness: {smoothness_score:.3f} (lower is better, threshold: {SMOOTHNESS_THRESHOLD})")
                     print(f"Final Position Accuracy: {dist_cm:.2f} cm (threshold ≤ {ACCURACY_THRESHOLD_CM} cm)")
                     print("--------------------------------")
                     
                     # Check pass/fail criteria
-                    smoothness_passed = smoothness_score <= SMOOTHNESS_THRESHOLD
-                    accuracy_passed = dist_cm <= ACCURACY_THRESHOLD_CM
-                    passed = smoothness_passed and accuracy_passed
+                    smoothness_passed = result["smoothness_passed"]
+                    accuracy_passed = result["accuracy_passed"]
+                    passed = result["passed"]
                     
                     print(f"Smoothness: {'✅ PASSED' if smoothness_passed else '❌ FAILED'}")
                     print(f"Accuracy: {'✅ PASSED' if accuracy_passed else '❌ FAILED'}")
@@ -190,11 +183,7 @@ def down():
                     print("--------------------------------")
                     
                     test_complete = True
-                    # Clean up and return
-                    hands.close()
-                    cap.release()
-                    cv2.destroyAllWindows()
-                    return 1 if passed else 0
+                    return 1 if passed else 0  # cleanup in finally
                 else:
                     needed_points = 5 - len(centers) if len(centers) < 5 else 0
                     print(f"⚠️  Need more data points! Move the bottle more. (Need {needed_points} more points)")
@@ -216,13 +205,7 @@ def down():
             if test_started and not test_complete and current_center:
                 centers.append(current_center)
                 # Draw path with gradient colors (older = darker)
-                if len(centers) > 1:
-                    for i in range(1, len(centers)):
-                        # Color gradient from yellow to red
-                        intensity = int(255 * (i / len(centers)))
-                        color = (0, intensity, 255 - intensity)
-                        thickness = max(1, int(3 * (i / len(centers))))
-                        cv2.line(frame, centers[i-1], centers[i], color, thickness)
+                draw_trail(frame, centers)
 
             # Status display
             if not test_started and not test_complete:
@@ -269,9 +252,9 @@ def down():
             cv2.imshow(win, frame)
 
     finally:
-        hands.close()
-        cap.release()
         cv2.destroyAllWindows()
+        if runtime is None:
+            rt.close()
     
     # Return 0 if user quit without completing test
     return 0
\ No newline at end of file
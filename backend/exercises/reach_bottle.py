@@ -1,15 +1,31 @@
 import time
 import math
 
+import numpy as np
+
+from exercises.kinematics import DirectionChanges, direction_changes
+
+# Pass thresholds (shared by reach_bottle_test.py and rescore.py)
+MAX_REACH_TIME = 10.0  # seconds
+MAX_REACTION_TIME = 5.0  # seconds
+MAX_JERKS = 30
+
+TRAJECTORY_CAPACITY = 2048  # hand samples kept (~100 s at 20 Hz); older ones are dropped
+
 
 class ReachBottleMetrics:
-    def __init__(self, grasp_distance_threshold=80, movement_threshold=5):
+    def __init__(self, grasp_distance_threshold=80, movement_threshold=5, capacity=TRAJECTORY_CAPACITY):
         """
         grasp_distance_threshold: distance in pixels to consider hand "within grasp" of bottle
         movement_threshold: minimum movement (pixels) to detect start of movement
+        capacity: hand samples kept in the trajectory buffer
         """
         self.grasp_distance_threshold = grasp_distance_threshold
         self.movement_threshold = movement_threshold
+        self.capacity = capacity
+        # Mirrored ring buffer of (t, x, y): each sample is written at i and i + capacity,
+        # so the newest `capacity` samples are always one contiguous slice (no copies).
+        self._buf = np.zeros((2 * capacity, 3))
         self.reset()
 
     def reset(self):
@@ -25,9 +41,33 @@ class ReachBottleMetrics:
         self.initial_hand_pos = None
         self.last_hand_pos = None
 
-        self.hand_positions = []  # List of (x,y) tuples
+        self._head = 0  # next write slot in [0, capacity)
+        self._count = 0
         self.direction_changes = 0
-        self.prev_vector = None
+        self._turns = DirectionChanges()
+
+    # ---- trajectory buffer ---------------------------------------------------------
+    def _append(self, t, pos):
+        row = (t, pos[0], pos[1])
+        self._buf[self._head] = row
+        self._buf[self._head + self.capacity] = row
+        self._head = (self._head + 1) % self.capacity
+        self._count += 1
+
+    def _window(self):
+        n = min(self._count, self.capacity)
+        start = self._head + self.capacity - n
+        return self._buf[start:start + n]
+
+    @property
+    def hand_positions(self):
+        """(n, 2) view of the most recent hand positions, oldest first."""
+        return self._window()[:, 1:]
+
+    @property
+    def hand_times(self):
+        """(n,) view of their timestamps."""
+        return self._window()[:, 0]
 
     def update(self, current_time, hand_pos, bottle_pos):
         """
@@ -70,21 +110,11 @@ class ReachBottleMetrics:
                 self.reach_time = reach_duration
                 self.reach_completion_time = current_time
 
-        # Trajectory smoothness
-        if self.last_hand_pos is not None:
-            vec = (hand_pos[0] - self.last_hand_pos[0], hand_pos[1] - self.last_hand_pos[1])
-            norm = math.hypot(vec[0], vec[1])
-            if norm > 1e-6:
-                vec_norm = (vec[0] / norm, vec[1] / norm)
-                if self.prev_vector is not None:
-                    dot = max(min(vec_norm[0] * self.prev_vector[0] + vec_norm[1] * self.prev_vector[1], 1.0), -1.0)
-                    angle = math.acos(dot)
-                    if angle > 0.785:  # ~45 degrees
-                        self.direction_changes += 1
-                self.prev_vector = vec_norm
+        # Trajectory smoothness (O(1) per frame; direction_changes() is the batch form)
+        self.direction_changes = self._turns.update(hand_pos)
 
         self.last_hand_pos = hand_pos
-        self.hand_positions.append(hand_pos)
+        self._append(current_time, hand_pos)
 
         if not self.movement_started:
             status = 'waiting for movement'
@@ -100,8 +130,49 @@ class ReachBottleMetrics:
             'status': status,
         }
 
-    def start(self):
+    def start(self, now=None):
+        """Begin a trial; now: start-signal timestamp (frame/replay clock), default wall time."""
         self.reset()
-        self.start_signal_time = time.time()
+        self.start_signal_time = time.time() if now is None else now
 
+    def replay(self, times, hand_xy, bottle_xy):
+        """
+        Vectorized equivalent of calling update() for each frame (all hands and bottles
+        detected) until the bottle is reached; returns update()'s final result.
 
+        times: (N,) seconds since the start signal; hand_xy, bottle_xy: (N, 2) pixels
+        """
+        t = np.asarray(times, dtype=float)
+        hand = np.asarray(hand_xy, dtype=float)
+        bottle = np.asarray(bottle_xy, dtype=float)
+        res = {'reaction_time': None, 'reach_time': None, 'trajectory_smoothness': 0,
+               'status': 'waiting for detections'}
+        if not len(t):
+            return res
+        moved = np.flatnonzero(np.hypot(*(hand - hand[0]).T) > self.movement_threshold)
+        end = len(t)
+        status = 'waiting for movement'
+        if len(moved):
+            s = moved[0]
+            res['reaction_time'] = float(t[s])
+            status = 'moving toward bottle'
+            near = np.flatnonzero(np.hypot(*(hand[s:] - bottle[s:]).T) <= self.grasp_distance_threshold)
+            if len(near):
+                r = s + near[0]
+                res['reach_time'] = max(0.001, float(t[r] - t[s]))
+                status = 'reached bottle'
+                end = r + 1
+        res['trajectory_smoothness'] = direction_changes(hand[:end])
+        res['status'] = status
+        return res
+
+
+def reach_passed(result, max_reach_time=MAX_REACH_TIME, max_reaction_time=MAX_REACTION_TIME, max_jerks=MAX_JERKS):
+    """Pass/fail for a ReachBottleMetrics.update() result once the bottle was reached."""
+    if result.get('reach_time') is None or result.get('reaction_time') is None:
+        return False
+    return (
+        result['reach_time'] <= max_reach_time and
+        result['reaction_time'] <= max_reaction_time and
+        result['trajectory_smoothness'] <= max_jerks
+    )
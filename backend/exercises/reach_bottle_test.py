@@ -3,12 +3,14 @@
 
 import cv2
 import time
-import numpy as np
 from collections import deque
-from ultralytics import YOLO
 import mediapipe as mp
 import math
-from exercises.reach_bottle import ReachBottleMetrics
+from exercises.detection import detect_conditional_rotations
+from exercises.runtime import ExerciseRuntime
+from exercises.reach_bottle import (
+    ReachBottleMetrics, MAX_REACH_TIME, MAX_REACTION_TIME, MAX_JERKS, reach_passed as _reach_passed,
+)
 
 # ---------- CONFIG ----------
 MODEL_PATH   = "../yolov10b.pt"  # or yolov8n/s/m/l/x.pt
@@ -31,10 +33,7 @@ REACH_GRASP_DISTANCE = 80  # pixels to consider hand "within grasp" of bottle
 REACH_MOVEMENT_THRESHOLD = 5  # minimum movement (pixels) to detect start of movement
 # ----------------------------
 
-# Add constants at top
-MAX_REACH_TIME = 10.0  # seconds
-MAX_REACTION_TIME = 5.0  # seconds
-MAX_JERKS = 30
+# Pass thresholds (MAX_REACH_TIME, MAX_REACTION_TIME, MAX_JERKS) live in exercises/reach_bottle.py
 
 # --- OpenCV runtime opts ---
 cv2.setUseOptimized(True)
@@ -52,116 +51,8 @@ def to_pixels(landmark, width, height):
 def euclid(a, b):
     return math.hypot(a[0] - b[0], a[1] - b[1])
 
-# ---------- geometry helpers ----------
-def clamp_box(x1, y1, x2, y2, w, h):
-    x1 = max(0, min(w-1, x1)); y1 = max(0, min(h-1, y1))
-    x2 = max(0, min(w-1, x2)); y2 = max(0, min(h-1, y2))
-    if x2 < x1: x1, x2 = x2, x1
-    if y2 < y1: y1, y2 = y2, y1
-    return x1, y1, x2, y2
-
-def iou_xyxy(a, b):
-    ax1, ay1, ax2, ay2 = a
-    bx1, by1, bx2, by2 = b
-    iw = max(0, min(ax2, bx2) - max(ax1, bx1))
-    ih = max(0, min(ay2, by2) - max(ay1, by1))
-    inter = iw * ih
-    if inter <= 0: return 0.0
-    area_a = max(0, (ax2 - ax1) * (ay2 - ay1))
-    area_b = max(0, (bx2 - bx1) * (by2 - by1))
-    return inter / float(area_a + area_b - inter + 1e-6)
-
-def nms(boxes, scores, iou_thresh=0.5):
-    if len(boxes) == 0: return []
-    boxes = np.array(boxes, dtype=np.float32)
-    scores = np.array(scores, dtype=np.float32)
-    idxs = np.argsort(scores)[::-1]
-    keep = []
-    while len(idxs) > 0:
-        i = idxs[0]; keep.append(i)
-        if len(idxs) == 1: break
-        rest = idxs[1:]
-        mask = np.array([iou_xyxy(boxes[i], boxes[j]) < iou_thresh for j in rest])
-        idxs = rest[mask]
-    return keep
-
-# ---------- rotation helpers (any angle) ----------
-def rotate_with_matrix(frame, angle_deg):
-    h, w = frame.shape[:2]
-    c = (w / 2.0, h / 2.0)
-    M = cv2.getRotationMatrix2D(c, angle_deg, 1.0)
-    invM = cv2.invertAffineTransform(M)
-    rotated = cv2.warpAffine(frame, M, (w, h), flags=cv2.INTER_LINEAR,
-                             borderMode=cv2.BORDER_CONSTANT, borderValue=(0,0,0))
-    return rotated, M, invM
-
-def apply_affine_to_points(pts, M):
-    pts_np = np.array(pts, dtype=np.float32).reshape(-1,1,2)
-    out = cv2.transform(pts_np, M)  # (N,1,2)
-    return [(int(round(p[0][0])), int(round(p[0][1]))) for p in out]
-
-def map_box_back_arbitrary(x1r, y1r, x2r, y2r, invM, W, H):
-    corners_r = [(x1r, y1r), (x2r, y1r), (x2r, y2r), (x1r, y2r)]
-    corners_o = apply_affine_to_points(corners_r, invM)
-    xs = [x for x,_ in corners_o]; ys = [y for _,y in corners_o]
-    bx1, by1, bx2, by2 = int(min(xs)), int(min(ys)), int(max(xs)), int(max(ys))
-    return clamp_box(bx1, by1, bx2, by2, W, H)
-
-# ---------- detection ----------
-def detect_on_frame(model, frame_bgr, conf, imgsz, device, class_filter=None):
-    """Returns list of (x1,y1,x2,y2, cls_id, score)."""
-    h, w = frame_bgr.shape[:2]
-    res = model.predict(
-        source=frame_bgr, imgsz=imgsz, conf=conf, device=device,
-        verbose=False, classes=class_filter
-        )[0]
-    out = []
-    if res.boxes is None: return out
-    for b in res.boxes:
-        cls_id = int(b.cls[0]); score = float(b.conf[0])
-        x1, y1, x2, y2 = map(int, b.xyxy[0].cpu().numpy())
-        x1, y1, x2, y2 = clamp_box(x1, y1, x2, y2, w, h)
-        out.append((x1, y1, x2, y2, cls_id, score))
-    return out
-
-def detect_conditional_rotations(model, frame_bgr, conf, imgsz, device, angles, iou_merge, class_filter=None):
-    """Try 0° first, else fallback angles; map boxes back; NMS merge if needed."""
-    H, W = frame_bgr.shape[:2]
-
-    base = detect_on_frame(model, frame_bgr, conf, imgsz, device, class_filter)
-    if base:
-        return base
-
-    all_boxes, all_scores, all_cls = [], [], []
-    for ang in angles:
-        rot, M, invM = rotate_with_matrix(frame_bgr, ang)
-        res = model.predict(
-            source=rot, imgsz=imgsz, conf=conf, device=device,
-            verbose=False, classes=class_filter
-        )[0]
-        if res.boxes is None:
-            continue
-        Hr, Wr = rot.shape[:2]
-        for b in res.boxes:
-            cls_id = int(b.cls[0]); score = float(b.conf[0])
-            xr1, yr1, xr2, yr2 = map(int, b.xyxy[0].cpu().numpy())
-            xr1, yr1, xr2, yr2 = clamp_box(xr1, yr1, xr2, yr2, Wr, Hr)
-            bx1, by1, bx2, by2 = map_box_back_arbitrary(xr1, yr1, xr2, yr2, invM, W, H)
-            all_boxes.append([bx1, by1, bx2, by2])
-            all_scores.append(score)
-            all_cls.append(cls_id)
-
-        if len(all_boxes) > 0:
-            break
-
-    if not all_boxes:
-        return []
-    keep = nms(all_boxes, all_scores, iou_merge)
-    return [(all_boxes[i][0], all_boxes[i][1], all_boxes[i][2], all_boxes[i][3],
-             all_cls[i], float(all_scores[i])) for i in keep]
-
 # ---------- main ----------
-def reach_test(hand = 'r', taggle = 'fixed'):
+def reach_test(hand = 'r', taggle = 'fixed', runtime=None):
     print("🎯 REACH BOTTLE TEST - STANDALONE EXERCISE 🎯")
     print("=" * 50)
     print("Instructions:")
@@ -176,8 +67,9 @@ def reach_test(hand = 'r', taggle = 'fixed'):
     # Optional shared config from env
     env_dom = hand
     selected_hand_label = 'Left' if env_dom not in ("l", "left") else 'Right'
-    # Load YOLO
-    model = YOLO(MODEL_PATH)
+    # Models + camera: the launcher's shared runtime, or a private one (exercises/runtime.py)
+    rt = runtime or ExerciseRuntime(CAM_INDEX, FRAME_W, FRAME_H)
+    model = rt.yolo(MODEL_PATH)
     if HALF and DEVICE != "cpu":
         try:
             model.fuse()
@@ -194,16 +86,10 @@ def reach_test(hand = 'r', taggle = 'fixed'):
             print(f'WARNING: class "{TARGET_CLASS}" not in model; running with all classes.')
             
     # Webcam (low-latency settings)
-    cap = cv2.VideoCapture(CAM_INDEX)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_W)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_H)
-    cap.set(cv2.CAP_PROP_FPS, 30)
-    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-    if not cap.isOpened():
-        raise RuntimeError("Cannot open webcam")
+    cap = rt.camera()
 
     # MediaPipe (lighter configs)
-    hands = mp_hands.Hands(
+    hands = rt.hands(
         static_image_mode=False, max_num_hands=2, model_complexity=0,
         min_detection_confidence=0.5, min_tracking_confidence=0.5
     )
@@ -312,11 +198,7 @@ def reach_test(hand = 'r', taggle = 'fixed'):
                 # Print results when reach is completed
                 if metrics_result['status'] == 'reached bottle' and metrics_result['reach_time'] is not None:
                     # Calculate pass/fail
-                    reach_passed = (
-                        metrics_result['reach_time'] <= MAX_REACH_TIME and
-                        metrics_result['reaction_time'] <= MAX_REACTION_TIME and
-                        metrics_result['trajectory_smoothness'] <= MAX_JERKS
-                    )
+                    reach_passed = _reach_passed(metrics_result)
                     
                     print(f"\n{'='*60}")
                     print(f"{'✅ PASSED' if reach_passed else '❌ FAILED'} 🎯")
@@ -381,8 +263,9 @@ def reach_test(hand = 'r', taggle = 'fixed'):
                 break
 
     finally:
-        hands.close()
-        cap.release(); cv2.destroyAllWindows()
+        cv2.destroyAllWindows()
+        if runtime is None:
+            rt.close()
         print("\n👋 Reach Bottle Test completed. Goodbye!")
 
 # if __name__ == "__main__":
@@ -0,0 +1,77 @@
+"""
+Warm models and an open camera shared by the launcher's exercises.
+
+Each exercise (reach_test, grab_test, lift, hold, dump, down) takes an optional
+`runtime`. The launcher (app_cv.py) creates one ExerciseRuntime for the whole session
+and passes it to every exercise, so moving to the next exercise reuses the loaded YOLO
+weights, MediaPipe graphs and the open VideoCapture instead of rebuilding them. Called
+without one (standalone), an exercise makes a private runtime and closes it on return.
+
+Models come from model_registry (keyed by weights / graph configuration), so two
+exercises asking for the same Hands settings get the same instance.
+"""
+from model_registry import models
+
+CAM_INDEX = 0
+FRAME_W = 1280
+FRAME_H = 720
+
+
+class ExerciseRuntime:
+    def __init__(self, cam_index=CAM_INDEX, frame_w=FRAME_W, frame_h=FRAME_H, registry=models):
+        self.cam_index = cam_index
+        self.frame_w = frame_w
+        self.frame_h = frame_h
+        self.registry = registry
+        self.cap = None
+        self._handles = {}  # (kind, config) -> registry handle held for the session
+
+    # ---- models ----------------------------------------------------------------
+    def _get(self, kind, **config):
+        key = (kind,) + tuple(sorted(config.items()))
+        h = self._handles.get(key)
+        if h is None:
+            h = self._handles[key] = self.registry.acquire(kind, **config)
+        return h.obj
+
+    def yolo(self, weights):
+        return self._get("yolo", weights=weights)
+
+    def hands(self, **cfg):
+        return self._get("hands", **cfg)
+
+    def pose(self, **cfg):
+        return self._get("pose", **cfg)
+
+    def face_mesh(self, **cfg):
+        return self._get("face_mesh", **cfg)
+
+    # ---- camera ----------------------------------------------------------------
+    def camera(self):
+        """The session's VideoCapture (low-latency settings), opened on first use."""
+        if self.cap is None or not self.cap.isOpened():
+            import cv2  # not at module level: the launcher imports this before its menu
+            cap = cv2.VideoCapture(self.cam_index)
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_w)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_h)
+            cap.set(cv2.CAP_PROP_FPS, 30)
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            if not cap.isOpened():
+                raise RuntimeError("Cannot open webcam")
+            self.cap = cap
+        return self.cap
+
+    def close(self):
+        """Release the camera and hand the models back to the registry."""
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        for h in self._handles.values():
+            h.release()
+        self._handles.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,95 @@
+# Import-time profile of the entry points, from `python -X importtime` in a fresh
+# interpreter per module (nothing already sitting in sys.modules).
+#
+#   python import_profile.py                          # app, app_cv, evaluators, task_evaluators
+#   python import_profile.py app app_cv --top 15 [--max-ms 1500] [--json]
+#
+# Per module: total import time, which of the HEAVY packages it pulled in (with their
+# cumulative cost) and its slowest direct imports. The vision stack is meant to load on
+# demand (first exercise / task / warm-up), so HEAVY showing up here is a regression;
+# --max-ms exits non-zero when a module goes over budget, for kiosk images / CI.
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Tuple
+
+DEFAULT_MODULES = ("app", "app_cv", "evaluators", "task_evaluators")
+HEAVY = ("torch", "ultralytics", "mediapipe", "cv2")
+
+Row = Tuple[int, str, int, int]  # depth, module, self us, cumulative us
+
+
+def parse_importtime(stderr: str) -> List[Row]:
+    """-X importtime output -> rows in print order (children before their parent)."""
+    rows: List[Row] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((depth, name.strip(), int(self_us), int(cum_us)))
+    return rows
+
+
+def _subtree(rows: List[Row], module: str) -> Tuple[Row, List[Row]]:
+    """The row for `import module` and everything it imported."""
+    end = max(i for i, r in enumerate(rows) if r[0] == 0 and r[1] == module)
+    start = end
+    while start > 0 and rows[start - 1][0] > 0:
+        start -= 1
+    return rows[end], rows[start:end]
+
+
+def profile(module: str, top: int = 10) -> Dict[str, Any]:
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    rows = parse_importtime(proc.stderr)
+    if proc.returncode != 0 or not any(r[0] == 0 and r[1] == module for r in rows):
+        err = [l for l in proc.stderr.splitlines() if not l.startswith("import time:")]
+        return {"module": module, "error": err[-1] if err else f"exit {proc.returncode}"}
+    root, sub = _subtree(rows, module)
+    heavy = {}
+    for _, name, _, cum in sub:
+        if name in HEAVY:
+            heavy[name] = max(heavy.get(name, 0), cum) / 1000.0
+    direct = sorted((r for r in sub if r[0] == 1), key=lambda r: -r[3])[:top]
+    return {
+        "module": module,
+        "total_ms": root[3] / 1000.0,
+        "heavy_ms": heavy,
+        "slowest": [{"module": name, "ms": cum / 1000.0} for _, name, _, cum in direct],
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Import-time profile of the app entry points.")
+    ap.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES))
+    ap.add_argument("--top", type=int, default=10, help="slowest direct imports to list")
+    ap.add_argument("--max-ms", type=float, default=0.0, help="fail if a module takes longer")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args(argv)
+
+    results = [profile(m, args.top) for m in args.modules]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            if "error" in r:
+                print(f"{r['module']:<24} ERROR {r['error']}")
+                continue
+            heavy = ", ".join(f"{k} {v:.0f} ms" for k, v in r["heavy_ms"].items()) or "none"
+            print(f"{r['module']:<24} {r['total_ms']:8.0f} ms   heavy: {heavy}")
+            for s in r["slowest"]:
+                print(f"    {s['module']:<36} {s['ms']:8.1f} ms")
+    over = [r["module"] for r in results
+            if "error" in r or (args.max_ms and r["total_ms"] > args.max_ms)]
+    if args.max_ms and over:
+        print(f"[WARN] over {args.max_ms:.0f} ms (or failed): {', '.join(over)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+# Compact binary encoding for the /ws live payload.
+#
+# Clients that offer the LIVE_SUBPROTOCOL get a keyframe first and then deltas
+# holding only the fields that changed since the last frame sent to *them*.
+#
+# Frame layout (little-endian):
+#   u8  kind        KIND_KEYFRAME | KIND_DELTA
+#   u8  mask        bit per field in FIELDS order
+#   ... fields whose bit is set, in FIELDS order:
+#   ts          keyframe: f64 epoch seconds (base); delta: u32 ms since base
+#   count       u8
+#   detections  u8 n, then n * (u16 x, u16 y, u16 w, u16 h)
+#   active_task u8 index into TASKS (NONE_U8 = null)
+#   progress    u8 0..PROGRESS_STEPS (NONE_U8 = null)
+#   passed      u8 0/1
+#   event       u8 index into EVENTS (NONE_U8 = null)
+#   task        u8 index into TASKS (NONE_U8 = null)
+#
+# Keep in sync with src/lib/live.ts.
+import struct
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+LIVE_SUBPROTOCOL = "rehab.live.v1"
+
+KIND_KEYFRAME = 0x4B  # 'K'
+KIND_DELTA = 0x44     # 'D'
+
+FIELDS = ("ts", "count", "detections", "active_task", "progress", "passed", "event", "task")
+TASKS = ("reach_bottle", "grab_hold", "lift_to_mouth", "hold_at_mouth", "dump_into_mouth", "place_cup_down")
+EVENTS = ("task_passed",)
+
+NONE_U8 = 0xFF
+PROGRESS_STEPS = 200  # 0.5% resolution
+
+_TASK_IDX = {t: i for i, t in enumerate(TASKS)}
+_EVENT_IDX = {e: i for i, e in enumerate(EVENTS)}
+
+
+def quantize_progress(p) -> int:
+    if p is None:
+        return NONE_U8
+    try:
+        p = float(p)
+    except (TypeError, ValueError):
+        return NONE_U8
+    return int(round(max(0.0, min(1.0, p)) * PROGRESS_STEPS))
+
+
+def _ts_seconds(ts) -> float:
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    try:
+        dt = datetime.fromisoformat(str(ts))
+    except ValueError:
+        return datetime.now(timezone.utc).timestamp()
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)  # the server stamps utcnow()
+    return dt.timestamp()
+
+
+def _u16(v) -> int:
+    return max(0, min(0xFFFF, int(v)))
+
+
+def _normalize(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a payload to the comparable wire values (absent keys → null)."""
+    dets = []
+    for d in payload.get("detections") or []:
+        if hasattr(d, "dict"):
+            d = d.dict()
+        dets.append((_u16(d["x"]), _u16(d["y"]), _u16(d["w"]), _u16(d["h"])))
+    return {
+        "ts": _ts_seconds(payload.get("ts")) if payload.get("ts") is not None else None,
+        "count": max(0, min(0xFF, int(payload.get("count") or 0))),
+        "detections": tuple(dets[:0xFF]),
+        "active_task": _TASK_IDX.get(payload.get("active_task"), NONE_U8),
+        "progress": quantize_progress(payload.get("progress")),
+        "passed": 1 if payload.get("passed") else 0,
+        "event": _EVENT_IDX.get(payload.get("event"), NONE_U8),
+        "task": _TASK_IDX.get(payload.get("task"), NONE_U8),
+    }
+
+
+class DeltaEncoder:
+    """Per-connection encoder; remembers what this client has already seen."""
+
+    def __init__(self):
+        self.base_ts: Optional[float] = None
+        self.last: Optional[Dict[str, Any]] = None
+
+    def reset(self):
+        self.base_ts = None
+        self.last = None
+
+    def encode(self, payload: Dict[str, Any], force: bool = False) -> Optional[bytes]:
+        """Return the next frame, or None when nothing visible changed.
+
+        force=True always emits a frame (a ts-only delta when nothing else changed),
+        which serves as the heartbeat.
+        """
+        cur = _normalize(payload)
+        if cur["ts"] is None:
+            cur["ts"] = self.last["ts"] if self.last else datetime.now(timezone.utc).timestamp()
+
+        keyframe = self.last is None
+        if not keyframe:
+            # u32 ms covers ~49 days; re-key well before that or if the clock steps back
+            off = cur["ts"] - self.base_ts
+            keyframe = off < 0 or off > 86400.0
+        if keyframe:
+            self.base_ts = cur["ts"]
+            changed = FIELDS
+        else:
+            changed = [f for f in FIELDS if f != "ts" and cur[f] != self.last[f]]
+            if not changed and not force:
+                return None
+            changed = ["ts"] + changed
+
+        mask = 0
+        parts = [b""]
+        for bit, f in enumerate(FIELDS):
+            if f not in changed:
+                continue
+            mask |= 1 << bit
+            v = cur[f]
+            if f == "ts":
+                if keyframe:
+                    parts.append(struct.pack("<d", self.base_ts))
+                else:
+                    parts.append(struct.pack("<I", int(round((v - self.base_ts) * 1000.0))))
+            elif f == "detections":
+                parts.append(struct.pack("<B", len(v)))
+                for box in v:
+                    parts.append(struct.pack("<4H", *box))
+            else:
+                parts.append(struct.pack("<B", v))
+        parts[0] = struct.pack("<BB", KIND_KEYFRAME if keyframe else KIND_DELTA, mask)
+        self.last = cur
+        return b"".join(parts)
@@ -0,0 +1,132 @@
+# Change-driven live-state publisher for /ws.
+#
+# The capture loop hands every frame's payload to update(), which only stores
+# it. A separate task sends the latest state when it changed meaningfully
+# (task switch, pass event, detections, progress moved by >= progress_step),
+# at most once per min_interval_s (bursts coalesce into one send), plus a
+# heartbeat every heartbeat_s so idle clients still see a fresh ts.
+import asyncio
+import json
+import time
+from typing import Any, Dict, Optional, Set
+
+from fastapi import WebSocket
+
+from live_codec import DeltaEncoder
+
+_DISCRETE = ("active_task", "task", "event", "passed", "count", "detections")
+
+
+class LivePublisher:
+    def __init__(self, progress_step=0.02, heartbeat_s=1.0, min_interval_s=0.1):
+        self.progress_step = progress_step
+        self.heartbeat_s = heartbeat_s
+        self.min_interval_s = min_interval_s
+
+        self.subscribers: Set[WebSocket] = set()
+        self.encoders: Dict[WebSocket, DeltaEncoder] = {}  # binary-protocol clients
+        self.latest: Optional[Dict[str, Any]] = None
+        self._sent: Optional[Dict[str, Any]] = None
+        self._last_send = 0.0
+        self._wake: Optional[asyncio.Event] = None
+        self._running = False
+
+        self.n_updates = 0
+        self.n_sends = 0
+
+    # ---- capture side -------------------------------------------------------
+    def update(self, payload: Dict[str, Any]):
+        """Record the newest state; never blocks on the network."""
+        self.latest = payload
+        self.n_updates += 1
+        if self._wake is not None and self._significant(payload):
+            self._wake.set()
+
+    def _significant(self, payload: Dict[str, Any]) -> bool:
+        prev = self._sent
+        if prev is None:
+            return True
+        for k in _DISCRETE:
+            if payload.get(k) != prev.get(k):
+                return True
+        p, q = payload.get("progress"), prev.get("progress")
+        if (p is None) != (q is None):
+            return True
+        if p is None:
+            return False
+        p, q = float(p), float(q)
+        if abs(p - q) >= self.progress_step:
+            return True
+        # always deliver the endpoints (the frontend treats >= 0.999 as done)
+        return (p >= 0.999) != (q >= 0.999) or (p <= 0.0) != (q <= 0.0)
+
+    # ---- subscribers ----------------------------------------------------------
+    async def add(self, ws: WebSocket, binary: bool = False):
+        if binary:
+            self.encoders[ws] = DeltaEncoder()
+        self.subscribers.add(ws)
+        if self._sent is not None:
+            # bring the newcomer up to date right away (keyframe for binary clients)
+            await self._send_one(ws, self._sent, None, force=True)
+
+    def remove(self, ws: WebSocket):
+        self.subscribers.discard(ws)
+        self.encoders.pop(ws, None)
+
+    async def _send_one(self, ws: WebSocket, payload, text: Optional[str], force=False) -> bool:
+        try:
+            enc = self.encoders.get(ws)
+            if enc is not None:
+                frame = enc.encode(payload, force=force)
+                if frame is not None:
+                    await ws.send_bytes(frame)
+            else:
+                await ws.send_text(text if text is not None else json.dumps(payload))
+            return True
+        except Exception:
+            return False
+
+    async def broadcast(self, payload: Dict[str, Any], force=False):
+        text = json.dumps(payload) if len(self.encoders) < len(self.subscribers) else None
+        dead = [ws for ws in list(self.subscribers)
+                if not await self._send_one(ws, payload, text, force=force)]
+        for ws in dead:
+            self.remove(ws)
+        self.n_sends += 1
+
+    # ---- publishing task ------------------------------------------------------
+    async def run(self):
+        self._wake = asyncio.Event()
+        self._running = True
+        while self._running:
+            # nothing to send yet (camera still opening, or none): sleep until update()
+            wait = (None if self.latest is None
+                    else max(0.0, self.heartbeat_s - (time.monotonic() - self._last_send)))
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self.latest is None:
+                continue
+            heartbeat = (time.monotonic() - self._last_send) >= self.heartbeat_s
+            if heartbeat or self._significant(self.latest):
+                payload = self.latest
+                self._sent = payload
+                self._last_send = time.monotonic()
+                await self.broadcast(payload, force=heartbeat)
+            # coalesce: anything arriving during this pause goes out as one send
+            await asyncio.sleep(self.min_interval_s)
+
+    def stop(self):
+        self._running = False
+        if self._wake is not None:
+            self._wake.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self.subscribers),
+            "binary_subscribers": len(self.encoders),
+            "updates": self.n_updates,
+            "sends": self.n_sends,
+        }
@@ -0,0 +1,185 @@
+# Process-wide registry of loaded vision models (YOLO, MediaPipe graphs).
+#
+# Everything that needs a detector asks the registry instead of constructing its own:
+#
+#   h = models.acquire("hands", max_num_hands=2, model_complexity=0, ...)
+#   with h as hands:                # the handle's lock: one caller at a time per instance
+#       res = hands.process(img_rgb)
+#   h.release()                     # when the evaluator is done with it
+#
+# Instances are keyed by kind + configuration, so two evaluators asking for the same
+# YOLO weights or the same Hands settings share one instance, and a task switch (old
+# evaluator releases, new one acquires) finds it still loaded. Unreferenced instances
+# stay warm for MODEL_IDLE_EVICT_S and are closed on the next acquire/release/evict
+# after that, so memory tracks what is in use rather than how many evaluators were built.
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple
+
+MODEL_IDLE_EVICT_S = float(os.getenv("MODEL_IDLE_EVICT_S", "300"))
+
+
+# ---- factories: kind -> (build(**config), close(obj)) ---------------------------
+def _yolo(weights: str):
+    from ultralytics import YOLO
+    return YOLO(weights)
+
+
+def _hands(**cfg):
+    import mediapipe as mp
+    return mp.solutions.hands.Hands(**cfg)
+
+
+def _pose(**cfg):
+    import mediapipe as mp
+    return mp.solutions.pose.Pose(**cfg)
+
+
+def _face_mesh(**cfg):
+    import mediapipe as mp
+    return mp.solutions.face_mesh.FaceMesh(**cfg)
+
+
+def _close(obj):
+    close = getattr(obj, "close", None)
+    if close is not None:
+        close()
+
+
+FACTORIES: Dict[str, Tuple[Callable[..., Any], Callable[[Any], None]]] = {
+    "yolo": (_yolo, lambda m: None),
+    "hands": (_hands, _close),
+    "pose": (_pose, _close),
+    "face_mesh": (_face_mesh, _close),
+}
+
+
+class _Entry:
+    def __init__(self, key):
+        self.key = key
+        self.obj = None
+        self.error = None
+        self.refs = 0
+        self.idle_since = None
+        self.ready = threading.Event()  # set once built (or failed)
+        self.lock = threading.RLock()   # held while the model is being called
+
+
+class ModelHandle:
+    """A reference to a shared instance. `with handle as obj:` serializes calls into it."""
+
+    def __init__(self, registry: "ModelRegistry", entry: _Entry):
+        self._registry = registry
+        self._entry = entry
+        self.released = False
+
+    @property
+    def obj(self):
+        return self._entry.obj
+
+    @property
+    def key(self):
+        return self._entry.key
+
+    def __enter__(self):
+        self._entry.lock.acquire()
+        return self._entry.obj
+
+    def __exit__(self, *exc):
+        self._entry.lock.release()
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self._registry._release(self._entry)
+
+
+class ModelRegistry:
+    def __init__(self, idle_evict_s: float = MODEL_IDLE_EVICT_S, factories=FACTORIES):
+        self.idle_evict_s = idle_evict_s
+        self.factories = factories
+        self._entries: Dict[tuple, _Entry] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(kind: str, config: Dict[str, Any]) -> tuple:
+        return (kind,) + tuple(sorted(config.items()))
+
+    def acquire(self, kind: str, **config) -> ModelHandle:
+        """Shared instance of `kind` built with `config` (loaded on first use). Raises what
+        the factory raised if it can't be built; the failure isn't cached."""
+        build, _ = self.factories[kind]
+        key = self._key(kind, config)
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            entry = self._entries.get(key)
+            owner = entry is None
+            if owner:
+                entry = self._entries[key] = _Entry(key)
+            entry.refs += 1
+            entry.idle_since = None
+        if owner:
+            # build outside the registry lock: loading YOLO takes seconds and other
+            # kinds/configs shouldn't wait for it; same-key callers wait on ready
+            try:
+                entry.obj = build(**config)
+                self.loads += 1
+            except Exception as e:
+                entry.error = e
+                with self._lock:
+                    self._entries.pop(key, None)
+            entry.ready.set()
+        else:
+            entry.ready.wait()
+            self.hits += 1
+        if entry.error is not None:
+            raise entry.error
+        return ModelHandle(self, entry)
+
+    def _release(self, entry: _Entry):
+        with self._lock:
+            entry.refs -= 1
+            if entry.refs <= 0:
+                entry.refs = 0
+                entry.idle_since = time.monotonic()
+            self._evict_idle(time.monotonic())
+
+    def _evict_idle(self, now: float):
+        # caller holds self._lock
+        for key, e in list(self._entries.items()):
+            if e.refs == 0 and e.idle_since is not None and now - e.idle_since >= self.idle_evict_s:
+                del self._entries[key]
+                self._close(e)
+
+    def _close(self, e: _Entry):
+        self.evictions += 1
+        try:
+            with e.lock:
+                self.factories[e.key[0]][1](e.obj)
+        except Exception as ex:
+            print(f"[WARN] closing model {e.key[0]} failed: {ex}")
+
+    def evict_idle(self):
+        with self._lock:
+            self._evict_idle(time.monotonic())
+
+    def close_all(self):
+        """Close every instance, referenced or not (shutdown)."""
+        with self._lock:
+            entries, self._entries = list(self._entries.values()), {}
+        for e in entries:
+            if e.ready.is_set() and e.error is None:
+                self._close(e)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            live = [{"kind": e.key[0], "refs": e.refs, "idle": e.refs == 0} for e in self._entries.values()]
+        return {"instances": live, "loads": self.loads, "hits": self.hits, "evictions": self.evictions,
+                "idle_evict_s": self.idle_evict_s}
+
+
+models = ModelRegistry()
@@ -1,10 +1,96 @@
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 from typing import Optional
 from datetime import datetime
 
 class Event(SQLModel, table=True):
+    # (filter, ts) composites serve /metrics keyset pages newest-first
+    __table_args__ = (
+        Index("ix_event_ts", "ts"),
+        Index("ix_event_session_ts", "session_id", "ts"),
+        Index("ix_event_type_ts", "type", "ts"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     session_id: str
     ts: datetime
     type: str
-    value_json: str
\ No newline at end of file
+    # typed hot-path fields for "tick" rows (no JSON on write or read)
+    progress: Optional[float] = None
+    passed: Optional[bool] = None
+    fps: Optional[float] = None
+    # free-form payload for other event types
+    value_json: Optional[str] = None
+
+class Attempt(SQLModel, table=True):
+    """One try at a task, from activation until pass or task switch."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    session_id: str
+    patient_id: Optional[str] = None  # from /session-config
+    task: str
+    started_at: datetime
+    ended_at: Optional[datetime] = None
+    passed: bool = False
+    duration_s: Optional[float] = None
+    trajectory_path: Optional[str] = None  # trajectory.py recording of the attempt, if any
+
+class AttemptMetric(SQLModel, table=True):
+    """Evaluator result for an attempt, e.g. reach_time, stability_std_px, jerks.
+
+    scoring tells results apart: "live" for the evaluator at capture time, or the
+    label of a rescore.py run over the stored trajectory.
+    """
+    id: Optional[int] = Field(default=None, primary_key=True)
+    attempt_id: int = Field(foreign_key="attempt.id", index=True)
+    name: str
+    value: float
+    scoring: str = "live"
+
+class TickRollup(SQLModel, table=True):
+    """Compacted tick telemetry: one row per session per bucket (1 s or 60 s).
+
+    Per field: non-null count, min, max and sum, so buckets merge by addition
+    and means stay exact when re-rolled into coarser buckets.
+    """
+    __table_args__ = (
+        Index("ux_tickrollup_bucket", "session_id", "bucket_s", "bucket_start", unique=True),
+        Index("ix_tickrollup_start", "bucket_s", "bucket_start"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    session_id: str
+    bucket_s: int
+    bucket_start: datetime
+    n: int = 0
+    progress_n: int = 0
+    progress_min: Optional[float] = None
+    progress_max: Optional[float] = None
+    progress_sum: float = 0.0
+    passed_n: int = 0
+    passed_min: Optional[float] = None
+    passed_max: Optional[float] = None
+    passed_sum: float = 0.0
+    fps_n: int = 0
+    fps_min: Optional[float] = None
+    fps_max: Optional[float] = None
+    fps_sum: float = 0.0
+
+class PatientTaskSummary(SQLModel, table=True):
+    """Running per-patient, per-task progress, updated with each recorded Attempt.
+
+    Times are attempt durations of passed attempts. recent_times_json keeps the last
+    SUMMARY_WINDOW of them for the median; the ewma_* fields weight recent attempts
+    (db.SUMMARY_EWMA_ALPHA) so trend = ewma_pass_rate - pass_rate.
+    """
+    __table_args__ = (
+        Index("ux_summary_patient_task", "patient_id", "task", unique=True),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    patient_id: str
+    task: str
+    attempts: int = 0
+    passes: int = 0
+    best_time_s: Optional[float] = None
+    median_time_s: Optional[float] = None
+    recent_times_json: str = "[]"
+    ewma_pass_rate: Optional[float] = None
+    ewma_time_s: Optional[float] = None
+    last_attempt_at: Optional[datetime] = None
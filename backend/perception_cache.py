@@ -0,0 +1,198 @@
+# Content-addressed on-disk cache of per-frame perception (YOLO box + MediaPipe
+# hands/mouth/ears) for recorded videos, so offline scoring and benchmarks only
+# pay for inference once per video and model config.
+#
+# Layout:  PERCEPTION_CACHE_DIR/<video sha256>/<config fingerprint>/<shard>.npy
+# A shard holds PERCEPTION_SHARD_FRAMES consecutive frames as trajectory.RECORD
+# rows (same fixed-size layout as the attempt recordings); FLAG_CACHED marks the
+# frames that were actually computed. Shards are the unit of LRU eviction: reads
+# touch the file's mtime, and evict() removes the stalest until the cache fits
+# PERCEPTION_CACHE_MAX_MB.
+#
+#   python perception_cache.py warm video.mp4     # run the app's models once, fill the cache
+#   python perception_cache.py stats
+import hashlib
+import json
+import os
+import sys
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from trajectory import RECORD, fill_record, record_perception
+
+PERCEPTION_CACHE_DIR    = os.getenv("PERCEPTION_CACHE_DIR", "./perception_cache")
+PERCEPTION_CACHE_MAX_MB = float(os.getenv("PERCEPTION_CACHE_MAX_MB", "2048"))
+PERCEPTION_SHARD_FRAMES = int(os.getenv("PERCEPTION_SHARD_FRAMES", "512"))
+
+FLAG_CACHED = 1 << 7  # trajectory.py uses bits 0..5
+
+_HASH_CHUNK = 1 << 20
+_hash_memo: Dict[Tuple[str, int, int], str] = {}
+
+
+def video_hash(path: str) -> str:
+    """sha256 of the file bytes (memoized per path/size/mtime for this process)."""
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    h = _hash_memo.get(key)
+    if h is None:
+        d = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+                d.update(chunk)
+        h = _hash_memo[key] = d.hexdigest()
+    return h
+
+
+def fingerprint(config: Dict[str, Any]) -> str:
+    """Short stable id for a model/config dict (weights, imgsz, conf, MediaPipe options...)."""
+    raw = json.dumps(config, sort_keys=True, default=str).encode()
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+class PerceptionCache:
+    def __init__(self, root: str = PERCEPTION_CACHE_DIR, max_mb: float = PERCEPTION_CACHE_MAX_MB,
+                 shard_frames: int = PERCEPTION_SHARD_FRAMES):
+        self.root = root
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.shard_frames = shard_frames
+        self._shards: Dict[str, np.ndarray] = {}  # path -> loaded shard
+        self._dirty: set = set()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    # ---- shards ------------------------------------------------------------------
+    def _shard_path(self, vhash: str, fp: str, shard: int) -> str:
+        return os.path.join(self.root, vhash, fp, f"{shard:06d}.npy")
+
+    def _shard(self, vhash: str, fp: str, frame_idx: int, create: bool) -> Tuple[Optional[np.ndarray], int]:
+        shard, off = divmod(frame_idx, self.shard_frames)
+        path = self._shard_path(vhash, fp, shard)
+        arr = self._shards.get(path)
+        if arr is None:
+            if os.path.exists(path):
+                arr = np.load(path)
+                os.utime(path)  # LRU: last use
+            elif create:
+                arr = np.zeros(self.shard_frames, dtype=RECORD)
+            else:
+                return None, off
+            self._shards[path] = arr
+        return arr, off
+
+    # ---- frames ------------------------------------------------------------------
+    def get(self, vhash: str, fp: str, frame_idx: int) -> Optional[Dict[str, Any]]:
+        arr, off = self._shard(vhash, fp, frame_idx, create=False)
+        if arr is None or not (arr[off]["flags"] & FLAG_CACHED):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return record_perception(arr[off])
+
+    def put(self, vhash: str, fp: str, frame_idx: int, perception: Dict[str, Any]) -> Dict[str, Any]:
+        """Store one frame; returns it as get() will (ints, full 21-point hands)."""
+        arr, off = self._shard(vhash, fp, frame_idx, create=True)
+        r = arr[off]
+        fill_record(r, perception.get("bottle"), perception.get("hands"),
+                    perception.get("mouth"), perception.get("ears"))
+        r["flags"] |= FLAG_CACHED
+        self._dirty.add(self._shard_path(vhash, fp, frame_idx // self.shard_frames))
+        return record_perception(r)
+
+    def flush(self):
+        """Write dirty shards (atomically) and enforce the size cap."""
+        for path in self._dirty:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = path + ".tmp.npy"
+            np.save(tmp, self._shards[path])
+            os.replace(tmp, path)
+        self._dirty.clear()
+        self._shards.clear()
+        self.evict()
+
+    def _files(self):
+        for dirpath, _, names in os.walk(self.root):
+            for n in names:
+                if n.endswith(".npy") and ".tmp" not in n:
+                    p = os.path.join(dirpath, n)
+                    st = os.stat(p)
+                    yield st.st_mtime, st.st_size, p
+
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in self._files())
+
+    def evict(self):
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self.evicted += 1
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "evicted_shards": self.evicted,
+                "size_mb": round(self.size_bytes() / 1048576, 2), "max_mb": round(self.max_bytes / 1048576, 2)}
+
+
+def perceive_video(path: str, fp: str, perceive: Callable[[Any], Dict[str, Any]],
+                   cache: Optional[PerceptionCache] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (frame_idx, perception) for every frame of a video.
+
+    Cached frames come straight from disk; the video is only decoded (and perceive(frame)
+    only called) for the misses, seeking once per run of misses. Hits and misses come
+    back in the same normalized shape.
+    """
+    import cv2
+    cache = cache or PerceptionCache()
+    vhash = video_hash(path)
+    cap = cv2.VideoCapture(path)
+    try:
+        n = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        pos = 0  # decoder position
+        for i in range(n):
+            hit = cache.get(vhash, fp, i)
+            if hit is not None:
+                yield i, hit
+                continue
+            if pos != i:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, i)
+            ok, frame = cap.read()
+            if not ok:
+                break
+            pos = i + 1
+            yield i, cache.put(vhash, fp, i, perceive(frame))
+    finally:
+        cap.release()
+        cache.flush()
+
+
+def _main(argv):
+    import argparse
+    ap = argparse.ArgumentParser(description="Perception cache for recorded videos.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    w = sub.add_parser("warm", help="run the app's models over videos and cache the results")
+    w.add_argument("videos", nargs="+")
+    sub.add_parser("stats")
+    sub.add_parser("evict")
+    args = ap.parse_args(argv)
+    cache = PerceptionCache()
+    if args.cmd == "warm":
+        import app
+        fp = fingerprint(app.perception_config())
+        for v in args.videos:
+            frames = sum(1 for _ in perceive_video(v, fp, app.perceive, cache))
+            print(f"[INFO] {v}: {frames} frames ({fp})")
+    elif args.cmd == "evict":
+        cache.evict()
+    print(json.dumps(cache.stats()))
+
+
+if __name__ == "__main__":
+    _main(sys.argv[1:])
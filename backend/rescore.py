@@ -0,0 +1,244 @@
+# Re-score stored attempts from their trajectory files with new thresholds.
+#
+#   python rescore.py --label strict-v2 \
+#       --set reach_bottle.max_reach_time=8 --set place_cup_down.accuracy_threshold_cm=8 \
+#       [--task reach_bottle] [--since 2025-01-01] [--workers 4] [--dry-run]
+#
+# No vision models run: the per-frame boxes and landmarks recorded by trajectory.py
+# are replayed through the same scoring code the exercises use (ReachBottleMetrics,
+# GrabHoldMetrics, score_dump, score_place). Results are written as AttemptMetric
+# rows with scoring=<label> next to the "live" ones; re-running a label replaces it.
+# lift_to_mouth / hold_at_mouth have no offline scorer and are skipped.
+import argparse
+import inspect
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from exercises.dump_into_mouth import (
+    MIN_TILT_ANGLE, MAX_JERKS as DUMP_MAX_JERKS, JERK_ANGLE_THRESH_DEG, JERK_ACCEL_THRESH, score_dump,
+)
+from exercises.grab_hold import GrabHoldMetrics
+from exercises.place_cup_down import (
+    ASSUMED_BOTTLE_HEIGHT_CM, ACCURACY_THRESHOLD_CM, SMOOTHNESS_THRESHOLD, MIN_MOVEMENT_DISTANCE, score_place,
+)
+from exercises.reach_bottle import ReachBottleMetrics, MAX_REACH_TIME, MAX_REACTION_TIME, MAX_JERKS, reach_passed
+from trajectory import FLAG_BOTTLE, Trajectory
+
+FINGERTIPS = (4, 8, 12, 16, 20)
+
+
+def _ctor_defaults(cls) -> Dict[str, float]:
+    return {k: p.default for k, p in inspect.signature(cls.__init__).parameters.items()
+            if p.default is not inspect.Parameter.empty}
+
+
+# Every tunable per task, with the values the live exercises use
+DEFAULTS: Dict[str, Dict[str, float]] = {
+    "reach_bottle": {
+        **{k: v for k, v in _ctor_defaults(ReachBottleMetrics).items() if k != "capacity"},
+        "max_reach_time": MAX_REACH_TIME,
+        "max_reaction_time": MAX_REACTION_TIME,
+        "max_jerks": MAX_JERKS,
+    },
+    "grab_hold": _ctor_defaults(GrabHoldMetrics),
+    "dump_into_mouth": {
+        "min_tilt_angle": MIN_TILT_ANGLE,
+        "max_jerks": DUMP_MAX_JERKS,
+        "jerk_angle_thresh_deg": JERK_ANGLE_THRESH_DEG,
+        "jerk_accel_thresh": JERK_ACCEL_THRESH,
+    },
+    "place_cup_down": {
+        "assumed_bottle_height_cm": ASSUMED_BOTTLE_HEIGHT_CM,
+        "accuracy_threshold_cm": ACCURACY_THRESHOLD_CM,
+        "smoothness_threshold": SMOOTHNESS_THRESHOLD,
+        "min_movement_distance": MIN_MOVEMENT_DISTANCE,
+    },
+}
+
+
+# ---- trajectory helpers ---------------------------------------------------------
+def _nearest_hand(traj: Trajectory) -> np.ndarray:
+    """(N, 21, 2) landmarks of the hand whose index tip is nearest the bottle
+    (as app._choose_hand_near does); NaN where no hand was seen."""
+    hands = traj.hands                                   # (N, 2, 21, 2)
+    center = traj.bottle_center                          # (N, 2)
+    tips = hands[:, :, 8]                                # (N, 2, 2)
+    d = np.hypot(tips[..., 0] - center[:, None, 0], tips[..., 1] - center[:, None, 1])
+    d = np.where(np.isnan(center[:, :1]), 0.0, d)        # no bottle: any visible hand
+    d = np.where(np.isnan(tips[..., 0]), np.inf, d)
+    pick = np.argmin(d, axis=1)
+    return hands[np.arange(len(hands)), pick]
+
+
+def _pt(xy) -> Optional[Tuple[int, int]]:
+    return None if math.isnan(xy[0]) else (int(xy[0]), int(xy[1]))
+
+
+# ---- per-task scorers: Trajectory + thresholds -> metrics ----------------------------
+def _score_reach(traj: Trajectory, th: Dict[str, float]) -> Dict[str, Any]:
+    m = ReachBottleMetrics(grasp_distance_threshold=th["grasp_distance_threshold"],
+                           movement_threshold=th["movement_threshold"])
+    t, tips, centers = traj.t, _nearest_hand(traj)[:, 8], traj.bottle_center
+    seen = ~np.isnan(tips[:, 0]) & ~np.isnan(centers[:, 0])
+    # trajectory time starts at the attempt's start; update() saw int pixels
+    res = m.replay(t[seen], np.trunc(tips[seen]), np.trunc(centers[seen]))
+    return {
+        "reaction_time": res["reaction_time"],
+        "reach_time": res["reach_time"],
+        "trajectory_smoothness": res["trajectory_smoothness"],
+        "passed": reach_passed(res, th["max_reach_time"], th["max_reaction_time"], th["max_jerks"]),
+    }
+
+
+def _score_grab(traj: Trajectory, th: Dict[str, float]) -> Dict[str, Any]:
+    m = GrabHoldMetrics(**th)
+    m.start_signal_time = 0.0
+    t, hand, boxes = traj.t, _nearest_hand(traj)[:, FINGERTIPS], traj.bottle
+    res = {"grip_completion_time": None, "stability_std_px": None, "passed": False}
+    for i in range(len(traj)):
+        b = boxes[i]
+        if np.isnan(b[0]):
+            center, bw, bh = None, 0, 0
+        else:
+            center = (int((b[0] + b[2]) // 2), int((b[1] + b[3]) // 2))
+            bw, bh = int(b[2] - b[0]), int(b[3] - b[1])
+        tips = [p for p in map(_pt, hand[i]) if p is not None]
+        res = m.update(float(t[i]), tips, center, bw, bh)
+        if res.get("done"):
+            break
+    return {
+        "grip_completion_time": res["grip_completion_time"],
+        "stability_std_px": res["stability_std_px"],
+        "passed": bool(res.get("passed")),
+    }
+
+
+def _score_dump(traj: Trajectory, th: Dict[str, float]) -> Dict[str, Any]:
+    boxes = traj.records["bottle"][traj.has(FLAG_BOTTLE)].astype(int).tolist()
+    res = score_dump(boxes, **th)
+    return {"tilt_angle": res["tilt_angle"], "jerks": res["jerks"], "passed": res["passed"]}
+
+
+def _score_place(traj: Trajectory, th: Dict[str, float]) -> Dict[str, Any]:
+    boxes = traj.records["bottle"][traj.has(FLAG_BOTTLE)].astype(int)
+    if not len(boxes):
+        return {"passed": False}
+    height = int(boxes[0, 3] - boxes[0, 1])
+    cm_per_px = th["assumed_bottle_height_cm"] / float(height) if height > 0 else None
+    centers = [((x1 + x2) // 2, (y1 + y2) // 2) for x1, y1, x2, y2 in boxes.tolist()]
+    res = score_place(centers, cm_per_px, th["accuracy_threshold_cm"], th["smoothness_threshold"],
+                      th["min_movement_distance"])
+    return {k: res[k] for k in ("total_distance_px", "smoothness", "accuracy_cm", "passed") if k in res}
+
+
+SCORERS = {
+    "reach_bottle": _score_reach,
+    "grab_hold": _score_grab,
+    "dump_into_mouth": _score_dump,
+    "place_cup_down": _score_place,
+}
+
+
+def score_attempt(task: str, path: str, thresholds: Dict[str, float]) -> Dict[str, Any]:
+    return SCORERS[task](Trajectory(path), thresholds)
+
+
+def _work(item):
+    attempt_id, task, path, thresholds = item
+    try:
+        return attempt_id, score_attempt(task, path, thresholds), None
+    except Exception as e:  # missing/corrupt file: report and carry on
+        return attempt_id, None, str(e)
+
+
+# ---- CLI -----------------------------------------------------------------------------
+def parse_overrides(pairs) -> Dict[str, Dict[str, float]]:
+    """["reach_bottle.max_reach_time=8", ...] -> per-task thresholds (defaults filled in)."""
+    out = {task: dict(v) for task, v in DEFAULTS.items()}
+    for pair in pairs or []:
+        key, _, value = pair.partition("=")
+        task, _, name = key.partition(".")
+        if task not in out or name not in out[task] or not value:
+            raise SystemExit(f"unknown threshold {key!r}; known: "
+                             + ", ".join(f"{t}.{n}" for t, v in DEFAULTS.items() for n in v))
+        out[task][name] = type(out[task][name])(float(value))  # keep ints (fingers_required) ints
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Re-score stored attempts from their trajectories.")
+    ap.add_argument("--label", required=True, help='AttemptMetric.scoring for the results (not "live")')
+    ap.add_argument("--set", action="append", default=[], metavar="TASK.NAME=VALUE",
+                    help="threshold override, repeatable")
+    ap.add_argument("--task", choices=sorted(SCORERS), action="append", help="limit to task(s)")
+    ap.add_argument("--since", help="only attempts started at/after this ISO timestamp")
+    ap.add_argument("--limit", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=1, help="processes for scoring")
+    ap.add_argument("--batch", type=int, default=500, help="attempts per DB transaction")
+    ap.add_argument("--dry-run", action="store_true", help="score and report, write nothing")
+    args = ap.parse_args(argv)
+    if args.label == "live":
+        raise SystemExit('--label "live" is reserved for capture-time results')
+    thresholds = parse_overrides(args.set)
+
+    from sqlmodel import Session, select
+    from db import engine, init_db, replace_attempt_metrics
+    from models import Attempt
+
+    init_db()
+    stmt = (select(Attempt.id, Attempt.task, Attempt.trajectory_path, Attempt.passed)
+            .where(Attempt.trajectory_path.is_not(None), Attempt.task.in_(args.task or list(SCORERS)))
+            .order_by(Attempt.id))
+    if args.since:
+        stmt = stmt.where(Attempt.started_at >= datetime.fromisoformat(args.since))
+    if args.limit:
+        stmt = stmt.limit(args.limit)
+    with Session(engine) as s:
+        rows = s.exec(stmt).all()
+    todo = [(aid, task, path, thresholds[task]) for aid, task, path, _ in rows]
+    live = {aid: bool(passed) for aid, _, _, passed in rows}
+
+    t0 = time.perf_counter()
+    scored = failed = flipped = 0
+    pending: Dict[int, Dict[str, Any]] = {}
+
+    def _flush():
+        if pending and not args.dry_run:
+            replace_attempt_metrics(pending, args.label)
+        pending.clear()
+
+    if args.workers > 1:
+        pool = ProcessPoolExecutor(args.workers)
+        results = pool.map(_work, todo, chunksize=64)
+    else:
+        pool, results = None, map(_work, todo)
+    try:
+        for attempt_id, metrics, err in results:
+            if err is not None:
+                failed += 1
+                print(f"[WARN] attempt {attempt_id}: {err}")
+                continue
+            scored += 1
+            if attempt_id in live and live[attempt_id] != bool(metrics["passed"]):
+                flipped += 1
+            pending[attempt_id] = metrics
+            if len(pending) >= args.batch:
+                _flush()
+        _flush()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    dt = time.perf_counter() - t0
+    rate = scored / dt * 60.0 if dt > 0 else 0.0
+    print(f"[INFO] {args.label}: scored {scored}, failed {failed}, pass/fail changed vs live {flipped} "
+          f"({dt:.1f}s, {rate:.0f} attempts/min){' [dry run]' if args.dry_run else ''}")
+
+
+if __name__ == "__main__":
+    main()
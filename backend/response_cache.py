@@ -0,0 +1,102 @@
+# In-process cache for polled read endpoints (/metrics, /debug-overlay, ...).
+#
+# Entries are keyed by path + query string and tagged with the data they read
+# ("events", "attempts", "config"). Each tag has a generation counter that writers
+# bump after they commit (EventWriter flush, attempt recorded, compaction pass, a
+# config POST). An entry is served while its tags' generations are unchanged and it
+# is younger than its TTL; the TTL only bounds staleness from writers this process
+# can't see (rescore.py, another app instance on the same db).
+#
+# Responses carry a content-hash ETag and Cache-Control: no-cache, so pollers send
+# If-None-Match and get an empty 304 while nothing changed.
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+RESPONSE_CACHE_TTL_S = float(os.getenv("RESPONSE_CACHE_TTL_S", "2.0"))
+RESPONSE_CACHE_MAX   = int(os.getenv("RESPONSE_CACHE_MAX", "256"))  # entries (LRU)
+
+Computed = Any  # JSON-able body, or (body, extra headers)
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # weak comparison, as If-None-Match requires
+    return any(t.strip().removeprefix("W/") == etag for t in header.split(","))
+
+
+class ResponseCache:
+    def __init__(self, ttl_s: float = RESPONSE_CACHE_TTL_S, max_entries: int = RESPONSE_CACHE_MAX):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._gen: Dict[str, int] = {}
+        # key -> (generations, expires_at, body, etag, headers)
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, ...], float, bytes, str, Dict[str, str]]]" = OrderedDict()
+        self._lock = threading.Lock()  # bump() also comes from the compaction thread
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def bump(self, *tags: str):
+        """Invalidate everything that read any of these tags."""
+        with self._lock:
+            for t in tags:
+                self._gen[t] = self._gen.get(t, 0) + 1
+
+    def _generations(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(self._gen.get(t, 0) for t in tags)
+
+    @staticmethod
+    def _key(request: Request) -> str:
+        return request.url.path + "?" + "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+
+    def _response(self, request: Request, body: bytes, etag: str, headers: Dict[str, str]) -> Response:
+        h = {**headers, "ETag": etag, "Cache-Control": "no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=h)
+        return Response(content=body, media_type="application/json", headers=h)
+
+    async def respond(self, request: Request, tags: Tuple[str, ...], compute: Callable[[], Awaitable[Computed]],
+                      ttl_s: Optional[float] = None) -> Response:
+        """Serve compute()'s JSON from cache while `tags` are unchanged, else recompute."""
+        key = self._key(request)
+        gens = self._generations(tags)
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == gens and entry[1] > now:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._response(request, entry[2], entry[3], entry[4])
+
+        self.misses += 1
+        out = await compute()
+        body, headers = out if isinstance(out, tuple) else (out, {})
+        raw = json.dumps(jsonable_encoder(body), ensure_ascii=False, allow_nan=False,
+                         separators=(",", ":")).encode()
+        etag = _etag(raw)
+        # store under the generations seen *before* computing: a write that landed
+        # meanwhile makes this entry stale on the next request instead of hiding it
+        self._entries[key] = (gens, now + (self.ttl_s if ttl_s is None else ttl_s), raw, etag, dict(headers))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return self._response(request, raw, etag, headers)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "not_modified": self.not_modified, "generations": dict(self._gen)}
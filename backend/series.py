@@ -0,0 +1,119 @@
+# Downsampled time series over tick telemetry for the charts.
+#
+# bucketed(): per-bucket min/max/mean computed in SQL (GROUP BY on epoch/bucket),
+#             over raw ticks plus the TickRollup rows compaction left for older data.
+# lttb():     Largest-Triangle-Three-Buckets, shape-preserving reduction to n points.
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import text
+
+SERIES_FIELDS = ("progress", "fps", "passed")  # typed Event columns
+_EPOCH = datetime(1970, 1, 1)
+
+# Seconds since epoch for a stored naive-UTC DATETIME string
+def _epoch_sql(col: str) -> str:
+    return f"((julianday({col}) - 2440587.5) * 86400.0)"
+
+
+def _where(conds: Dict[str, Any], ts_col: str = "ts", first: str = "type = 'tick'") -> str:
+    parts = [first]
+    if conds.get("since") is not None:
+        parts.append(f"{ts_col} >= :since")
+    if conds.get("until") is not None:
+        parts.append(f"{ts_col} < :until")
+    if conds.get("session_id"):
+        parts.append("session_id = :session_id")
+    return " AND ".join(parts)
+
+
+def _to_dt(v):
+    return datetime.fromisoformat(v) if isinstance(v, str) else v
+
+
+def time_range(conn, conds: Dict[str, Any]):
+    sql = (
+        f"SELECT MIN(lo), MAX(hi) FROM ("
+        f"SELECT MIN(ts) AS lo, MAX(ts) AS hi FROM event WHERE {_where(conds)} "
+        f"UNION ALL SELECT MIN(bucket_start), MAX(bucket_start) FROM tickrollup "
+        f"WHERE {_where(conds, 'bucket_start', 'bucket_s > 0')})"
+    )
+    row = conn.execute(text(sql), conds).first()
+    if not row or row[0] is None:
+        return None, None
+    return _to_dt(row[0]), _to_dt(row[1])
+
+
+def bucketed(conn, field: str, bucket_s: float, conds: Dict[str, Any],
+             origin: float = 0.0) -> List[Dict[str, Any]]:
+    """min/max/mean/count of `field` per bucket_s-wide bucket (aligned to origin, epoch s), oldest first."""
+    if field not in SERIES_FIELDS:
+        raise ValueError(field)
+    raw_t = _epoch_sql("ts")
+    roll_t = f"({_epoch_sql('bucket_start')} + bucket_s / 2.0)"
+    sql = (
+        f"SELECT CAST((t - :origin) / :bucket_s AS INTEGER) AS b, "
+        f"MIN(mn), MAX(mx), SUM(sm) / SUM(n), SUM(n), SUM(t * n) / SUM(n) FROM ("
+        f"SELECT {raw_t} AS t, {field} AS mn, {field} AS mx, {field} AS sm, 1 AS n "
+        f"FROM event WHERE {_where(conds)} AND {field} IS NOT NULL "
+        f"UNION ALL "
+        f"SELECT {roll_t}, {field}_min, {field}_max, {field}_sum, {field}_n "
+        f"FROM tickrollup WHERE {_where(conds, 'bucket_start', 'bucket_s > 0')} AND {field}_n > 0"
+        f") GROUP BY b ORDER BY b"
+    )
+    rows = conn.execute(text(sql), {**conds, "bucket_s": float(bucket_s), "origin": float(origin)}).all()
+    return [
+        {"t": (_EPOCH + timedelta(seconds=origin + b * bucket_s)).isoformat(),
+         "min": mn, "max": mx, "mean": avg, "n": n, "_tc": tc}
+        for (b, mn, mx, avg, n, tc) in rows
+    ]
+
+
+def lttb(x: Sequence[float], y: Sequence[float], n: int) -> np.ndarray:
+    """Indices of the n points LTTB keeps (always includes first and last)."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    size = len(x)
+    if n >= size or n < 3:
+        return np.arange(size)
+    keep = np.empty(n, dtype=np.int64)
+    keep[0], keep[-1] = 0, size - 1
+    # n-2 buckets over the interior points
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # average of the next bucket (or the last point for the final bucket)
+        nlo, nhi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (size - 1, size)
+        avg_x = x[nlo:nhi].mean()
+        avg_y = y[nlo:nhi].mean()
+        # triangle area against the previously kept point, vectorized over the bucket
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def downsample(conn, field: str, conds: Dict[str, Any], points: int, mode: str,
+               bucket_s: Optional[float] = None) -> Dict[str, Any]:
+    lo, hi = conds.get("since"), conds.get("until")
+    if lo is None or (hi is None and bucket_s is None):
+        dlo, dhi = time_range(conn, conds)
+        if dlo is None:
+            return {"field": field, "mode": mode, "bucket_s": bucket_s, "points": []}
+        lo, hi = lo or dlo, hi or dhi
+    if bucket_s is None:
+        span = max(1e-3, (hi - lo).total_seconds()) * (1 + 1e-9)  # keep the newest row in the last bucket
+        # lttb works from ~4x oversampled bucket means, then keeps the visually significant ones
+        bucket_s = span / (points * (4 if mode == "lttb" else 1))
+    origin = (lo - _EPOCH).total_seconds()
+    buckets = bucketed(conn, field, bucket_s, conds, origin)
+    if mode == "lttb":
+        if buckets:
+            idx = lttb([b["_tc"] for b in buckets], [b["mean"] for b in buckets], points)
+            buckets = [buckets[i] for i in idx]
+        pts = [{"t": (_EPOCH + timedelta(seconds=b["_tc"])).isoformat(), "v": b["mean"]} for b in buckets]
+    else:
+        pts = [{k: v for k, v in b.items() if k != "_tc"} for b in buckets]
+    return {"field": field, "mode": mode, "bucket_s": bucket_s, "points": pts}
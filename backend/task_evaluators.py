@@ -0,0 +1,387 @@
+# backend/task_evaluators.py
+# Per-frame evaluators for the six exercises, built on the same state machines and
+# scoring code as the standalone scripts (exercises/*.py) and rescore.py, but fed by
+# one shared Perception per frame instead of loading models / opening cameras.
+#
+#   p = Perception(frame, ts, detect_bottle=..., detect_hands=..., detect_face=...)
+#   out = ev.update(p)   # {"passed", "done", "progress", "status", "overlay", "metrics"}
+#
+# "done" marks a finished trial (pass or fail); "metrics" carries the clinical numbers
+# (reaction/reach time, grip stability, tilt jerks, placement accuracy in cm) under the
+# same names rescore.py writes, so live and re-scored AttemptMetric rows line up.
+import inspect
+import math
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import cv2
+
+from exercises.clock import REALTIME
+from exercises.dump_into_mouth import (
+    MIN_TILT_ANGLE, MAX_JERKS as DUMP_MAX_JERKS, JERK_ANGLE_THRESH_DEG, JERK_ACCEL_THRESH, MIN_SAMPLES,
+    calculate_bottle_angle, frame_jerks,
+)
+from exercises.grab_hold import GrabHoldMetrics
+from exercises.kinematics import PathLength
+from exercises.place_cup_down import (
+    ASSUMED_BOTTLE_HEIGHT_CM, ACCURACY_THRESHOLD_CM, SMOOTHNESS_THRESHOLD, MIN_MOVEMENT_DISTANCE, score_place,
+)
+from exercises.reach_bottle import ReachBottleMetrics, MAX_REACH_TIME, MAX_REACTION_TIME, MAX_JERKS, reach_passed
+
+Point = Tuple[int, int]
+FINGERTIPS = (4, 8, 12, 16, 20)
+
+DEFAULT_MOUTH_SCALE = 0.80   # lift_to_mouth_test's (that script loads YOLO/MediaPipe on import)
+HOLD_AT_MOUTH_SECONDS = 5.0  # hold_at_mouth_test.HOLD_TIME_REQUIRED
+HOLD_MAX_RETRIES = 3         # times the bottle may leave the mouth before the hold counts as failed
+PLACE_SETTLE_S = 1.0         # bottle still this long after moving = placed (the script's 'p' key)
+PLACE_SETTLE_PX = 8          # "still": center stays within this radius
+
+
+# -----------------------------------------------------------------------------
+# Shared perception
+# -----------------------------------------------------------------------------
+class Perception:
+    """One frame's perception, computed on first use and shared by everything that
+    looks at the frame (evaluator, trajectory recorder, overlays).
+
+    detect_bottle(frame_bgr) -> (x1,y1,x2,y2,score) | None
+    detect_hands(img_rgb)    -> {"left": {i: (x,y)}, "right": {...}}
+    detect_face(img_rgb)     -> (mouth (x,y) | None, head_width_px | None, ears ((lx,ly),(rx,ry)) | None)
+    """
+
+    def __init__(self, frame, ts: Optional[float], detect_bottle: Callable, detect_hands: Callable,
+                 detect_face: Callable):
+        self.frame = frame
+        self.ts = ts
+        self._detect_bottle = detect_bottle
+        self._detect_hands = detect_hands
+        self._detect_face = detect_face
+        self._cache: Dict[str, Any] = {}
+
+    @property
+    def rgb(self):
+        if "rgb" not in self._cache:
+            self._cache["rgb"] = cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB)
+        return self._cache["rgb"]
+
+    @property
+    def bottle(self):
+        if "bottle" not in self._cache:
+            self._cache["bottle"] = self._detect_bottle(self.frame)
+        return self._cache["bottle"]
+
+    @property
+    def hands(self) -> Dict[str, Dict[int, Point]]:
+        if "hands" not in self._cache:
+            self._cache["hands"] = self._detect_hands(self.rgb) or {}
+        return self._cache["hands"]
+
+    def _face(self):
+        if "face" not in self._cache:
+            self._cache["face"] = self._detect_face(self.rgb)
+        return self._cache["face"]
+
+    @property
+    def mouth(self) -> Optional[Point]:
+        return self._face()[0]
+
+    @property
+    def head_w(self) -> Optional[float]:
+        return self._face()[1]
+
+    @property
+    def ears(self):
+        return self._face()[2]
+
+    @property
+    def bottle_center(self) -> Optional[Point]:
+        b = self.bottle
+        return None if not b else ((b[0] + b[2]) // 2, (b[1] + b[3]) // 2)
+
+    def record(self) -> Dict[str, Any]:
+        """What has been computed so far, in perceive()/trajectory shape (never runs a model)."""
+        out: Dict[str, Any] = {}
+        if "bottle" in self._cache:
+            out["bottle"] = self._cache["bottle"]
+        if "hands" in self._cache:
+            out["hands"] = self._cache["hands"]
+        if "face" in self._cache:
+            out["mouth"], _, out["ears"] = self._cache["face"]
+        return out
+
+
+def choose_hand_near(target: Optional[Point], hands_xy: Dict[str, Dict[int, Point]]) -> Optional[Tuple[str, Dict[int, Point]]]:
+    """(side, landmarks) of the hand whose index tip is closest to target (any hand if no target)."""
+    best = None
+    for side in ("left", "right"):
+        lm = hands_xy.get(side, {})
+        tip = lm.get(8)  # index fingertip
+        if tip is None:
+            continue
+        d = 0.0 if target is None else math.hypot(tip[0] - target[0], tip[1] - target[1])
+        if best is None or d < best[0]:
+            best = (d, side, lm)
+    return None if best is None else (best[1], best[2])
+
+
+def _bottle_overlay(box, overlay):
+    x1, y1, x2, y2 = box[:4]
+    overlay.append(("rect", (x1, y1, x2, y2), (0, 255, 0), 2))
+    overlay.append(("circle", ((x1 + x2) // 2, (y1 + y2) // 2), 6, (0, 255, 0), -1))
+
+
+def _numeric(res: Dict[str, Any], keys) -> Dict[str, float]:
+    return {k: float(res[k]) for k in keys if res.get(k) is not None}
+
+
+def _ctor_kwargs(cls, kwargs) -> Dict[str, Any]:
+    """Task params that are constructor thresholds of cls, cast like their defaults (ints stay ints)."""
+    params = inspect.signature(cls.__init__).parameters
+    return {k: type(params[k].default)(float(v)) for k, v in kwargs.items()
+            if k in params and params[k].default is not inspect.Parameter.empty}
+
+
+# -----------------------------------------------------------------------------
+# Evaluators
+# -----------------------------------------------------------------------------
+class BaseEval:
+    """update() gets the frame's Perception (p.ts = capture timestamp); start() reads
+    self.clock (see exercises/clock.py)."""
+    name: str
+    clock = REALTIME
+    def start(self, **kwargs): ...
+    def update(self, p: Perception) -> Dict[str, Any]: ...
+    def stop(self): ...
+    def _now(self, ts: Optional[float]) -> float:
+        return self.clock.now() if ts is None else ts
+
+
+class ReachBottleEval(BaseEval):
+    """ReachBottleMetrics on the index tip of the hand nearest the bottle (as rescore.py)."""
+    name = "reach_bottle"
+    def start(self, **kwargs):
+        self.metrics = ReachBottleMetrics(**_ctor_kwargs(ReachBottleMetrics, kwargs))
+        self.max_reach_time = float(kwargs.get("max_reach_time", MAX_REACH_TIME))
+        self.max_reaction_time = float(kwargs.get("max_reaction_time", MAX_REACTION_TIME))
+        self.max_jerks = float(kwargs.get("max_jerks", MAX_JERKS))
+        self.d0 = None
+        self.metrics.start(self.clock.now())
+    def update(self, p):
+        overlay = []
+        center = p.bottle_center
+        if center:
+            _bottle_overlay(p.bottle, overlay)
+        sel = choose_hand_near(center, p.hands)
+        tip = sel[1].get(8) if sel else None
+        if tip:
+            overlay.append(("circle", tip, 8, (255, 255, 255), -1))
+        res = self.metrics.update(self._now(p.ts), tip if center else None, center if tip else None)
+        done = res["reach_time"] is not None
+        progress = 1.0 if done else 0.0
+        if tip and center and not done:
+            grasp = self.metrics.grasp_distance_threshold
+            d = math.dist(tip, center)
+            if self.d0 is None:
+                self.d0 = max(d, grasp + 1.0)
+            overlay.append(("line", tip, center, (255, 255, 0), 2))
+            progress = max(0.0, min(1.0, (self.d0 - d) / (self.d0 - grasp)))
+        overlay.append(("text", res["status"], (10, 60), 0.7, (255, 255, 255), 2))
+        passed = done and reach_passed(res, self.max_reach_time, self.max_reaction_time, self.max_jerks)
+        return {"passed": passed, "done": done, "progress": progress, "status": res["status"], "overlay": overlay,
+                "metrics": _numeric(res, ("reaction_time", "reach_time", "trajectory_smoothness"))}
+
+
+class GrabHoldEval(BaseEval):
+    """GrabHoldMetrics: first touch -> confirmed grip -> hold window, scored on stability."""
+    name = "grab_hold"
+    def start(self, **kwargs):
+        self.metrics = GrabHoldMetrics(**_ctor_kwargs(GrabHoldMetrics, kwargs))
+        self.metrics.start(self.clock.now())
+    def update(self, p):
+        overlay = []
+        box, center = p.bottle, p.bottle_center
+        bw = bh = 0
+        if box:
+            _bottle_overlay(box, overlay)
+            bw, bh = box[2] - box[0], box[3] - box[1]
+        sel = choose_hand_near(center, p.hands)
+        tips = [sel[1][i] for i in FINGERTIPS if i in sel[1]] if sel else []
+        for t in tips:
+            overlay.append(("circle", t, 5, (255, 255, 255), -1))
+        res = self.metrics.update(self._now(p.ts), tips, center, bw, bh)
+        held = res.get("hold_elapsed_s", 0.0)
+        overlay.append(("text", f"{res['status']} hold={held:.2f}s", (10, 60), 0.7, (255, 255, 255), 2))
+        if res["stability_std_px"] is not None:
+            overlay.append(("text", f"std={res['stability_std_px']:.1f}px", (10, 86), 0.7, (255, 255, 255), 2))
+        return {"passed": bool(res.get("passed")), "done": bool(res["done"]),
+                "progress": min(1.0, held / self.metrics.initial_hold_s), "status": res["status"],
+                "overlay": overlay, "metrics": _numeric(res, ("grip_completion_time", "stability_std_px"))}
+
+
+def _near_mouth(p: Perception, mouth_scale: float, overlay) -> Tuple[bool, Optional[float], Optional[float]]:
+    """lift_to_mouth_test.process_frame's check: bottle center within mouth_scale × ear distance
+    of the mouth. Returns (reached, distance, threshold)."""
+    center = p.bottle_center
+    if center:
+        _bottle_overlay(p.bottle, overlay)
+    mouth = p.mouth
+    if mouth:
+        overlay.append(("circle", mouth, 8, (255, 255, 255), -1))
+    head_w = p.head_w
+    if not (center and mouth and head_w):
+        return False, None, None
+    thresh = float(mouth_scale) * float(head_w)
+    dist = math.dist(center, mouth)
+    overlay.append(("circle", mouth, int(thresh), (0, 200, 255), 2))
+    overlay.append(("text", f"d={int(dist)} tol={int(thresh)}", (10, 60), 0.7, (255, 255, 255), 2))
+    return dist <= thresh, dist, thresh
+
+
+class LiftToMouthEval(BaseEval):
+    name = "lift_to_mouth"
+    def start(self, **kwargs):
+        self.mouth_scale = float(kwargs.get("mouth_scale", DEFAULT_MOUTH_SCALE))
+        self.t0 = self.clock.now()
+    def update(self, p):
+        overlay = []
+        reached, dist, thresh = _near_mouth(p, self.mouth_scale, overlay)
+        progress = 1.0 if reached else (0.0 if dist is None else max(0.0, min(1.0, thresh / dist)))
+        out = {"passed": reached, "done": reached, "progress": progress, "overlay": overlay, "metrics": {}}
+        if reached:
+            out["metrics"] = {"lift_time": self._now(p.ts) - self.t0}
+        return out
+
+
+class HoldAtMouthEval(BaseEval):
+    """hold_at_mouth_test: the lift check held for N seconds; leaving the mouth restarts the
+    timer and counts a retry, more than HOLD_MAX_RETRIES retries fails the hold."""
+    name = "hold_at_mouth"
+    def start(self, **kwargs):
+        self.seconds = float(kwargs.get("seconds", HOLD_AT_MOUTH_SECONDS))
+        self.mouth_scale = float(kwargs.get("mouth_scale", DEFAULT_MOUTH_SCALE))
+        self.max_retries = int(kwargs.get("max_retries", HOLD_MAX_RETRIES))
+        self.t0 = None
+        self.retries = 0
+    def update(self, p):
+        overlay = []
+        reached, _, _ = _near_mouth(p, self.mouth_scale, overlay)
+        held = 0.0
+        if reached:
+            now = self._now(p.ts)
+            if self.t0 is None:
+                self.t0 = now
+            held = now - self.t0
+        elif self.t0 is not None:
+            self.retries += 1
+            self.t0 = None
+        overlay.append(("text", f"hold={held:.2f}s/{self.seconds:.0f}s retries={self.retries}", (10, 86), 0.7,
+                        (255, 255, 255), 2))
+        done = held >= self.seconds
+        return {"passed": done and self.retries <= self.max_retries, "done": done,
+                "progress": min(1.0, held / self.seconds), "overlay": overlay,
+                "metrics": {"hold_seconds": held, "retries": float(self.retries)}}
+
+
+class DumpIntoMouthEval(BaseEval):
+    """dump_into_mouth_test: bottle tilt from its box, jerks from angle/position second
+    differences; completes once the tilt range reaches min_tilt_angle."""
+    name = "dump_into_mouth"
+    def start(self, **kwargs):
+        self.min_tilt_angle = float(kwargs.get("min_tilt_angle", MIN_TILT_ANGLE))
+        self.max_jerks = float(kwargs.get("max_jerks", DUMP_MAX_JERKS))
+        self.angle_thresh = float(kwargs.get("jerk_angle_thresh_deg", JERK_ANGLE_THRESH_DEG))
+        self.accel_thresh = float(kwargs.get("jerk_accel_thresh", JERK_ACCEL_THRESH))
+        # frame_jerks() only looks at the last three samples; the tilt only needs the range
+        self.angles = deque(maxlen=3)
+        self.centers = deque(maxlen=3)
+        self.n = 0
+        self.lo = self.hi = None
+        self.jerks = 0
+        self.result = None
+    def update(self, p):
+        overlay = []
+        box = p.bottle
+        if box and self.result is None:
+            _bottle_overlay(box, overlay)
+            angle = calculate_bottle_angle(box[:4])
+            self.angles.append(angle)
+            self.centers.append(p.bottle_center)
+            self.n += 1
+            self.lo = angle if self.lo is None else min(self.lo, angle)
+            self.hi = angle if self.hi is None else max(self.hi, angle)
+            self.jerks += frame_jerks(self.angles, self.centers, self.angle_thresh, self.accel_thresh)
+            overlay.append(("text", f"angle={angle:.0f}", (10, 60), 0.7, (255, 255, 255), 2))
+            tilt = self.hi - self.lo
+            if self.n > MIN_SAMPLES and tilt >= self.min_tilt_angle:
+                self.result = {"tilt_angle": tilt, "jerks": float(self.jerks),
+                               "passed": self.jerks <= self.max_jerks}
+        tilt = 0.0 if self.lo is None else self.hi - self.lo
+        overlay.append(("text", f"tilt={tilt:.0f}/{self.min_tilt_angle:.0f} jerks={self.jerks}", (10, 86), 0.7,
+                        (255, 255, 255), 2))
+        done = self.result is not None
+        return {"passed": done and self.result["passed"], "done": done,
+                "progress": min(1.0, tilt / self.min_tilt_angle), "overlay": overlay,
+                "metrics": {"tilt_angle": tilt, "jerks": float(self.jerks)}}
+
+
+class PlaceCupDownEval(BaseEval):
+    """place_cup_down_test: track the bottle from where it was first seen; once it has
+    moved and then stayed still for PLACE_SETTLE_S (the script's 'p' key), score_place()
+    it on smoothness and final-position accuracy in cm."""
+    name = "place_cup_down"
+    def start(self, **kwargs):
+        self.height_cm = float(kwargs.get("assumed_bottle_height_cm", ASSUMED_BOTTLE_HEIGHT_CM))
+        self.accuracy_cm = float(kwargs.get("accuracy_threshold_cm", ACCURACY_THRESHOLD_CM))
+        self.smoothness = float(kwargs.get("smoothness_threshold", SMOOTHNESS_THRESHOLD))
+        self.min_movement = float(kwargs.get("min_movement_distance", MIN_MOVEMENT_DISTANCE))
+        self.settle_s = float(kwargs.get("settle_s", PLACE_SETTLE_S))
+        self.centers = []
+        self.cm_per_px = None
+        self.path = PathLength()
+        self.still_at = self.still_since = None
+        self.result = None
+    def update(self, p):
+        overlay = []
+        box, center = p.bottle, p.bottle_center
+        if box:
+            _bottle_overlay(box, overlay)
+        if center and self.result is None:
+            if self.cm_per_px is None and box[3] - box[1] > 0:
+                self.cm_per_px = self.height_cm / float(box[3] - box[1])
+            if self.cm_per_px is not None:
+                self._track(self._now(p.ts), center)
+        if len(self.centers) > 1:
+            overlay.append(("line", self.centers[0], self.centers[-1], (255, 200, 0), 2))
+            d_cm = math.dist(self.centers[0], self.centers[-1]) * self.cm_per_px
+            overlay.append(("text", f"moved={self.path.total:.0f}px  offset={d_cm:.1f}cm", (10, 60), 0.7,
+                            (255, 255, 255), 2))
+        res = self.result or {}
+        done = self.result is not None
+        progress = min(0.5, 0.5 * self.path.total / self.min_movement)
+        if done:
+            progress = 1.0
+        elif progress >= 0.5 and self.still_since is not None:
+            progress += 0.5 * min(1.0, (self._now(p.ts) - self.still_since) / self.settle_s)
+        return {"passed": bool(res.get("passed")), "done": done, "progress": progress, "overlay": overlay,
+                "metrics": _numeric(res, ("total_distance_px", "smoothness", "accuracy_cm"))}
+    def _track(self, now, center):
+        self.centers.append(center)
+        self.path.update(center)
+        if self.still_at is None or math.dist(center, self.still_at) > PLACE_SETTLE_PX:
+            self.still_at, self.still_since = center, now
+            return
+        if self.path.total >= self.min_movement and now - self.still_since >= self.settle_s:
+            res = score_place(self.centers, self.cm_per_px, self.accuracy_cm, self.smoothness, self.min_movement)
+            if res["valid"]:
+                self.result = res
+
+
+TASK_EVALUATORS = {
+    "reach_bottle":       ReachBottleEval,
+    "grab_hold":          GrabHoldEval,
+    "lift_to_mouth":      LiftToMouthEval,
+    "hold_at_mouth":      HoldAtMouthEval,
+    "dump_into_mouth":    DumpIntoMouthEval,
+    "place_cup_down":     PlaceCupDownEval,
+}
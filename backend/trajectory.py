@@ -0,0 +1,209 @@
+# Per-attempt trajectory files: one fixed-size binary record per processed frame.
+#
+# File layout (little-endian):
+#   HEADER   16 bytes   magic b"RTRJ", u16 version, u16 record size, f64 base ts (epoch s)
+#   RECORD   repeated   see RECORD below; appended as frames arrive, never rewritten
+#
+# Timestamps are delta-encoded (u32 microseconds since the previous record), so a
+# record is 194 bytes instead of carrying an f64 per frame; load() restores them
+# with one cumsum. Coordinates stay absolute i16 pixels so any record can be read
+# on its own and the whole file maps straight onto a NumPy structured array.
+# Missing parts (no bottle, hand out of view, ...) have their FLAG_* bit cleared
+# and zeros in the slot; the Trajectory accessors turn those into NaN.
+import os
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+MAGIC = b"RTRJ"
+VERSION = 1
+
+HEADER = np.dtype([("magic", "S4"), ("version", "<u2"), ("record_size", "<u2"), ("base_ts", "<f8")])
+RECORD = np.dtype([
+    ("dt_us", "<u4"),             # since the previous record (the header base_ts for the first)
+    ("flags", "u1"),
+    ("_pad", "u1"),
+    ("bottle", "<i2", (4,)),      # x1, y1, x2, y2
+    ("hands", "<i2", (2, 21, 2)), # [left, right] x MediaPipe landmark x (x, y)
+    ("mouth", "<i2", (2,)),
+    ("ears", "<i2", (2, 2)),      # [left, right] x (x, y)
+])
+
+FLAG_BOTTLE = 1 << 0
+FLAG_LEFT   = 1 << 1
+FLAG_RIGHT  = 1 << 2
+FLAG_MOUTH  = 1 << 3
+FLAG_L_EAR  = 1 << 4
+FLAG_R_EAR  = 1 << 5
+
+_HAND_FLAGS = (FLAG_LEFT, FLAG_RIGHT)
+_EAR_FLAGS = (FLAG_L_EAR, FLAG_R_EAR)
+_I16 = np.iinfo(np.int16)
+_U32_MAX = np.iinfo(np.uint32).max
+
+Point = Tuple[int, int]
+
+
+def _clip(v) -> int:
+    return max(_I16.min, min(_I16.max, int(v)))
+
+
+def fill_record(r, bottle=None, hands=None, mouth=None, ears=None):
+    """Zero RECORD r and fill the perception fields (dt_us is left to the caller)."""
+    r.fill(0)
+    flags = 0
+    if bottle is not None:
+        r["bottle"] = [_clip(v) for v in bottle[:4]]
+        flags |= FLAG_BOTTLE
+    for slot, side in enumerate(("left", "right")):
+        lm = (hands or {}).get(side) or {}
+        if lm:
+            for i, (x, y) in lm.items():
+                if 0 <= i < 21:
+                    r["hands"][slot, i] = (_clip(x), _clip(y))
+            flags |= _HAND_FLAGS[slot]
+    if mouth is not None:
+        r["mouth"] = (_clip(mouth[0]), _clip(mouth[1]))
+        flags |= FLAG_MOUTH
+    for slot, p in enumerate(ears or (None, None)):
+        if p is not None:
+            r["ears"][slot] = (_clip(p[0]), _clip(p[1]))
+            flags |= _EAR_FLAGS[slot]
+    r["flags"] = flags
+
+
+def record_perception(r) -> Dict[str, object]:
+    """Inverse of fill_record: the app.py helper shapes (xyxy tuple, {side: {idx: (x, y)}}, ...)."""
+    flags = int(r["flags"])
+    hands = {}
+    for slot, side in enumerate(("left", "right")):
+        pts = r["hands"][slot]
+        hands[side] = {i: (int(pts[i, 0]), int(pts[i, 1])) for i in range(21)} if flags & _HAND_FLAGS[slot] else {}
+    ears = tuple((int(r["ears"][s, 0]), int(r["ears"][s, 1])) if flags & f else None
+                 for s, f in enumerate(_EAR_FLAGS))
+    return {
+        "bottle": tuple(int(v) for v in r["bottle"]) if flags & FLAG_BOTTLE else None,
+        "hands": hands,
+        "mouth": (int(r["mouth"][0]), int(r["mouth"][1])) if flags & FLAG_MOUTH else None,
+        "ears": ears if any(e is not None for e in ears) else None,
+    }
+
+
+class TrajectoryWriter:
+    """Append-only writer; records are buffered and written every `flush_every` frames."""
+
+    def __init__(self, path: str, base_ts: float, flush_every: int = 64):
+        self.path = path
+        self.base_ts = float(base_ts)
+        self.frames = 0
+        self._last_ts = self.base_ts
+        self._buf = np.zeros(flush_every, dtype=RECORD)
+        self._n = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._fh = open(path, "wb")
+        hdr = np.array([(MAGIC, VERSION, RECORD.itemsize, self.base_ts)], dtype=HEADER)
+        self._fh.write(hdr.tobytes())
+
+    def append(self, ts: float,
+               bottle: Optional[Sequence[int]] = None,
+               hands: Optional[Dict[str, Dict[int, Point]]] = None,
+               mouth: Optional[Point] = None,
+               ears: Optional[Tuple[Optional[Point], Optional[Point]]] = None):
+        """One frame. bottle is xyxy (extra items ignored), hands is {'left'|'right': {idx: (x, y)}}."""
+        r = self._buf[self._n]
+        fill_record(r, bottle, hands, mouth, ears)
+        r["dt_us"] = min(_U32_MAX, max(0, int(round((ts - self._last_ts) * 1e6))))
+        self._last_ts = max(self._last_ts, ts)
+        self._n += 1
+        self.frames += 1
+        if self._n == len(self._buf):
+            self.flush()
+
+    def flush(self):
+        if self._n and self._fh is not None:
+            self._fh.write(self._buf[:self._n].tobytes())
+            self._fh.flush()
+            self._n = 0
+
+    def close(self):
+        if self._fh is not None:
+            self.flush()
+            self._fh.close()
+            self._fh = None
+
+
+class Trajectory:
+    """Read side: a memory map of the records plus decoded views."""
+
+    def __init__(self, path: str):
+        hdr = np.fromfile(path, dtype=HEADER, count=1)
+        if len(hdr) != 1 or hdr["magic"][0] != MAGIC:
+            raise ValueError(f"not a trajectory file: {path}")
+        if int(hdr["version"][0]) != VERSION or int(hdr["record_size"][0]) != RECORD.itemsize:
+            raise ValueError(f"unsupported trajectory version/record size in {path}")
+        self.path = path
+        self.base_ts = float(hdr["base_ts"][0])
+        n = (os.path.getsize(path) - HEADER.itemsize) // RECORD.itemsize  # ignore a torn tail
+        self.records = (np.memmap(path, dtype=RECORD, mode="r", offset=HEADER.itemsize, shape=(n,))
+                        if n else np.zeros(0, dtype=RECORD))
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def t(self) -> np.ndarray:
+        """Seconds since base_ts for every record."""
+        return np.cumsum(self.records["dt_us"], dtype=np.int64) / 1e6
+
+    @property
+    def ts(self) -> np.ndarray:
+        return self.base_ts + self.t
+
+    def has(self, flag: int) -> np.ndarray:
+        return (self.records["flags"] & flag) != 0
+
+    def _masked(self, field: str, present: np.ndarray) -> np.ndarray:
+        out = self.records[field].astype(np.float32)
+        out[~present] = np.nan
+        return out
+
+    @property
+    def bottle(self) -> np.ndarray:
+        """(N, 4) xyxy, NaN where no bottle was detected."""
+        return self._masked("bottle", self.has(FLAG_BOTTLE))
+
+    @property
+    def bottle_center(self) -> np.ndarray:
+        b = self.bottle
+        return np.stack([(b[:, 0] + b[:, 2]) / 2, (b[:, 1] + b[:, 3]) / 2], axis=1)
+
+    @property
+    def hands(self) -> np.ndarray:
+        """(N, 2, 21, 2), hand axis is [left, right]."""
+        out = self.records["hands"].astype(np.float32)
+        for slot, flag in enumerate(_HAND_FLAGS):
+            out[~self.has(flag), slot] = np.nan
+        return out
+
+    def hand(self, side: str) -> np.ndarray:
+        return self.hands[:, 0 if side == "left" else 1]
+
+    @property
+    def mouth(self) -> np.ndarray:
+        return self._masked("mouth", self.has(FLAG_MOUTH))
+
+    @property
+    def ears(self) -> np.ndarray:
+        out = self.records["ears"].astype(np.float32)
+        for slot, flag in enumerate(_EAR_FLAGS):
+            out[~self.has(flag), slot] = np.nan
+        return out
+
+    @property
+    def ear_distance(self) -> np.ndarray:
+        e = self.ears
+        return np.hypot(e[:, 1, 0] - e[:, 0, 0], e[:, 1, 1] - e[:, 0, 1])
+
+
+def load(path: str) -> Trajectory:
+    return Trajectory(path)
@@ -1,5 +1,84 @@
 // src/lib/live.ts
-export function connectLive(onData: (d: any) => void) {
+
+// Compact binary subprotocol (keyframe + deltas). Keep in sync with backend/live_codec.py.
+const LIVE_SUBPROTOCOL = "rehab.live.v1";
+const KIND_KEYFRAME = 0x4b;
+const FIELDS = ["ts", "count", "detections", "active_task", "progress", "passed", "event", "task"] as const;
+const TASKS = ["reach_bottle", "grab_hold", "lift_to_mouth", "hold_at_mouth", "dump_into_mouth", "place_cup_down"];
+const EVENTS = ["task_passed"];
+const NONE_U8 = 0xff;
+const PROGRESS_STEPS = 200;
+
+type LiveState = Record<string, any>;
+
+// Applies one binary frame to `state` in place; returns false if the frame is unusable.
+function applyFrame(buf: ArrayBuffer, state: LiveState, base: { ts: number | null }): boolean {
+  const dv = new DataView(buf);
+  if (dv.byteLength < 2) return false;
+  const kind = dv.getUint8(0);
+  const mask = dv.getUint8(1);
+  const keyframe = kind === KIND_KEYFRAME;
+  if (!keyframe && base.ts === null) return false; // delta before keyframe
+  let o = 2;
+  const u8 = () => dv.getUint8(o++);
+  const pick = (table: string[], v: number) => (v === NONE_U8 ? null : table[v] ?? null);
+
+  for (let bit = 0; bit < FIELDS.length; bit++) {
+    if (!(mask & (1 << bit))) continue;
+    const f = FIELDS[bit];
+    switch (f) {
+      case "ts": {
+        if (keyframe) {
+          base.ts = dv.getFloat64(o, true);
+          o += 8;
+          state.ts = new Date(base.ts * 1000).toISOString();
+        } else {
+          const ms = dv.getUint32(o, true);
+          o += 4;
+          state.ts = new Date((base.ts as number) * 1000 + ms).toISOString();
+        }
+        break;
+      }
+      case "detections": {
+        const n = u8();
+        const dets = [];
+        for (let i = 0; i < n; i++) {
+          dets.push({
+            x: dv.getUint16(o, true),
+            y: dv.getUint16(o + 2, true),
+            w: dv.getUint16(o + 4, true),
+            h: dv.getUint16(o + 6, true),
+          });
+          o += 8;
+        }
+        state.detections = dets;
+        break;
+      }
+      case "count":
+        state.count = u8();
+        break;
+      case "progress": {
+        const q = u8();
+        state.progress = q === NONE_U8 ? null : q / PROGRESS_STEPS;
+        break;
+      }
+      case "passed":
+        state.passed = u8() === 1;
+        break;
+      case "event":
+        state.event = pick(EVENTS, u8());
+        break;
+      case "active_task":
+      case "task":
+        state[f] = pick(TASKS, u8());
+        break;
+    }
+  }
+  return true;
+}
+
+export function connectLive(onData: (d: any) => void, opts: { compact?: boolean } = {}) {
+  const compact = opts.compact ?? true;
   // Prefer VITE_API_BASE; otherwise default to the current page's origin.
   const base =
     (import.meta as any).env?.VITE_API_BASE ?? window.location.origin;
@@ -13,7 +92,11 @@ export function connectLive(onData: (d: any) => void) {
   let retryMs = 1000; // simple backoff on reconnect
 
   const open = () => {
-    ws = new WebSocket(wsUrl);
+    // Offer the compact protocol; servers that don't know it fall back to JSON text frames.
+    ws = compact ? new WebSocket(wsUrl, [LIVE_SUBPROTOCOL]) : new WebSocket(wsUrl);
+    ws.binaryType = "arraybuffer";
+    const state: LiveState = {};
+    const tsBase = { ts: null as number | null };
 
     ws.onopen = () => {
       // reset backoff on successful connection
@@ -25,6 +108,14 @@ export function connectLive(onData: (d: any) => void) {
     };
 
     ws.onmessage = (ev) => {
+      if (ev.data instanceof ArrayBuffer) {
+        try {
+          if (applyFrame(ev.data, state, tsBase)) onData({ ...state });
+        } catch {
+          // truncated/garbled frame; the next keyframe (on reconnect) resyncs
+        }
+        return;
+      }
       try {
         const data = JSON.parse(ev.data);
         onData(data);
@@ -0,0 +1,38 @@
+// src/lib/series.ts
+// Chart-resolution tick history from the backend (/metrics/series) instead of raw per-frame rows.
+
+export type SeriesField = "progress" | "fps" | "passed";
+
+export type MinMaxPoint = { t: string; min: number; max: number; mean: number; n: number };
+export type LttbPoint = { t: string; v: number };
+
+export type SeriesResponse<P> = {
+  field: SeriesField;
+  mode: "minmax" | "lttb";
+  bucket_s: number | null;
+  points: P[];
+};
+
+export async function fetchSeries<P = MinMaxPoint>(opts: {
+  field?: SeriesField;
+  since?: string;
+  until?: string;
+  sessionId?: string;
+  points?: number; // target number of points (ignored when bucketS is set)
+  bucketS?: number;
+  mode?: "minmax" | "lttb";
+  signal?: AbortSignal;
+} = {}): Promise<SeriesResponse<P>> {
+  const base = ((import.meta as any).env?.VITE_API_BASE ?? "http://localhost:8000").replace(/\/$/, "");
+  const q = new URLSearchParams();
+  q.set("field", opts.field ?? "progress");
+  q.set("mode", opts.mode ?? "minmax");
+  q.set("points", String(opts.points ?? 500));
+  if (opts.since) q.set("since", opts.since);
+  if (opts.until) q.set("until", opts.until);
+  if (opts.sessionId) q.set("session_id", opts.sessionId);
+  if (opts.bucketS) q.set("bucket_s", String(opts.bucketS));
+  const res = await fetch(`${base}/metrics/series?${q}`, { signal: opts.signal });
+  if (!res.ok) throw new Error(`series request failed: ${res.status}`);
+  return res.json();
+}